@@ -58,3 +58,20 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email']
+
+
+# 재시도 횟수를 모두 사용하고도 발송하지 못한 이메일 기록(dead letter)
+# 관리자 페이지에서 확인 후 다시 발송하거나 원인을 조치할 수 있도록 보관
+class EmailDeadLetter(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='사용자'
+    )
+    email = models.EmailField(max_length=320, verbose_name='수신 이메일')
+    subject = models.CharField(max_length=255, verbose_name='이메일 제목')
+    task_name = models.CharField(max_length=255, verbose_name='태스크명')
+    task_id = models.CharField(max_length=255, verbose_name='태스크 ID')
+    retries = models.PositiveIntegerField(default=0, verbose_name='재시도 횟수')
+    error = models.TextField(verbose_name='실패 원인')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성일')
@@ -0,0 +1,103 @@
+from celery import shared_task
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+
+from kombu.exceptions import OperationalError
+
+from .models import User, EmailDeadLetter
+
+from mailer import MailSender
+
+from dotenv import load_dotenv
+
+import hashlib
+import os
+
+load_dotenv()
+
+
+# 인증 이메일 발송 여부를 기록하는 캐시 키
+# 같은 사용자, 같은 토큰의 이메일은 한 번만 발송
+def get_verification_email_key(user_id, token):
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+
+    return f'verification_email:{user_id}:{token_hash}'
+
+
+# 인증 이메일을 생성하는 함수
+def make_verification_email(user, token):
+    # 이메일 인증 API 실행을 위해 URL에 액세스 토큰을 붙임
+    link = f'http://127.0.0.1:8000/api/v1/accounts/verify/{token}'
+    # 이메일 제목
+    email_subject = '이메일 인증을 완료해주세요.'
+    # 이메일 본문
+    email_body = (
+        f'안녕하세요, {user.username}님!\n아래의 링크를 클릭하시고 이메일 인증을 완료하시면 서비스를 이용하실 수 있습니다.\n{link}'
+    )
+
+    return EmailMessage(
+        email_subject,
+        email_body,
+        os.getenv('EMAIL_HOST_USER'),   # 이메일 보내는 주소
+        [user.email]                    # 이메일 받는 주소
+    )
+
+
+# Celery 태스크 등록을 위한 애노테이션
+@shared_task(bind=True, max_retries=settings.VERIFICATION_EMAIL_MAX_RETRIES)
+# 회원가입한 사용자에게 인증 이메일을 발송하는 기능
+# 발송에 실패하면 간격을 늘려가며 재시도하고, 재시도 횟수를 모두 사용하면 EmailDeadLetter에 기록
+# 발송 여부를 반환
+def send_verification_email(self, user_id, token):
+    # 이미 인증을 완료했거나 탈퇴한 사용자라면 발송하지 않음
+    user = User.objects.filter(id=user_id, is_active=False).first()
+    if user is None:
+        return False
+
+    # 같은 사용자, 같은 토큰으로 이미 발송했거나 다른 워커가 발송 중이라면 발송하지 않음
+    key = get_verification_email_key(user_id, token)
+    timeout = int(settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds())
+    if not cache.add(key, True, timeout):
+        return False
+
+    message = make_verification_email(user, token)
+
+    with MailSender() as sender:
+        if sender.send(message):
+            return True
+
+    # 재시도할 수 있도록 발송 기록 삭제
+    cache.delete(key)
+
+    if self.request.retries < self.max_retries:
+        raise self.retry(
+            countdown=settings.VERIFICATION_EMAIL_RETRY_DELAY * 2 ** self.request.retries
+        )
+
+    EmailDeadLetter.objects.create(
+        user=user,
+        email=user.email,
+        subject=message.subject,
+        task_name=self.name,
+        task_id=self.request.id or '',
+        retries=self.request.retries,
+        error=repr(sender.last_error)
+    )
+
+    return False
+
+
+# 인증 이메일 발송 태스크를 큐에 등록하는 함수
+# 브로커에 연결할 수 없다면 현재 프로세스(요청)에서 바로 실행
+# 이때는 재시도 횟수를 모두 사용한 것으로 실행하여, 재시도 없이 한 번만 발송을 시도하고 실패하면 EmailDeadLetter에 기록
+# 바로 실행하는 태스크는 재시도 간격 없이 재시도하므로, 메일 서버까지 응답하지 않으면 요청이 재시도 횟수만큼 지연되기 때문
+def enqueue_verification_email(user_id, token):
+    try:
+        send_verification_email.delay(user_id, token)
+    except OperationalError:
+        send_verification_email.apply(
+            args=[user_id, token],
+            retries=send_verification_email.max_retries
+        )
@@ -1,9 +1,37 @@
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.test import override_settings
 from django.urls import reverse
 
-from .models import User
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from celery import current_app
+
+from kombu.exceptions import OperationalError
+
+from django_redis import get_redis_connection
+
+from smtplib import SMTPServerDisconnected
+from unittest import mock
+
+import time
+
+from .models import User, EmailDeadLetter
+from .tasks import (
+    enqueue_verification_email,
+    send_verification_email,
+    get_verification_email_key
+)
+from .token_sessions import (
+    get_token_session_key,
+    get_token_session_timeout,
+    get_user_token_sessions_key
+)
 
 
 class UserSignupViewTestCase(APITestCase):
@@ -82,6 +110,94 @@ class UserSignupViewTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
+# 항상 발송에 실패하는 테스트용 이메일 백엔드
+class FailingEmailBackend(LocmemEmailBackend):
+    def send_messages(self, messages):
+        raise SMTPServerDisconnected('connection lost')
+
+
+class VerificationEmailTaskTestCase(APITestCase):
+    def setUp(self):
+        # 워커 없이 태스크를 바로 실행
+        self.addCleanup(
+            current_app.conf.update,
+            task_always_eager=current_app.conf.task_always_eager
+        )
+        current_app.conf.update(task_always_eager=True)
+
+        self.user_data = {
+            'username': 'test',
+            'email': 'test@email.com',
+            'phone': '010-1111-2222',
+            'password': 'qwerty123!@#',
+            'check_password': 'qwerty123!@#'
+        }
+
+    def test_signup_enqueue(self):
+        # 사용자 저장이 커밋된 후에 태스크가 실행됨
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.post(reverse('signup'), self.user_data)
+
+            self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['test@email.com'])
+
+    def test_idempotent(self):
+        user = User.objects.create_user(
+            username='test',
+            email='test@email.com',
+            password='qwerty123!@#'
+        )
+        self.addCleanup(cache.delete, get_verification_email_key(user.id, 'token'))
+
+        self.assertTrue(send_verification_email.apply(args=[user.id, 'token']).get())
+        # 같은 사용자, 같은 토큰으로는 다시 발송하지 않음
+        self.assertFalse(send_verification_email.apply(args=[user.id, 'token']).get())
+
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_BACKEND='accounts.tests.FailingEmailBackend')
+    def test_dead_letter(self):
+        user = User.objects.create_user(
+            username='test',
+            email='test@email.com',
+            password='qwerty123!@#'
+        )
+
+        result = send_verification_email.apply(args=[user.id, 'token']).get()
+
+        # 재시도 횟수를 모두 사용하면 dead letter로 기록
+        self.assertFalse(result)
+        dead_letter = EmailDeadLetter.objects.get(user=user)
+        self.assertEqual(dead_letter.email, 'test@email.com')
+        self.assertEqual(dead_letter.retries, send_verification_email.max_retries)
+        self.assertIn('connection lost', dead_letter.error)
+        # 재시도할 수 있도록 발송 기록이 남지 않음
+        self.assertIsNone(cache.get(get_verification_email_key(user.id, 'token')))
+
+    @override_settings(EMAIL_BACKEND='accounts.tests.FailingEmailBackend')
+    def test_broker_unavailable(self):
+        user = User.objects.create_user(
+            username='test',
+            email='test@email.com',
+            password='qwerty123!@#'
+        )
+
+        # 브로커에 연결할 수 없으면 요청에서 한 번만 발송을 시도하고, 실패하면 재시도 없이 dead letter로 기록
+        with mock.patch.object(
+            send_verification_email,
+            'delay',
+            side_effect=OperationalError('broker unavailable')
+        ), mock.patch.object(send_verification_email, 'retry') as retry:
+            enqueue_verification_email(user.id, 'token')
+
+        retry.assert_not_called()
+        self.assertEqual(EmailDeadLetter.objects.filter(user=user).count(), 1)
+
+
 class UserLoginViewTestCase(APITestCase):
     def setUp(self):
         self.url = reverse('login')
@@ -128,7 +244,7 @@ class UserLogoutViewTestCase(APITestCase):
     def setUp(self):
         self.url = reverse('logout')
 
-        User.objects.create_user(
+        self.user = User.objects.create_user(
             username='test',
             email='test@email.com',
             password='qwerty123!@#',
@@ -140,6 +256,11 @@ class UserLogoutViewTestCase(APITestCase):
             'password': 'qwerty123!@#'
         }
 
+        # 이전 테스트에서 같은 ID의 사용자가 남긴 세션 집합을 삭제
+        get_redis_connection('default').delete(
+            get_user_token_sessions_key(self.user.id)
+        )
+
         self.access_token = self.client.post(
             reverse('login'),
             self.login_data
@@ -154,3 +275,62 @@ class UserLogoutViewTestCase(APITestCase):
         response = self.client.post(self.url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_session_key(self):
+        redis = get_redis_connection('default')
+        key = get_token_session_key(AccessToken(self.access_token)['jti'])
+
+        # 토큰 문자열이 아닌 jti로 저장
+        self.assertTrue(redis.exists(key))
+        self.assertFalse(redis.exists(cache.make_key(self.access_token)))
+        self.assertLessEqual(redis.ttl(key), get_token_session_timeout())
+
+    def test_expired_sessions_pruned(self):
+        redis = get_redis_connection('default')
+        user_key = get_user_token_sessions_key(self.user.id)
+
+        # 로그아웃하지 않은 채 만료된 세션
+        redis.zadd(user_key, {'expired': time.time() - 1})
+
+        self.client.post(reverse('login'), self.login_data)
+
+        # 로그인할 때 만료된 세션은 집합에서 제거되고, 유효한 세션 두 개만 남음
+        self.assertIsNone(redis.zscore(user_key, 'expired'))
+        self.assertEqual(redis.zcard(user_key), 2)
+
+    def test_logout_twice(self):
+        self.client.post(self.url)
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_blacklist(self):
+        self.client.post(self.url)
+
+        self.assertEqual(
+            BlacklistedToken.objects.filter(token__user=self.user).count(),
+            1
+        )
+
+    def test_logout_all(self):
+        other_access_token = self.client.post(
+            reverse('login'),
+            self.login_data
+        ).data.get('access')
+
+        response = self.client.post(reverse('logout_all'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            BlacklistedToken.objects.filter(token__user=self.user).count(),
+            2
+        )
+
+        # 다른 세션의 액세스 토큰으로도 더 이상 로그아웃할 수 없음
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {other_access_token}'
+        )
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
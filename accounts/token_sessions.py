@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken
+)
+
+from django_redis import get_redis_connection
+
+import time
+
+
+# 로그인 세션 저장소
+# 액세스 토큰의 jti -> 리프레시 토큰의 jti를 저장하고, 사용자별로 액세스 토큰의 jti를 세션 만료 시각 순으로 정렬된 집합에 유지
+# 토큰 문자열 전체(수백 바이트) 대신 jti(32자)를 키와 값으로 사용하여 세션당 메모리 사용량을 줄임
+# 집합과 개수를 다루기 위해 Django 캐시가 사용하는 Redis에 직접 접근하며,
+# 키는 Django 캐시와 같은 규칙(cache.make_key)으로 만듦
+
+
+# 액세스 토큰의 세션 키
+def get_token_session_key(jti):
+    return cache.make_key(f'token_session:{jti}')
+
+
+# 사용자의 세션 집합(정렬된 집합) 키
+# 액세스 토큰의 jti를 멤버로, 세션의 만료 시각을 점수로 저장
+def get_user_token_sessions_key(user_id):
+    return cache.make_key(f'token_session_index:{user_id}')
+
+
+# 세션 유지 시간(초)
+# 리프레시 토큰이 만료되면 세션으로 할 수 있는 일(로그아웃 시 블랙리스트 등록)이 없으므로 리프레시 토큰의 유효 기간과 같음
+def get_token_session_timeout():
+    return int(settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'].total_seconds())
+
+
+# 로그인 시 발급한 토큰 쌍을 세션으로 저장하는 함수
+# 세션 저장, 사용자 집합 추가, 만료된 세션 정리, 집합 만료 시간 갱신을 파이프라인으로 한 번에 전송
+# 집합의 점수는 세션의 만료 시각이므로, 로그인할 때마다 이미 만료된 세션을 집합에서 제거하여
+# 로그아웃하지 않고 계속 로그인하는 사용자의 집합에도 유효한 세션만 남음
+def create_token_session(user_id, access_jti, refresh_jti):
+    timeout = get_token_session_timeout()
+    user_key = get_user_token_sessions_key(user_id)
+    now = time.time()
+
+    pipeline = get_redis_connection('default').pipeline()
+    pipeline.set(get_token_session_key(access_jti), refresh_jti, ex=timeout)
+    pipeline.zremrangebyscore(user_key, '-inf', now)
+    pipeline.zadd(user_key, {access_jti: now + timeout})
+    pipeline.expire(user_key, timeout)
+    pipeline.execute()
+
+
+# 액세스 토큰의 세션을 삭제하고 리프레시 토큰의 jti를 반환하는 함수
+# 세션이 없다면(로그아웃했거나 만료되었다면) None을 반환
+def pop_token_session(user_id, access_jti):
+    key = get_token_session_key(access_jti)
+
+    pipeline = get_redis_connection('default').pipeline()
+    pipeline.get(key)
+    pipeline.delete(key)
+    pipeline.zrem(get_user_token_sessions_key(user_id), access_jti)
+    refresh_jti, _, _ = pipeline.execute()
+
+    if refresh_jti is None:
+        return None
+
+    return refresh_jti.decode()
+
+
+# 사용자의 모든 세션을 삭제하고 리프레시 토큰의 jti 리스트를 반환하는 함수
+# 집합을 읽고 지우는 동작은 트랜잭션(MULTI)으로 묶어, 그 사이에 추가된 세션이 함께 지워지지 않도록 함
+def pop_user_token_sessions(user_id):
+    user_key = get_user_token_sessions_key(user_id)
+    redis = get_redis_connection('default')
+
+    # 이미 만료된 세션은 제외
+    pipeline = redis.pipeline()
+    pipeline.zrangebyscore(user_key, time.time(), '+inf')
+    pipeline.delete(user_key)
+    access_jtis, _ = pipeline.execute()
+
+    if not access_jtis:
+        return []
+
+    keys = [get_token_session_key(jti.decode()) for jti in access_jtis]
+
+    pipeline = redis.pipeline()
+    pipeline.mget(keys)
+    pipeline.delete(*keys)
+    refresh_jtis, _ = pipeline.execute()
+
+    # 집합을 읽은 뒤 만료된 세션은 제외
+    return [jti.decode() for jti in refresh_jtis if jti is not None]
+
+
+# 리프레시 토큰들을 jti로 찾아 한 번에 블랙리스트에 등록하는 함수
+# 이미 등록된 토큰은 무시
+def blacklist_refresh_tokens(refresh_jtis):
+    token_ids = OutstandingToken.objects.filter(
+        jti__in=refresh_jtis
+    ).values_list('id', flat=True)
+
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token_id=token_id) for token_id in token_ids],
+        ignore_conflicts=True
+    )
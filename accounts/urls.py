@@ -6,7 +6,8 @@ from .views import (
     SignupAPIView,
     EmailVerifyAPIView,
     LoginAPIView,
-    LogoutAPIView
+    LogoutAPIView,
+    LogoutAllAPIView
 )
 
 
@@ -15,5 +16,6 @@ urlpatterns = [
     path('verify/<str:token>', EmailVerifyAPIView.as_view(), name='email_verify'),
     path('login/', LoginAPIView.as_view(), name='login'),
     path('logout/', LogoutAPIView.as_view(), name='logout'),
+    path('logout/all/', LogoutAllAPIView.as_view(), name='logout_all'),
     path('token/refresh/', TokenRefreshView.as_view(), name='refresh')
 ]
@@ -3,26 +3,26 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
-from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
 from django.contrib.auth import authenticate
-from django.core.mail import send_mail
-from django.core.cache import cache
+from django.db import transaction
 
 from drf_yasg.utils import swagger_auto_schema
 
-from dotenv import load_dotenv
-
 from swagger_parameters import *
 
 from .serializers import SignupSerializer, LoginSerializer
 from .models import User
-
-import os
-
-load_dotenv()
+from .tasks import enqueue_verification_email
+from .token_sessions import (
+    create_token_session,
+    pop_token_session,
+    pop_user_token_sessions,
+    blacklist_refresh_tokens
+)
 
 
 # api/v1/accounts/signup/
@@ -44,23 +44,12 @@ class SignupAPIView(APIView):
             user = serializer.save()
 
             # 이메일 인증에 액세스 토큰을 사용
-            refresh = AccessToken.for_user(user)
-
-            # 이메일 인증 API 실행을 위해 URL에 액세스 토큰을 붙임
-            link = f'http://127.0.0.1:8000/api/v1/accounts/verify/{str(refresh)}'
-            # 이메일 제목
-            email_subject = '이메일 인증을 완료해주세요.'
-            # 이메일 본문
-            email_body = (
-                f'안녕하세요, {user.username}님!\n아래의 링크를 클릭하시고 이메일 인증을 완료하시면 서비스를 이용하실 수 있습니다.\n{link}'
-            )
+            token = AccessToken.for_user(user)
 
-            # 실제로 이메일 전송
-            send_mail(
-                email_subject,
-                email_body,
-                os.getenv('EMAIL_HOST_USER'),   # 이메일 보내는 주소
-                [user.email]                    # 이메일 받는 주소
+            # 인증 이메일은 Celery 태스크로 발송하므로 메일 서버 응답을 기다리지 않음
+            # 사용자 저장이 커밋된 후에 등록해야 워커가 사용자를 조회할 수 있음
+            transaction.on_commit(
+                lambda: enqueue_verification_email(user.id, str(token))
             )
 
             return Response(
@@ -150,18 +139,18 @@ class LoginAPIView(APIView):
 
             # 액세스 토큰과 리프레시 토큰을 함께 발급
             token = TokenObtainPairSerializer.get_token(user)
-            refresh_token = str(token)
-            access_token = str(token.access_token)
+            # access_token 속성은 호출할 때마다 새 토큰을 만들므로 한 번만 호출
+            access_token = token.access_token
 
-            # 리프레시 토큰의 보안과 성능을 위해 Redis에 캐시 데이터로 저장
-            # 리프레시 토큰의 만료 기간과 같은 1시간(=3600초)
-            cache.set(f'{access_token}', refresh_token, 3600)
+            # 리프레시 토큰은 반환하지 않고 액세스 토큰의 jti로 찾을 수 있도록 Redis에 세션으로 저장
+            # 리프레시 토큰의 만료 기간 동안 유지
+            create_token_session(user.id, access_token['jti'], token['jti'])
 
             return Response(
                 {
                     'message': '로그인 되었습니다.',
                     'data': serializer.data,
-                    'access': access_token
+                    'access': str(access_token)
                 }, status=status.HTTP_200_OK
             )
 
@@ -183,47 +172,60 @@ class LogoutAPIView(APIView):
         manual_parameters=[HEADER_TOKEN],
         responses={
             200: '로그아웃이 완료되었습니다.',
-            400: '토큰을 처리하던 중 에러가 발생했습니다.',
             401: '인증되지 않은 사용자입니다.'
         }
     )
     def post(self, request):
         user = request.user
 
-        # 요청 헤더의 Authorization -> Bearer <Token>
-        # 스킴과 토큰 사이에는 공백이 있으므로, split 함수로 분리
-        # 토큰만 가져옴
-        access_token = request.headers.get('Authorization').split()[1]
-        refresh_token = cache.get(f'{access_token}')
+        # 인증에 사용된 액세스 토큰(request.auth)의 jti로 세션을 찾음
+        refresh_jti = pop_token_session(user.id, request.auth['jti'])
 
-        # 리프레시 토큰이 없었을 경우
-        # 인증되지 않았거나 리프레시 토큰도 만료되었거나
+        # 세션이 없었을 경우
+        # 이미 로그아웃했거나 리프레시 토큰도 만료되었거나
         # 어느쪽이던 인증이 확인되지 않음
-        if refresh_token is None:
+        if refresh_jti is None:
             return Response(
                 {
                     'message': '로그아웃할 수 없습니다.'
                 }, status=status.HTTP_401_UNAUTHORIZED
             )
 
-        try:
-            # 리프레시 토큰을 단순 문자열에서 리프레시 토큰 타입으로 형변환
-            token = RefreshToken(refresh_token)
-            # 리프레시 토큰을 블랙리스트에 등록하여 재사용 차단
-            token.blacklist()
+        # 리프레시 토큰을 블랙리스트에 등록하여 재사용 차단
+        blacklist_refresh_tokens([refresh_jti])
 
-            # 캐시 데이터에서 리프레시 토큰 삭제
-            cache.delete(f'{access_token}')
+        return Response(
+            {
+                'message': '로그아웃이 완료되었습니다.'
+            }, status=status.HTTP_200_OK
+        )
 
-            return Response(
-                {
-                    'message': '로그아웃이 완료되었습니다.'
-                }, status=status.HTTP_200_OK
-            )
-        # 토큰이 유효하지 않거나 에러가 발생했을 경우
-        except (InvalidToken, TokenError):
-            return Response(
-                {
-                    'message': '로그아웃 처리 중 에러가 발생했습니다.'
-                }, status=status.HTTP_400_BAD_REQUEST
-            )
+
+# api/v1/accounts/logout/all/
+class LogoutAllAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_id='모든 기기에서 로그아웃',
+        operation_description='사용자가 로그인한 모든 세션에서 로그아웃을 진행합니다.',
+        tags=['사용자'],
+        manual_parameters=[HEADER_TOKEN],
+        responses={
+            200: '모든 세션에서 로그아웃이 완료되었습니다. 로그아웃한 세션 수가 반환됩니다.',
+            401: '인증되지 않은 사용자입니다.'
+        }
+    )
+    def post(self, request):
+        user = request.user
+
+        refresh_jtis = pop_user_token_sessions(user.id)
+
+        # 모든 세션의 리프레시 토큰을 한 번에 블랙리스트에 등록
+        blacklist_refresh_tokens(refresh_jtis)
+
+        return Response(
+            {
+                'message': '모든 세션에서 로그아웃이 완료되었습니다.',
+                'count': len(refresh_jtis)
+            }, status=status.HTTP_200_OK
+        )
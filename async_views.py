@@ -0,0 +1,45 @@
+from rest_framework.views import APIView
+
+from asgiref.sync import sync_to_async
+
+import asyncio
+
+
+# 비동기 핸들러(async def get 등)를 사용할 수 있는 APIView
+# DRF의 APIView는 동기 핸들러만 지원하므로 dispatch를 비동기로 다시 작성함
+# ASGI 서버(uvicorn 워커)에서 실행하면 쿼리 결과를 기다리는 동안 워커가 다른 요청을 처리할 수 있음
+# WSGI 서버에서도 Django가 요청마다 이벤트 루프를 만들어 실행하므로 그대로 동작함
+#
+# 핸들러 안에서는 비동기 ORM(aget, aaggregate, async for)을 사용해야 하며,
+# 동기 함수는 sync_to_async로 감싸서 호출해야 함
+class AsyncAPIView(APIView):
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # 인증(JWT의 사용자 조회), 권한 확인은 동기 코드이므로 스레드에서 실행
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self,
+                    request.method.lower(),
+                    self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            # OPTIONS 등 APIView에 정의된 동기 핸들러도 그대로 사용
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+
+        return self.response
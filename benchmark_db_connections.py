@@ -0,0 +1,70 @@
+import django
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.core import signals
+from django.db import connection
+
+from categories.models import Category
+
+
+# 요청 한 번을 흉내내는 함수
+# Django는 요청 시작과 끝에 close_old_connections를 호출하므로, 같은 신호를 보내 연결 재사용 여부를 그대로 재현
+def simulate_request():
+    signals.request_started.send(sender=None)
+    try:
+        list(Category.objects.all())
+    finally:
+        signals.request_finished.send(sender=None)
+
+
+# CONN_MAX_AGE를 바꿔가며 요청 시간을 측정하는 함수
+# 반환값: (요청 시간 리스트(밀리초), 새로 연결한 횟수)
+def measure(conn_max_age, iterations):
+    connection.close()
+    connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+
+    durations = []
+    connect_count = 0
+    for _ in range(iterations):
+        if connection.connection is None:
+            connect_count += 1
+
+        started = time.perf_counter()
+        simulate_request()
+        durations.append((time.perf_counter() - started) * 1000)
+
+    connection.close()
+
+    return durations, connect_count
+
+
+def print_result(label, durations, connect_count):
+    durations = sorted(durations)
+    p95 = durations[int(len(durations) * 0.95) - 1]
+
+    print(
+        f'{label:<24} '
+        f'평균 {statistics.mean(durations):7.2f}ms  '
+        f'중앙값 {statistics.median(durations):7.2f}ms  '
+        f'p95 {p95:7.2f}ms  '
+        f'새 연결 {connect_count}회'
+    )
+
+
+# python benchmark_db_connections.py [반복 횟수]
+# .env의 DB 설정으로 연결하며, 요청마다 새로 연결할 때와 연결을 재사용할 때의 요청 시간을 비교
+if __name__ == '__main__':
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    conn_max_age = connection.settings_dict['CONN_MAX_AGE'] or 60
+
+    # 첫 연결과 쿼리 캐시 등의 영향을 줄이기 위해 한 번 실행
+    measure(0, 1)
+
+    print_result('CONN_MAX_AGE=0', *measure(0, iterations))
+    print_result(f'CONN_MAX_AGE={conn_max_age}', *measure(conn_max_age, iterations))
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BudgetsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'budgets'
+
+    def ready(self):
+        # 예산 내역 변경 시 사용자의 예산 현황 캐시를 삭제하는 시그널 등록
+        from . import signals
@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from categories.registry import get_categories
+from .models import CategoryBudgetStats
+from .stats import CATEGORY_AVERAGE_KEY, rebuild_category_budget_stats
+
+import math
+
+
+# 카테고리별 예산 통계(10행)로 전체 사용자의 카테고리별 예산 평균과 표준편차를 산출하는 함수
+# 예산 추천에 사용되며, 예산 내역이 없는 카테고리의 평균과 표준편차는 0
+# 통계 행이 아직 없는 카테고리(최초 배포 직후, 새로 추가한 카테고리 등)는 예산 내역으로 먼저 계산
+# 예산 내역이 없는 카테고리도 0인 통계 행이 만들어지므로 다음 산출부터는 다시 계산하지 않음
+def compute_category_averages():
+    categories = get_categories()
+
+    stats = {
+        stat.category_id: stat
+        for stat in CategoryBudgetStats.objects.all()
+    }
+
+    missing_ids = [
+        category.id for category in categories if category.id not in stats
+    ]
+    if missing_ids:
+        rebuild_category_budget_stats(missing_ids)
+
+        stats.update({
+            stat.category_id: stat
+            for stat in CategoryBudgetStats.objects.filter(category__in=missing_ids)
+        })
+
+    averages = {}
+    deviations = {}
+    for category in categories:
+        stat = stats.get(category.id)
+
+        if stat is None or stat.count == 0:
+            averages[category.name] = 0
+            deviations[category.name] = 0
+            continue
+
+        averages[category.name] = stat.sum / stat.count
+
+        # 분산 = (제곱합 x 건수 - 합계^2) / 건수^2
+        # 정수 연산으로 계산하여 큰 금액에서도 오차가 생기지 않도록 함
+        variance = (
+            (int(stat.sum_sq) * stat.count - stat.sum * stat.sum) /
+            (stat.count * stat.count)
+        )
+        deviations[category.name] = math.sqrt(max(variance, 0))
+
+    return {
+        'averages': averages,
+        'deviations': deviations,
+        'updated_at': timezone.now().isoformat()
+    }
+
+
+# 카테고리별 예산 평균을 다시 산출하여 캐시에 저장하는 함수
+# Celery 주기 작업(budgets.tasks.refresh_category_average_cache)에서 호출
+def refresh_category_averages():
+    category_averages = compute_category_averages()
+    cache.set(
+        CATEGORY_AVERAGE_KEY,
+        category_averages,
+        settings.CATEGORY_AVERAGE_TIMEOUT
+    )
+
+    return category_averages
+
+
+# 캐시에 저장된 카테고리별 예산 평균을 반환하는 함수
+# 주기 작업이 아직 실행되지 않았거나 만료되었다면 직접 산출하여 캐시에 저장
+def get_category_averages():
+    category_averages = cache.get(CATEGORY_AVERAGE_KEY)
+
+    if category_averages is None:
+        category_averages = refresh_category_averages()
+
+    return category_averages
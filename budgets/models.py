@@ -21,3 +21,41 @@ class Budget(models.Model):
     start_at = models.DateField(verbose_name='기간 시작일')
     end_at = models.DateField(verbose_name='기간 종료일')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성일')
+
+    class Meta:
+        indexes = [
+            # 사용자별 예산 기간 검색과 (기간 시작일, id) 기준 페이지네이션
+            models.Index(
+                fields=['user', 'start_at', 'end_at'],
+                name='budget_user_period_idx'
+            ),
+            # 사용자와 관계없이 특정 예산 기간으로 검색(지출 통계의 타 사용자 비교)
+            models.Index(
+                fields=['start_at', 'end_at'],
+                name='budget_period_idx'
+            ),
+        ]
+
+
+# 카테고리별 전체 예산 건수, 합계, 제곱합을 유지하는 통계 테이블
+# 예산 생성, 수정, 삭제 API에서 F 표현식으로 증감하므로(budgets/stats.py) 예산 테이블을 다시 읽지 않고
+# 평균과 분산을 구할 수 있음
+# 관리자 페이지 수정 등 API를 거치지 않은 변경은 주기 작업이 다시 계산하여 보정
+class CategoryBudgetStats(models.Model):
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='budget_stats',
+        verbose_name='카테고리'
+    )
+
+    count = models.PositiveBigIntegerField(default=0, verbose_name='예산 건수')
+    sum = models.PositiveBigIntegerField(default=0, verbose_name='예산 합계')
+    # 금액 제곱의 합은 BIGINT 범위를 넘을 수 있으므로 정수 자릿수가 넉넉한 Decimal로 저장
+    sum_sq = models.DecimalField(
+        max_digits=40,
+        decimal_places=0,
+        default=0,
+        verbose_name='예산 제곱합'
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='수정일')
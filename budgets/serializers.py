@@ -1,9 +1,9 @@
 from rest_framework import serializers
 
-from accounts.models import User
-from categories.models import Category
 from .models import Budget
 
+from serializer_fields import AMOUNT_RANGE_KWARGS
+
 
 class BudgetSerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,8 +11,20 @@ class BudgetSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+# 예산 생성에서 카테고리별 예산 하나를 검증하는 시리얼라이저
+# 카테고리는 미리 읽어둔 카테고리 목록에서 찾고, 사용자는 요청한 사용자로 지정하므로
+# 카테고리마다 사용자, 카테고리를 조회하는 쿼리가 발생하지 않음
+class BudgetItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Budget
+        fields = ['amount', 'start_at', 'end_at']
+        extra_kwargs = {'amount': AMOUNT_RANGE_KWARGS}
+
+
+# 카테고리명은 연관 객체에서 바로 가져오므로
+# 쿼리셋에 select_related('category')를 적용해야 추가 쿼리가 발생하지 않음
 class BudgetListSerializer(serializers.ModelSerializer):
-    category = serializers.SerializerMethodField()
+    category = serializers.CharField(source='category.name', read_only=True)
 
     class Meta:
         model = Budget
@@ -24,16 +36,12 @@ class BudgetListSerializer(serializers.ModelSerializer):
             'created_at'
         ]
 
-    def get_category(self, obj):
-        budget = Budget.objects.get(id=obj.id)
-        category_id = budget.category.id
-
-        return Category.objects.get(id=category_id).name
-
 
+# 계정명과 카테고리명은 연관 객체에서 바로 가져오므로
+# 쿼리셋에 select_related('user', 'category')를 적용해야 추가 쿼리가 발생하지 않음
 class BudgetDetailSerializer(serializers.ModelSerializer):
-    user = serializers.SerializerMethodField()
-    category = serializers.SerializerMethodField()
+    user = serializers.CharField(source='user.username', read_only=True)
+    category = serializers.CharField(source='category.name', read_only=True)
 
     class Meta:
         model = Budget
@@ -45,15 +53,3 @@ class BudgetDetailSerializer(serializers.ModelSerializer):
             'end_at',
             'created_at'
         ]
-
-    def get_user(self, obj):
-        budget = Budget.objects.get(id=obj.id)
-        user_id = budget.user.id
-
-        return User.objects.get(id=user_id).username
-
-    def get_category(self, obj):
-        budget = Budget.objects.get(id=obj.id)
-        category_id = budget.category.id
-
-        return Category.objects.get(id=category_id).name
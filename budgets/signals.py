@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Budget
+from .status import invalidate_budget_status
+
+
+# 예산 내역 생성, 수정, 삭제 시 사용자의 예산 현황 캐시 삭제
+# bulk_create는 시그널이 발생하지 않으므로 예산 생성 API에서 직접 삭제
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def invalidate_budget_status_on_budget(sender, instance, **kwargs):
+    invalidate_budget_status(instance.user_id)
@@ -0,0 +1,104 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from categories.models import Category
+from .models import Budget, CategoryBudgetStats
+
+from collections import defaultdict
+from decimal import Decimal
+
+
+# 카테고리별 예산 평균 캐시 키(budgets/averages.py)
+# 예산 통계가 바뀌면 이 캐시를 삭제
+CATEGORY_AVERAGE_KEY = 'category_budget_average'
+
+
+# 카테고리별 예산 통계를 예산 내역으로 다시 계산하는 함수
+# category_ids가 없으면 전체 카테고리를 다시 계산
+# 통계 행을 먼저 잠그므로, 계산하는 동안 API에서 반영하려는 증감은 계산이 끝난 뒤에 적용됨
+def rebuild_category_budget_stats(category_ids=None):
+    budgets = Budget.objects.order_by()
+    stats = CategoryBudgetStats.objects.all()
+
+    if category_ids is not None:
+        budgets = budgets.filter(category__in=category_ids)
+        stats = stats.filter(category__in=category_ids)
+
+    with transaction.atomic():
+        list(stats.select_for_update())
+
+        grouped = {
+            row['category']: row
+            for row in budgets.values('category').annotate(
+                count=Count('id'),
+                sum=Sum('amount'),
+                sum_sq=Sum(
+                    Cast('amount', DecimalField(max_digits=40, decimal_places=0)) *
+                    Cast('amount', DecimalField(max_digits=40, decimal_places=0)),
+                    output_field=DecimalField(max_digits=40, decimal_places=0)
+                )
+            )
+        }
+
+        # 예산 내역이 없는 카테고리도 0으로 통계 행을 만들어,
+        # 통계 행이 없는 카테고리는 아직 계산한 적 없는 카테고리가 되도록 함
+        if category_ids is None:
+            category_ids = Category.objects.values_list('id', flat=True)
+
+        for category_id in category_ids:
+            if category_id not in grouped:
+                grouped[category_id] = {'count': 0, 'sum': 0, 'sum_sq': 0}
+
+        for category_id, row in grouped.items():
+            CategoryBudgetStats.objects.update_or_create(
+                category_id=category_id,
+                defaults={
+                    'count': row['count'],
+                    'sum': row['sum'] or 0,
+                    'sum_sq': row['sum_sq'] or 0
+                }
+            )
+
+
+# 예산 생성, 수정, 삭제를 카테고리별 예산 통계에 반영하는 함수
+# added, removed: (카테고리 ID, 금액) 리스트
+# 예산 내역을 저장한 트랜잭션 안에서 호출해야 하며, 통계 행은 F 표현식으로 증감하므로 동시에 요청이 와도 안전함
+# 통계 행이 아직 없는 카테고리는 이미 저장된 예산 내역으로 새로 계산
+def update_category_budget_stats(added=(), removed=()):
+    deltas = defaultdict(lambda: [0, 0, 0])
+
+    for category_id, amount in added:
+        deltas[category_id][0] += 1
+        deltas[category_id][1] += amount
+        deltas[category_id][2] += amount * amount
+
+    for category_id, amount in removed:
+        deltas[category_id][0] -= 1
+        deltas[category_id][1] -= amount
+        deltas[category_id][2] -= amount * amount
+
+    missing_ids = []
+    for category_id, (count, total, total_sq) in deltas.items():
+        if count == 0 and total == 0 and total_sq == 0:
+            continue
+
+        updated = CategoryBudgetStats.objects.filter(
+            category=category_id
+        ).update(
+            count=F('count') + count,
+            sum=F('sum') + total,
+            sum_sq=F('sum_sq') + Decimal(total_sq),
+            updated_at=timezone.now()
+        )
+
+        if not updated:
+            missing_ids.append(category_id)
+
+    if missing_ids:
+        rebuild_category_budget_stats(missing_ids)
+
+    # 예산 추천에 사용하는 카테고리별 평균 캐시는 커밋 후 삭제하여 다음 요청에서 다시 산출
+    transaction.on_commit(lambda: cache.delete(CATEGORY_AVERAGE_KEY))
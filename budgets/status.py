@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from categories.registry import get_categories
+from spends.reports import get_consulting_frames
+
+
+# 사용자별 예산 현황 캐시 키
+def get_budget_status_key(user_id):
+    return f'budget_status:{user_id}'
+
+
+# 이번달 예산안의 카테고리별 예산, 지출, 남은 금액, 남은 기간 동안의 일일 지출 가능 금액을 산출하는 함수
+# 컨설팅 이메일과 같은 계산(spends.reports.get_consulting_frames)을 사용하므로 이메일과 같은 금액이 나옴
+# 예산 내역이 없다면 None을 반환
+# 예산 기간의 남은 일수가 0일이라면 일일 지출 가능 금액은 None
+def compute_budget_status(user_id, today):
+    categories = get_categories()
+    frames = get_consulting_frames([user_id], categories, today)
+
+    if user_id not in frames['budget'].index:
+        return None
+
+    budget = frames['budget'].loc[user_id]
+    spend = frames['spend'].loc[user_id]
+    remain = frames['remain'].loc[user_id]
+    period = frames['periods'].loc[user_id]
+
+    can_spend = None
+    can_spend_total = None
+    if user_id in frames['can_spend'].index:
+        can_spend = frames['can_spend'].loc[user_id]
+        can_spend_total = int(frames['can_spend_total'][user_id])
+
+    return {
+        'start_at': period['period_start'].date().isoformat(),
+        'end_at': period['period_end'].date().isoformat(),
+        'last_days': int(frames['last_days'][user_id]),
+        'total': {
+            'budget': int(budget.sum()),
+            'spend': int(spend.sum()),
+            'remain': int(remain.sum()),
+            'can_spend': can_spend_total
+        },
+        'categories': {
+            category.name: {
+                'budget': int(budget[category.id]),
+                'spend': int(spend[category.id]),
+                'remain': int(remain[category.id]),
+                'can_spend': None if can_spend is None else int(can_spend[category.id])
+            } for category in categories
+        }
+    }
+
+
+# 캐시에 저장된 예산 현황을 반환하는 함수
+# 캐시가 없거나 다른 날짜에 산출한 값이라면 다시 산출하여 캐시에 저장
+def get_budget_status(user_id, today):
+    key = get_budget_status_key(user_id)
+    cached = cache.get(key)
+
+    if cached is not None and cached['date'] == today.isoformat():
+        return cached['data']
+
+    data = compute_budget_status(user_id, today)
+    cache.set(
+        key,
+        {'date': today.isoformat(), 'data': data},
+        settings.BUDGET_STATUS_TIMEOUT
+    )
+
+    return data
+
+
+# 사용자의 예산 현황 캐시를 삭제하는 함수
+# 커밋 전에 다른 요청이 이전 데이터로 다시 산출하여 저장할 수 있으므로
+# 커밋 후에 한 번 더 삭제
+def invalidate_budget_status(user_id):
+    key = get_budget_status_key(user_id)
+
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from .averages import refresh_category_averages
+from .stats import rebuild_category_budget_stats
+
+
+# Celery 태스크 등록을 위한 애노테이션
+@shared_task
+# 예산 추천에 사용할 카테고리별 예산 통계와 평균을 갱신하는 기능
+# API를 거치지 않은 예산 변경(관리자 페이지, 데이터 이관 등)으로 어긋난 통계를 예산 내역으로 보정
+def refresh_category_average_cache():
+    rebuild_category_budget_stats()
+    refresh_category_averages()
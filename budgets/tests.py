@@ -1,7 +1,31 @@
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 
-from django.urls import reverse
+from django.core.cache import cache
+from django.db.models import Avg, Count, Sum
+from django.test import TestCase
+from django.urls import resolve, reverse
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from asgiref.sync import iscoroutinefunction
+
+from accounts.models import User
+from categories.registry import get_categories
+from spends.models import Spend
+from spends.reports import make_consulting_email_bodies, render_consulting_email_body
+
+from datetime import date
+from unittest import mock
+import statistics
+from .averages import CATEGORY_AVERAGE_KEY, get_category_averages
+from .models import Budget, CategoryBudgetStats
+from .stats import rebuild_category_budget_stats
+from .status import get_budget_status, get_budget_status_key
+from .tasks import refresh_category_average_cache
+from .serializers import BudgetListSerializer, BudgetDetailSerializer
+
+from testing import QueryPlanTestMixin
 
 
 class BudgetViewAuthorizedTestCase(APITestCase):
@@ -63,6 +87,62 @@ class BudgetViewAuthorizedTestCase(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def test_create_atomic(self):
+        request_data = {
+            'start_at': '2030-01-01',
+            'end_at': '2030-01-31',
+            'budgets': {
+                'house': 1000000,
+                'INVALID': 100000
+            }
+        }
+
+        response = self.client.post(
+            path=reverse('budget_create'),
+            data=request_data
+        )
+
+        if response.status_code != 400:
+            print(response.data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # 하나라도 잘못된 값이 있으면 아무것도 저장되지 않음
+        self.assertFalse(
+            Budget.objects.filter(start_at='2030-01-01').exists()
+        )
+
+    def test_create_upsert(self):
+        request_data = {
+            'start_at': '2030-01-01',
+            'end_at': '2030-01-31',
+            'budgets': {
+                'house': 1000000,
+                'food': 100000
+            }
+        }
+
+        self.client.post(path=reverse('budget_create'), data=request_data)
+
+        request_data['budgets'] = {'house': 500000}
+        request_data['upsert'] = True
+
+        response = self.client.post(
+            path=reverse('budget_create'),
+            data=request_data
+        )
+
+        if response.status_code != 201:
+            print(response.data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # 같은 기간, 같은 카테고리의 예산만 교체됨
+        self.assertEqual(
+            list(Budget.objects.filter(
+                start_at='2030-01-01'
+            ).order_by('category').values_list('category__name', 'amount')),
+            [('house', 500000), ('food', 100000)]
+        )
+
     def test_create_no_category(self):
         request_data = {
             'start_at': '2023-11-10',
@@ -177,6 +257,30 @@ class BudgetViewAuthorizedTestCase(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
 
+    def test_create_out_of_range_amount(self):
+        request_data = {
+            'start_at': '2030-01-01',
+            'end_at': '2030-01-31',
+            'budgets': {
+                'house': 1000000,
+                'food': 2147483648
+            }
+        }
+
+        response = self.client.post(
+            path=reverse('budget_create'),
+            data=request_data
+        )
+
+        if response.status_code != 400:
+            print(response.data)
+
+        # 컬럼의 범위를 넘는 금액은 저장 전에 검증하여 400을 응답
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(
+            Budget.objects.filter(start_at='2030-01-01').exists()
+        )
+
     def test_create_invalid_start_at(self):
         request_data = {
             'start_at': 'INVALID',
@@ -225,6 +329,37 @@ class BudgetViewAuthorizedTestCase(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_list_pagination(self):
+        response = self.client.get(reverse('budget_list'))
+        budgets = response.data.get('list')
+
+        # 페이지 크기를 3으로 설정하고 커서를 따라가며 전체 목록 수집
+        paged_budgets = []
+        params = {'page_size': 3}
+        while True:
+            response = self.client.get(reverse('budget_list'), params)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data.get('list')), 3)
+
+            paged_budgets += response.data.get('list')
+            if response.data.get('next') is None:
+                break
+            params['cursor'] = response.data.get('next')
+
+        self.assertEqual(paged_budgets, budgets)
+
+    def test_list_invalid_cursor(self):
+        response = self.client.get(
+            reverse('budget_list'),
+            {'cursor': 'INVALID'}
+        )
+
+        if response.status_code != 400:
+            print(response.data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_detail_default(self):
         response = self.client.get(
             '/api/v1/budgets/detail/80'
@@ -461,3 +596,392 @@ class BudgetViewUnauthorizedTestCase(APITestCase):
             print(response.data)
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class BudgetSerializerQueryTestCase(TestCase):
+    fixtures = ['db_dump_data.json']
+
+    # 직렬화할 예산 수와 상관없이 쿼리는 한 번만 발생해야 함
+    def test_list_serializer_query_count(self):
+        with self.assertNumQueries(1):
+            small = BudgetListSerializer(
+                Budget.objects.filter(user=1).select_related('category'),
+                many=True
+            ).data
+
+        with self.assertNumQueries(1):
+            large = BudgetListSerializer(
+                Budget.objects.all().select_related('category'),
+                many=True
+            ).data
+
+        self.assertLess(len(small), len(large))
+
+    def test_detail_serializer_query_count(self):
+        with self.assertNumQueries(1):
+            budget = Budget.objects.select_related('user', 'category').first()
+            data = BudgetDetailSerializer(budget).data
+
+        self.assertEqual(data.get('user'), budget.user.username)
+        self.assertEqual(data.get('category'), budget.category.name)
+
+
+class BudgetQueryPlanTestCase(QueryPlanTestMixin, TestCase):
+    fixtures = ['db_dump_data.json']
+
+    def test_user_period_index(self):
+        plan = self.explain(Budget.objects.filter(
+            user=1,
+            start_at__gte='2023-11-01',
+            end_at__lte='2023-11-30'
+        ))
+
+        self.assertIn('budget_user_period_idx', plan)
+
+    def test_period_index(self):
+        plan = self.explain(Budget.objects.exclude(user=1).filter(
+            start_at='2023-11-01',
+            end_at='2023-11-30'
+        ))
+
+        self.assertIn('budget_period_idx', plan)
+
+
+class BudgetRecommendTestCase(APITestCase):
+    fixtures = ['db_dump_data.json']
+
+    def setUp(self):
+        cache.delete(CATEGORY_AVERAGE_KEY)
+
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(username='wo'))
+
+    def tearDown(self):
+        cache.delete(CATEGORY_AVERAGE_KEY)
+
+    def test_category_averages(self):
+        averages = get_category_averages()['averages']
+
+        expected = dict(
+            Budget.objects.values('category__name').annotate(
+                average=Avg('amount')
+            ).values_list('category__name', 'average')
+        )
+        for name, average in averages.items():
+            self.assertAlmostEqual(average, expected[name])
+
+    def test_category_averages_cached(self):
+        averages = get_category_averages()
+
+        Budget.objects.create(
+            user_id=1,
+            category_id=1,
+            amount=100000000,
+            start_at='2030-01-01',
+            end_at='2030-01-31'
+        )
+
+        # 주기 작업이 갱신하기 전까지는 캐시된 값을 그대로 사용
+        with self.assertNumQueries(0):
+            self.assertEqual(get_category_averages(), averages)
+
+        refresh_category_average_cache()
+
+        self.assertNotEqual(get_category_averages(), averages)
+
+    def test_recommend_without_query(self):
+        get_category_averages()
+
+        # 예산 테이블을 읽지 않고 캐시된 평균으로만 계산
+        with self.assertNumQueries(0):
+            response = self.client.post(
+                reverse('budget_recommend'),
+                {'amount': 100000}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('others', response.data['data'])
+
+
+class CategoryBudgetStatsTestCase(APITestCase):
+    fixtures = ['db_dump_data.json']
+
+    def setUp(self):
+        cache.delete(CATEGORY_AVERAGE_KEY)
+
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(username='wo'))
+
+    def tearDown(self):
+        cache.delete(CATEGORY_AVERAGE_KEY)
+
+    # 통계 테이블이 예산 내역으로 직접 계산한 값과 같은지 확인
+    def assertStatsConsistent(self):
+        expected = {
+            row['category']: (row['count'], row['sum'])
+            for row in Budget.objects.values('category').annotate(
+                count=Count('id'),
+                sum=Sum('amount')
+            )
+        }
+
+        for stat in CategoryBudgetStats.objects.all():
+            self.assertEqual(
+                (stat.count, stat.sum),
+                expected.get(stat.category_id, (0, 0))
+            )
+            self.assertEqual(
+                int(stat.sum_sq),
+                sum(
+                    amount * amount
+                    for amount in Budget.objects.filter(
+                        category=stat.category_id
+                    ).values_list('amount', flat=True)
+                )
+            )
+
+    def test_rebuild(self):
+        rebuild_category_budget_stats()
+
+        self.assertEqual(CategoryBudgetStats.objects.count(), 10)
+        self.assertStatsConsistent()
+
+    def test_missing_stats_built_once(self):
+        CategoryBudgetStats.objects.all().delete()
+        Budget.objects.filter(category__name='house').delete()
+
+        get_category_averages()
+
+        # 예산 내역이 없는 카테고리도 0인 통계 행이 만들어짐
+        self.assertEqual(
+            CategoryBudgetStats.objects.count(),
+            len(get_categories())
+        )
+        self.assertEqual(
+            CategoryBudgetStats.objects.get(category__name='house').count,
+            0
+        )
+
+        # 다음 산출에서는 통계 행만 읽고 다시 계산하지 않음
+        cache.delete(CATEGORY_AVERAGE_KEY)
+        with mock.patch('budgets.averages.rebuild_category_budget_stats') as rebuild:
+            get_category_averages()
+
+        rebuild.assert_not_called()
+
+    def test_create_update_delete(self):
+        # 통계 행이 없는 상태에서 시작해도 예산 내역으로 계산됨
+        response = self.client.post(reverse('budget_create'), {
+            'start_at': '2030-01-01',
+            'end_at': '2030-01-31',
+            'budgets': {'house': 1000000, 'food': 300000}
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertStatsConsistent()
+
+        response = self.client.post(reverse('budget_create'), {
+            'start_at': '2030-01-01',
+            'end_at': '2030-01-31',
+            'budgets': {'house': 700000},
+            'upsert': True
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertStatsConsistent()
+
+        budget = Budget.objects.get(start_at='2030-01-01', category__name='house')
+
+        response = self.client.put(
+            reverse('budget_update', args=[budget.id]),
+            {'amount': 500000, 'category': 3}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertStatsConsistent()
+
+        response = self.client.delete(reverse('budget_delete', args=[budget.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertStatsConsistent()
+
+    def test_invalidate_average_cache(self):
+        get_category_averages()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('budget_create'), {
+                'start_at': '2030-01-01',
+                'end_at': '2030-01-31',
+                'budgets': {'house': 1000000}
+            })
+
+        # 예산이 변경되면 다음 요청에서 통계로 다시 산출
+        self.assertIsNone(cache.get(CATEGORY_AVERAGE_KEY))
+
+    def test_deviation(self):
+        deviations = get_category_averages()['deviations']
+
+        for name, deviation in deviations.items():
+            amounts = list(Budget.objects.filter(
+                category__name=name
+            ).values_list('amount', flat=True))
+
+            self.assertAlmostEqual(deviation, statistics.pstdev(amounts), places=3)
+
+        response = self.client.post(reverse('budget_recommend'), {'amount': 100000})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(response.data['deviation']),
+            set(deviations)
+        )
+
+
+class BudgetStatusTestCase(APITestCase):
+    fixtures = ['db_dump_data.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='wo')
+        self.today = date(2023, 11, 14)
+
+        cache.delete(get_budget_status_key(self.user.id))
+        self.addCleanup(cache.delete, get_budget_status_key(self.user.id))
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_status_default(self):
+        response = self.client.get(reverse('budget_status'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(response.data['data']['categories']),
+            {category.name for category in get_categories()}
+        )
+
+    def test_status_matches_consulting_email(self):
+        budget_status = get_budget_status(self.user.id, self.today)
+
+        last_budget = Budget.objects.filter(user=self.user).order_by('-id').first()
+        self.assertEqual(budget_status['start_at'], last_budget.start_at.isoformat())
+        self.assertEqual(budget_status['end_at'], last_budget.end_at.isoformat())
+
+        budget_total = Budget.objects.filter(
+            user=self.user,
+            start_at__gte=last_budget.start_at,
+            end_at__lte=last_budget.end_at
+        ).aggregate(total=Sum('amount'))['total']
+        spend_total = Spend.objects.filter(
+            user=self.user,
+            spend_at__gte=last_budget.start_at,
+            spend_at__lte=last_budget.end_at
+        ).aggregate(total=Sum('amount'))['total'] or 0
+
+        self.assertEqual(budget_status['total']['budget'], budget_total)
+        self.assertEqual(budget_status['total']['spend'], spend_total)
+        self.assertEqual(budget_status['total']['remain'], budget_total - spend_total)
+
+        # 같은 금액으로 만든 이메일 본문이 08시 컨설팅 이메일과 같아야 함
+        categories = get_categories()
+        email_body = render_consulting_email_body(
+            self.user,
+            categories,
+            budget_status['total']['can_spend'],
+            {
+                category.id: budget_status['categories'][category.name]['can_spend']
+                for category in categories
+            }
+        )
+
+        self.assertEqual(
+            email_body,
+            make_consulting_email_bodies([self.user], categories, self.today)[self.user.id]
+        )
+
+    def test_status_without_budget(self):
+        Budget.objects.filter(user=self.user).delete()
+
+        self.assertIsNone(get_budget_status(self.user.id, self.today))
+
+    def test_status_cached(self):
+        budget_status = get_budget_status(self.user.id, self.today)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_budget_status(self.user.id, self.today), budget_status)
+
+    def test_invalidate_on_spend_write(self):
+        before = get_budget_status(self.user.id, self.today)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('spend_create'), {
+                'category': 'food',
+                'amount': 10000,
+                'spend_at': self.today.isoformat()
+            })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertIsNone(cache.get(get_budget_status_key(self.user.id)))
+        after = get_budget_status(self.user.id, self.today)
+        self.assertEqual(after['total']['spend'], before['total']['spend'] + 10000)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('spend_bulk_create'), [
+                {'category': 'food', 'amount': 5000, 'spend_at': self.today.isoformat()}
+            ])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertIsNone(cache.get(get_budget_status_key(self.user.id)))
+
+    def test_invalidate_on_budget_write(self):
+        get_budget_status(self.user.id, self.today)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('budget_create'), {
+                'start_at': '2030-01-01',
+                'end_at': '2030-01-31',
+                'budgets': {'house': 1000000}
+            })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertIsNone(cache.get(get_budget_status_key(self.user.id)))
+        self.assertEqual(
+            get_budget_status(self.user.id, self.today)['start_at'],
+            '2030-01-01'
+        )
+
+        budget = Budget.objects.filter(user=self.user).order_by('-id').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('budget_delete', args=[budget.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertIsNone(cache.get(get_budget_status_key(self.user.id)))
+
+
+class BudgetAsyncViewTestCase(TestCase):
+    fixtures = ['db_dump_data.json']
+
+    def setUp(self):
+        user = User.objects.get(username='wo')
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+    def test_views_are_async(self):
+        for name in ['budget_list', 'budget_recommend']:
+            self.assertTrue(iscoroutinefunction(resolve(reverse(name)).func))
+
+    async def test_list(self):
+        response = await self.async_client.get(
+            reverse('budget_list'),
+            {'page_size': 2},
+            headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['list']), 2)
+        self.assertIsNotNone(response.json()['next'])
+
+    async def test_recommend(self):
+        response = await self.async_client.post(
+            reverse('budget_recommend'),
+            {'amount': 100000},
+            content_type='application/json',
+            headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('others', response.json()['data'])
@@ -6,7 +6,8 @@ from .views import (
     BudgetDetailAPIView,
     BudgetUpdateAPIView,
     BudgetDeleteAPIView,
-    BudgetRecommendAPIView
+    BudgetRecommendAPIView,
+    BudgetStatusAPIView
 )
 
 
@@ -28,5 +29,6 @@ urlpatterns = [
         BudgetDeleteAPIView.as_view(),
         name='budget_delete'
     ),
-    path('recommend/', BudgetRecommendAPIView.as_view(), name='budget_recommend')
+    path('recommend/', BudgetRecommendAPIView.as_view(), name='budget_recommend'),
+    path('status/', BudgetStatusAPIView.as_view(), name='budget_status')
 ]
@@ -4,21 +4,27 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from django.core.exceptions import ObjectDoesNotExist
-
-from django.db.models.functions import Coalesce
-from django.db.models import Count, Sum
+from django.db import transaction
 
 from drf_yasg.utils import swagger_auto_schema
 
-from categories.models import Category
+from asgiref.sync import sync_to_async
+
+from categories.registry import get_category_map
 from .models import Budget
+from .averages import get_category_averages
+from .stats import update_category_budget_stats
+from .status import get_budget_status, invalidate_budget_status
 from .serializers import (
     BudgetSerializer,
+    BudgetItemSerializer,
     BudgetListSerializer,
     BudgetDetailSerializer
 )
 
 from swagger_parameters import *
+from pagination import KeysetPaginator
+from async_views import AsyncAPIView
 
 from datetime import datetime
 
@@ -75,43 +81,75 @@ class BudgetCreateAPIView(APIView):
         #     'end_at': 'YYYY-MM-DD',
         #     'budgets': {
         #         'house': 100000
-        #     }
+        #     },
+        #     'upsert': false
         # }
         # 즉 budgets_data는 딕셔너리 형태인 것
-        # 같은 시작일과 종료일에 여러 카테고리와 예산액을 입력해야 하므로
-        # 아래와 같이 순회하면서 저장
+        if not isinstance(budgets_data, dict) or len(budgets_data) == 0:
+            return Response(
+                {'message': '카테고리별 예산을 입력해주세요.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # 카테고리명 -> ID 딕셔너리, 프로세스에 읽어둔 카테고리 목록에서 생성
+        category_map = get_category_map()
+
+        # 저장하기 전에 예산안 전체를 검증
+        # 하나라도 잘못된 카테고리명이나 금액이 있으면 아무것도 저장하지 않음
+        budgets = []
         for category, amount in budgets_data.items():
-            # 잘못된 카테고리명이나 금액을 입력했을 경우를 대비한 예외 처리
-            try:
-                # 입력된 카테고리명으로 객체 가져옴
-                category_obj = Category.objects.get(name=category)
-                # 혹시 모르니 정수로 형변환
-                amount = int(amount)
-            except (ObjectDoesNotExist, ValueError) as e:
+            if category not in category_map:
                 return Response(
-                    {'message': f'유효한 카테고리명, 또는 금액을 입력해주세요. {e}'},
+                    {'message': f'유효한 카테고리명, 또는 금액을 입력해주세요. 존재하지 않는 카테고리입니다. {category}'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            preprocessed_data = {
-                'user': request.user.id,
-                'category': category_obj.id,
+            # 금액이 정수인지, 컬럼의 범위 안에 있는지 검증
+            serializer = BudgetItemSerializer(data={
                 'amount': amount,
                 'start_at': start_at,
                 'end_at': end_at
-            }
-
-            serializer = BudgetSerializer(data=preprocessed_data)
-
-            # 유효성 검사
-            if serializer.is_valid():
-                # 유효한 데이터이면 저장
-                serializer.save()
-            else:
+            })
+            if not serializer.is_valid():
                 return Response(
-                    serializer.errors,
-                    status=status.HTTP_400_BAD_REQUEST
+                    {
+                        'message': f'유효한 카테고리명, 또는 금액을 입력해주세요. {category}',
+                        'errors': serializer.errors
+                    }, status=status.HTTP_400_BAD_REQUEST
+                )
+
+            budgets.append(Budget(
+                user=request.user,
+                category_id=category_map[category],
+                **serializer.validated_data
+            ))
+
+        # upsert 옵션을 주면 같은 기간, 같은 카테고리의 기존 예산을 새 예산으로 교체
+        upsert = str(request.data.get('upsert', False)).lower() == 'true'
+
+        # 예산안 전체를 하나의 트랜잭션에서 저장
+        # 중간에 실패하면 일부만 저장되지 않고 전체가 롤백됨
+        with transaction.atomic():
+            replaced = []
+            if upsert:
+                replaced_budgets = Budget.objects.filter(
+                    user=request.user,
+                    category__in=[budget.category_id for budget in budgets],
+                    start_at=start_at,
+                    end_at=end_at
                 )
+                replaced = list(replaced_budgets.values_list('category', 'amount'))
+                replaced_budgets.delete()
+
+            Budget.objects.bulk_create(budgets)
+            # bulk_create는 시그널이 발생하지 않으므로 예산 현황 캐시를 직접 삭제
+            invalidate_budget_status(request.user.id)
+
+            # 카테고리별 예산 통계에 반영
+            update_category_budget_stats(
+                added=[(budget.category_id, budget.amount) for budget in budgets],
+                removed=replaced
+            )
 
         return Response(
             {'message': '데이터 저장을 완료했습니다.'},
@@ -120,28 +158,50 @@ class BudgetCreateAPIView(APIView):
 
 
 # api/v1/budgets/list/
-class BudgetListAPIView(APIView):
+class BudgetListAPIView(AsyncAPIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
         operation_id='예산 목록',
         operation_description='현재 로그인한 회원의 전체 예산 목록을 제공합니다.',
         tags=['예산', '목록'],
-        manual_parameters=[HEADER_TOKEN],
+        manual_parameters=[HEADER_TOKEN, QUERY_CURSOR, QUERY_PAGE_SIZE],
         responses={
             200: '요청이 처리되었습니다.',
             401: '인증되지 않은 사용자입니다. 로그인 후 사용해주세요.'
         }
     )
-    def get(self, request):
+    async def get(self, request):
         user = request.user
 
         # 현재 로그인한 사용자의 모든 예산 목록 가져옴
-        budget_list = Budget.objects.filter(user=user)
+        # 카테고리를 JOIN으로 함께 가져와서 직렬화 시 추가 쿼리가 발생하지 않도록 함
+        budget_list = Budget.objects.filter(user=user).select_related(
+            'category'
+        )
+
+        # (기간 시작일, id) 기준 키셋 페이지네이션
+        # 잘못된 커서나 페이지 크기가 들어있을 경우를 대비한 예외처리
+        try:
+            page, next_cursor = await KeysetPaginator('start_at').apaginate(
+                budget_list,
+                request
+            )
+        except ValueError as e:
+            return Response(
+                {'message': f'유효한 페이지 정보를 입력해주세요. {e}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         # 한번에 직렬화
-        serializer = BudgetListSerializer(budget_list, many=True)
+        serializer = BudgetListSerializer(page, many=True)
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(
+            {
+                'list': serializer.data,
+                'next': next_cursor
+            }, status=status.HTTP_200_OK
+        )
 
 
 # api/v1/budgets/detail/<int:budget_no>
@@ -166,7 +226,10 @@ class BudgetDetailAPIView(APIView):
         # URL에 포함된 예산 ID가 잘못되었거나, 타인의 예산 ID일 경우를 대비한 예외 처리
         try:
             # 로그인한 사용자의 예산이면서, 동시에 예산 ID를 만족해야 함
-            budget = Budget.objects.get(user=user, id=budget_no)
+            budget = Budget.objects.select_related('user', 'category').get(
+                user=user,
+                id=budget_no
+            )
         except ObjectDoesNotExist as e:
             return Response(
                 {'message': f'유효한 값을 입력해주세요. {e}'},
@@ -196,26 +259,38 @@ class BudgetUpdateAPIView(APIView):
     def put(self, request, budget_no):
         user = request.user
 
-        # URL에 포함된 예산 ID가 잘못되었거나, 타인의 예산 ID일 경우를 대비한 예외 처리
-        try:
-            # 로그인한 사용자의 예산이면서, 동시에 예산 ID를 만족해야 함
-            budget = Budget.objects.get(user=user, id=budget_no)
-        except ObjectDoesNotExist as e:
-            return Response(
-                {'message': f'유효한 값을 입력해주세요. {e}'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        # 예산 수정과 카테고리별 예산 통계 갱신을 하나의 트랜잭션에서 처리
+        # 수정 전 값으로 통계를 갱신하므로, 동시에 같은 예산을 수정하거나 삭제하지 못하도록 행을 잠금
+        with transaction.atomic():
+            # URL에 포함된 예산 ID가 잘못되었거나, 타인의 예산 ID일 경우를 대비한 예외 처리
+            try:
+                # 로그인한 사용자의 예산이면서, 동시에 예산 ID를 만족해야 함
+                budget = Budget.objects.select_for_update().get(user=user, id=budget_no)
+            except ObjectDoesNotExist as e:
+                return Response(
+                    {'message': f'유효한 값을 입력해주세요. {e}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-        # 수정된 데이터의 유효성 검사
-        # partial=True 옵션을 통해 모든 값이 입력되지 않아도 됨
-        serializer = BudgetSerializer(budget, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
+            # 수정된 데이터의 유효성 검사
+            # partial=True 옵션을 통해 모든 값이 입력되지 않아도 됨
+            serializer = BudgetSerializer(budget, data=request.data, partial=True)
+            if serializer.is_valid():
+                # 수정 전 카테고리와 금액
+                previous = (budget.category_id, budget.amount)
 
-            return Response(
-                {'data': serializer.data},
-                status=status.HTTP_200_OK
-            )
+                serializer.save()
+
+                # 카테고리별 예산 통계에 반영
+                update_category_budget_stats(
+                    added=[(budget.category_id, budget.amount)],
+                    removed=[previous]
+                )
+
+                return Response(
+                    {'data': serializer.data},
+                    status=status.HTTP_200_OK
+                )
 
         return Response(
             {'message': '데이터 수정에 실패했습니다. 입력값을 확인해주세요.'},
@@ -240,17 +315,25 @@ class BudgetDeleteAPIView(APIView):
     def delete(self, request, budget_no):
         user = request.user
 
-        # URL에 포함된 예산 ID가 잘못되었거나, 타인의 예산 ID일 경우를 대비한 예외 처리
-        try:
-            budget = Budget.objects.get(user=user, id=budget_no)
-        except ObjectDoesNotExist as e:
-            return Response(
-                {'message': f'유효한 값을 입력해주세요. {e}'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        # 예산 삭제와 카테고리별 예산 통계 갱신을 하나의 트랜잭션에서 처리
+        # 삭제할 값으로 통계를 갱신하므로, 동시에 같은 예산을 수정하거나 삭제하지 못하도록 행을 잠금
+        with transaction.atomic():
+            # URL에 포함된 예산 ID가 잘못되었거나, 타인의 예산 ID일 경우를 대비한 예외 처리
+            try:
+                budget = Budget.objects.select_for_update().get(user=user, id=budget_no)
+            except ObjectDoesNotExist as e:
+                return Response(
+                    {'message': f'유효한 값을 입력해주세요. {e}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            _, deleted = budget.delete()
 
-        # 데이터 삭제
-        budget.delete()
+            # 실제로 삭제된 경우에만 카테고리별 예산 통계에 반영
+            if deleted.get(Budget._meta.label):
+                update_category_budget_stats(
+                    removed=[(budget.category_id, budget.amount)]
+                )
 
         return Response(
             {'message': '데이터가 삭제되었습니다.'},
@@ -259,7 +342,7 @@ class BudgetDeleteAPIView(APIView):
 
 
 # api/v1/budgets/recommend/
-class BudgetRecommendAPIView(APIView):
+class BudgetRecommendAPIView(AsyncAPIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
@@ -273,7 +356,7 @@ class BudgetRecommendAPIView(APIView):
             401: '인증되지 않은 사용자입니다. 로그인 후 사용해주세요.'
         }
     )
-    def post(self, request):
+    async def post(self, request):
         # 예산 총액이 숫자로 변환이 불가능하거나, 0 이하인 경우 예외처리
         try:
             total_budget = int(request.data.get('amount'))
@@ -286,31 +369,11 @@ class BudgetRecommendAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # 전체 예산 내용과 카테고리를 가져옴
-        all_budgets = Budget.objects.all()
-        categories = Category.objects.all()
-
-        # 카테고리별 평균 금액 산출
-        category_average = {}
-        # 전체 카테고리를 순서대로 순회
-        for category in categories:
-            # 전체 예산에서 카테고리에 해당하는 내용만 필터링
-            filtered_budgets = all_budgets.filter(category=category)
-
-            # 카테고리에 해당하는 데이터 갯수
-            # 평균을 구하는 것이므로, 아래 코드와 합쳐 Avg 기능 사용하면 됨
-            # 리팩토링 필요!
-            category_count = filtered_budgets.aggregate(
-                count=Coalesce(Count('category'), 0)
-            ).get('count')
-
-            # 카테고리에 해당하는 예산 총합
-            category_sum = filtered_budgets.aggregate(
-                sum=Coalesce(Sum('amount'), 0)
-            ).get('sum')
-
-            # 카테고리 이름을 키로, 카테고리 예산 평균값을 값으로
-            category_average[category.name] = (category_sum / category_count)
+        # 주기 작업이 미리 산출해둔 카테고리별 예산 평균과 표준편차
+        # 카테고리 이름을 키로, 카테고리 예산 평균값을 값으로
+        # 캐시가 없다면 통계 테이블을 읽어 산출하므로 스레드에서 실행
+        category_averages = await sync_to_async(get_category_averages)()
+        category_average = category_averages['averages']
 
         # 카테고리 예산 평균값의 합
         sum_category_average = sum(category_average.values())
@@ -340,4 +403,39 @@ class BudgetRecommendAPIView(APIView):
             category_percentage.get('others'), 2
         ) * total_budget)
 
-        return Response({'data': category_percentage}, status=status.HTTP_200_OK)
+        # 카테고리별 예산 표준편차를 추천 예산액과 같은 비율로 환산
+        # 다른 사용자들의 예산이 추천 예산액 주변으로 얼마나 흩어져 있는지 나타냄
+        category_deviation = {
+            key: int(round(value / sum_category_average, 2) * total_budget)
+            for key, value in category_averages.get('deviations', {}).items()
+        }
+
+        return Response(
+            {'data': category_percentage, 'deviation': category_deviation},
+            status=status.HTTP_200_OK
+        )
+
+
+# api/v1/budgets/status/
+class BudgetStatusAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_id='예산 현황',
+        operation_description='이번달 예산안의 카테고리별 예산, 지출, 남은 금액과 남은 기간 동안의 일일 지출 가능 금액을 조회합니다. 예산 컨설팅 이메일과 같은 금액입니다.',
+        tags=['예산', '통계'],
+        manual_parameters=[HEADER_TOKEN],
+        responses={
+            200: '요청이 처리되었습니다.',
+            401: '인증되지 않은 사용자입니다. 로그인 후 사용해주세요.'
+        }
+    )
+    def get(self, request):
+        # 예산, 지출 내역이 바뀌기 전까지는 캐시에 저장된 현황을 그대로 사용
+        # 예산 내역이 없다면 data는 None
+        budget_status = get_budget_status(
+            request.user.id,
+            datetime.now().date()
+        )
+
+        return Response({'data': budget_status}, status=status.HTTP_200_OK)
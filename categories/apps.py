@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CategoriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'categories'
+
+    def ready(self):
+        # 카테고리 변경 시 카테고리 목록 버전을 교체하는 시그널 등록
+        from . import signals
@@ -0,0 +1,83 @@
+from django.core.cache import cache
+
+from .models import Category
+
+import threading
+import uuid
+
+
+# 카테고리 목록의 버전을 저장하는 캐시 키
+# 카테고리가 추가, 수정, 삭제될 때마다 새로운 값으로 교체됨
+CATEGORY_VERSION_KEY = 'category_registry:version'
+
+# 프로세스마다 한 번 읽어둔 카테고리 목록
+# (버전, 카테고리 튜플, 카테고리명 -> 카테고리 딕셔너리) 형태로,
+# 교체할 때 한 번에 대입하므로 다른 스레드가 중간 상태를 보지 않음
+_registry = (None, (), {})
+_lock = threading.Lock()
+
+
+# 캐시에 저장된 카테고리 목록의 버전을 반환하는 함수
+# 캐시가 비어있다면 새 버전을 만들어 저장
+def get_category_version():
+    version = cache.get(CATEGORY_VERSION_KEY)
+
+    if version is None:
+        # 여러 프로세스가 동시에 저장하려 할 경우 먼저 저장된 값을 사용
+        cache.add(CATEGORY_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(CATEGORY_VERSION_KEY)
+
+    return version
+
+
+# 카테고리 목록의 버전을 교체하는 함수
+# 모든 프로세스가 다음 조회 시 카테고리 목록을 다시 읽음
+def bump_category_version():
+    cache.set(CATEGORY_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+# 버전이 바뀌었을 때만 DB에서 카테고리 목록을 다시 읽어오는 함수
+def _load_registry():
+    global _registry
+
+    version = get_category_version()
+    if _registry[0] == version:
+        return _registry
+
+    with _lock:
+        if _registry[0] != version:
+            categories = tuple(Category.objects.order_by('id'))
+            _registry = (
+                version,
+                categories,
+                {category.name: category for category in categories}
+            )
+
+    return _registry
+
+
+# 전체 카테고리를 ID 순서대로 반환
+def get_categories():
+    return _load_registry()[1]
+
+
+# 카테고리명 -> 카테고리 ID 딕셔너리를 반환
+def get_category_map():
+    return {
+        name: category.id
+        for name, category in _load_registry()[2].items()
+    }
+
+
+# 카테고리명에 해당하는 카테고리를 반환
+# 존재하지 않는 카테고리명이라면 Category.objects.get과 같이 Category.DoesNotExist 발생
+def get_category(name):
+    try:
+        return _load_registry()[2][name]
+    except (KeyError, TypeError):
+        raise Category.DoesNotExist('Category matching query does not exist.')
+
+
+# 카테고리명에 해당하는 카테고리 ID를 반환
+def get_category_id(name):
+    return get_category(name).id
@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Category
+from .registry import bump_category_version
+
+
+# 카테고리 추가, 수정, 삭제 시 카테고리 목록 버전 교체
+# 커밋 전에 다른 프로세스가 이전 데이터를 새 버전으로 읽어갈 수 있으므로
+# 커밋 후에 한 번 더 교체함
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_registry(sender, **kwargs):
+    bump_category_version()
+    transaction.on_commit(bump_category_version)
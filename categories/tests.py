@@ -4,6 +4,8 @@ from rest_framework import status
 from django.urls import reverse
 
 from accounts.models import User
+from .models import Category
+from .registry import get_categories, get_category, get_category_version
 
 
 class CategoryListViewTestCase(APITestCase):
@@ -42,3 +44,59 @@ class CategoryListViewTestCase(APITestCase):
         response = self.client.get(reverse('category_list'))
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_category_list_not_modified(self):
+        self.client = APIClient()
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {self.access_token}'
+        )
+
+        response = self.client.get(reverse('category_list'))
+        etag = response.headers['ETag']
+
+        # 같은 버전이면 본문 없이 304 응답
+        response = self.client.get(
+            reverse('category_list'),
+            HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # 카테고리가 변경되면 새 목록을 응답
+        Category.objects.create(name='test')
+
+        response = self.client.get(
+            reverse('category_list'),
+            HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertIn('test', [category['name'] for category in response.data])
+
+
+class CategoryRegistryTestCase(APITestCase):
+    def test_lookup_without_query(self):
+        Category.objects.create(name='food')
+        get_categories()
+
+        # 한 번 읽어둔 뒤에는 DB를 조회하지 않음
+        with self.assertNumQueries(0):
+            self.assertEqual(get_category('food').name, 'food')
+            self.assertEqual(len(get_categories()), 1)
+
+    def test_invalidate_on_change(self):
+        category = Category.objects.create(name='food')
+        version = get_category_version()
+
+        category.name = 'house'
+        category.save()
+
+        self.assertNotEqual(get_category_version(), version)
+        self.assertEqual(get_category('house').id, category.id)
+
+        category.delete()
+
+        with self.assertRaises(Category.DoesNotExist):
+            get_category('house')
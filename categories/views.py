@@ -6,7 +6,7 @@ from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 
 from .serializers import CategorySerializer
-from .models import Category
+from .registry import get_categories, get_category_version
 
 from swagger_parameters import *
 
@@ -19,16 +19,32 @@ class CategoryListAPIView(APIView):
         operation_id='카테고리 목록',
         operation_description='전체 카테고리 목록을 반환합니다.',
         tags=['카테고리', '목록'],
-        manual_parameters=[HEADER_TOKEN],
+        manual_parameters=[HEADER_TOKEN, HEADER_IF_NONE_MATCH],
         responses={
             200: '요청이 처리되었습니다.',
+            304: '카테고리 목록이 변경되지 않았습니다.',
             401: '인증되지 않은 사용자입니다. 로그인 후 사용해주세요.'
         }
     )
     def get(self, request):
+        # 카테고리 목록의 버전을 ETag로 사용
+        etag = f'"{get_category_version()}"'
+
+        # 클라이언트가 가진 목록과 버전이 같다면 본문 없이 응답
+        if_none_match = request.headers.get('If-None-Match', '')
+        if etag in [value.strip() for value in if_none_match.split(',')]:
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED,
+                headers={'ETag': etag}
+            )
+
         # 전체 카테고리 가져옴
-        categories = Category.objects.all()
+        categories = get_categories()
         # 한번에 직렬화
         serializer = CategorySerializer(categories, many=True)
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(
+            serializer.data,
+            status=status.HTTP_200_OK,
+            headers={'ETag': etag}
+        )
@@ -13,4 +13,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+# ASGI에서는 요청마다 새 스레드에서 동기 코드를 실행하므로, 요청이 끝난 스레드의 연결은 재사용되지 않고 남게 됨
+# 따라서 요청이 끝나면 연결을 닫고, 연결 재사용은 pgbouncer(DB_PGBOUNCER)에 맡김
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+
 application = get_asgi_application()
@@ -118,6 +118,14 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        # 요청(Celery 작업)이 끝나도 연결을 닫지 않고 재사용하는 최대 시간(초)
+        # 0이면 요청마다 새로 연결하므로, 연결 수립 비용(TCP, 인증, 백엔드 프로세스 생성)이 매 요청에 더해짐
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        # 재사용하는 연결을 요청의 첫 쿼리 전에 확인하여, DB 재시작 등으로 끊어진 연결로 인한 오류를 막음
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        # pgbouncer의 transaction pooling 모드를 거쳐 연결하는 경우 True
+        # 트랜잭션마다 다른 서버 연결이 배정될 수 있으므로, 트랜잭션 밖에서 이어 읽는 서버 측 커서(iterator())를 사용하지 않음
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_PGBOUNCER', 'False') == 'True',
     }
 }
 
@@ -178,6 +186,20 @@ REST_FRAMEWORK = {
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
 }
 
+# 목록 API 페이지네이션 설정
+# 페이지 크기를 지정하지 않았을 때의 기본값과 지정 가능한 최댓값
+PAGE_SIZE = int(os.getenv('PAGE_SIZE', 100))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 1000))
+
+# 지출 기록 대량 생성 설정
+# 한 요청에서 받을 수 있는 최대 기록 수와 한 번의 INSERT 쿼리에 담을 기록 수
+SPEND_BULK_MAX_SIZE = int(os.getenv('SPEND_BULK_MAX_SIZE', 1000))
+SPEND_BULK_CHUNK_SIZE = int(os.getenv('SPEND_BULK_CHUNK_SIZE', 200))
+
+# 지출 내역 내보내기 설정
+# DB에서 한 번에 읽어올 행 수이자, 응답으로 한 번에 보낼 행 수
+SPEND_EXPORT_CHUNK_SIZE = int(os.getenv('SPEND_EXPORT_CHUNK_SIZE', 2000))
+
 # Simple JWT 설정
 REST_USE_JWT = True
 
@@ -199,6 +221,10 @@ ACCOUNT_EMAIL_VERIFICATION = 'mandatory'
 ACCOUNT_EMAIL_ON_GET = True
 ACCOUNT_EMAIL_SUBJECT_PREFIX = '[회원가입 인증] '
 ACCOUNT_CONFIRM_EMAIL_ON_GET = True
+# 인증 이메일 발송 태스크의 재시도 횟수와 첫 재시도 간격(초)
+# 재시도 간격은 매번 두 배로 늘어나며, 모두 합쳐도 액세스 토큰 유효 시간 안에 끝나도록 설정
+VERIFICATION_EMAIL_MAX_RETRIES = int(os.getenv('VERIFICATION_EMAIL_MAX_RETRIES', 5))
+VERIFICATION_EMAIL_RETRY_DELAY = int(os.getenv('VERIFICATION_EMAIL_RETRY_DELAY', 30))
 
 # Redis
 CACHES = {
@@ -219,6 +245,8 @@ CELERY_RESULT_BACKEND = 'django-db'
 CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
+# 결과 백엔드에 태스크 이름, 인자도 함께 저장
+CELERY_RESULT_EXTENDED = True
 # Celery-beat
 CELERY_TIMEZONE = 'Asia/Seoul'
 CELERY_ENABLE_UTC = False
@@ -231,8 +259,45 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'spends.tasks.send_result_to_customer',
         'schedule': crontab(minute='0', hour='20'),     # 매일 20:00 스케쥴러 작동
     },
+    'refresh_spend_baseline_cache': {
+        'task': 'spends.tasks.refresh_spend_baseline_cache',
+        'schedule': crontab(minute='*/10'),             # 10분마다 스케쥴러 작동
+    },
+    'refresh_category_average_cache': {
+        'task': 'budgets.tasks.refresh_category_average_cache',
+        'schedule': crontab(minute='*/30'),             # 30분마다 스케쥴러 작동
+    },
 }
 
+# 지출 통계의 전체 사용자 통계 캐시 유지 시간(초)
+# 갱신 주기(10분)보다 길게 설정하여 주기 작업이 한 번 늦어져도 캐시가 유지되도록 함
+SPEND_BASELINE_TIMEOUT = 60 * 30
+
+# 지출 통계 등에서 서로 의존하지 않는 쿼리를 동시에 실행할 스레드 수(query_plan.py)
+# 프로세스마다 이 수만큼의 DB 연결을 추가로 사용할 수 있음
+QUERY_PLAN_MAX_WORKERS = int(os.getenv('QUERY_PLAN_MAX_WORKERS', 4))
+
+# 지출 목록 응답 캐시 유지 시간(초)
+# 지출 내역이 바뀌면 사용자의 캐시 세대가 바뀌어 바로 무효화되므로, 사용하지 않는 캐시가 남아있는 최대 시간
+SPEND_LIST_CACHE_TIMEOUT = 60 * 10
+
+# 예산 추천의 카테고리별 예산 평균 캐시 유지 시간(초)
+# 갱신 주기(30분)보다 길게 설정하여 주기 작업이 한 번 늦어져도 캐시가 유지되도록 함
+CATEGORY_AVERAGE_TIMEOUT = 60 * 60
+
+# 사용자별 예산 현황 캐시 유지 시간(초)
+# 예산, 지출 내역이 바뀌면 바로 삭제되므로, API를 거치지 않은 변경이 반영되기까지의 최대 시간
+BUDGET_STATUS_TIMEOUT = 60 * 60
+
+# 예산 컨설팅, 지출 안내 이메일 발송 설정
+# 한 하위 태스크가 처리할 사용자 수
+CUSTOMER_REPORT_CHUNK_SIZE = int(os.getenv('CUSTOMER_REPORT_CHUNK_SIZE', 500))
+# 워커 하나가 실행할 수 있는 하위 태스크 빈도(eg. '60/m': 분당 60개)
+CUSTOMER_REPORT_RATE_LIMIT = os.getenv('CUSTOMER_REPORT_RATE_LIMIT', '60/m')
+# 발송에 실패한 사용자의 재시도 횟수와 재시도 간격(초)
+CUSTOMER_REPORT_MAX_RETRIES = int(os.getenv('CUSTOMER_REPORT_MAX_RETRIES', 3))
+CUSTOMER_REPORT_RETRY_DELAY = int(os.getenv('CUSTOMER_REPORT_RETRY_DELAY', 60))
+
 # Swagger
 SWAGGER_SETTINGS = {
     "SECURITY_DEFINITIONS": {
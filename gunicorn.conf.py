@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+
+
+# gunicorn 설정 파일
+# gunicorn -c gunicorn.conf.py 로 실행하며, 모든 값은 환경 변수로 바꿀 수 있음
+#
+# 프로세스 하나가 동시에 사용할 수 있는 DB 연결 수는
+# 요청 처리 스레드 수(sync: 1, gthread: GUNICORN_THREADS, uvicorn: 요청마다 1) + QUERY_PLAN_MAX_WORKERS
+# 이므로, 워커 수를 늘릴 때에는 DB(pgbouncer)의 최대 연결 수를 함께 확인해야 함
+
+# 워커 종류
+# sync: 워커 하나가 한 번에 요청 하나를 처리
+# gthread: 워커 하나가 스레드 수만큼의 요청을 동시에 처리(WSGI)
+# uvicorn: 비동기 API(async_views.AsyncAPIView)가 쿼리를 기다리는 동안 다른 요청을 처리(ASGI)
+WORKER_CLASSES = {
+    'sync': ('sync', 'config.wsgi:application'),
+    'gthread': ('gthread', 'config.wsgi:application'),
+    'uvicorn': ('uvicorn.workers.UvicornWorker', 'config.asgi:application'),
+}
+
+worker_class, wsgi_app = WORKER_CLASSES[
+    os.getenv('GUNICORN_WORKER_CLASS', 'uvicorn')
+]
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# 워커 수, 지정하지 않으면 CPU 코어 수 * 2 + 1
+workers = int(os.getenv(
+    'GUNICORN_WORKERS',
+    multiprocessing.cpu_count() * 2 + 1
+))
+
+# gthread 워커의 요청 처리 스레드 수
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# 요청이 끝난 뒤 다음 요청을 기다리며 연결을 유지하는 시간(초)
+# 로드 밸런서의 유휴 연결 유지 시간보다 길어야 로드 밸런서가 닫힌 연결로 요청을 보내지 않음
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# 요청 처리 제한 시간(초)과 종료 신호를 받은 워커가 처리 중인 요청을 마무리할 시간(초)
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# 워커가 이 수만큼 요청을 처리하면 새 워커로 교체하여 메모리 사용량이 계속 늘어나지 않도록 함
+# 모든 워커가 동시에 교체되지 않도록 0 ~ max_requests_jitter 사이의 값을 더함
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# 마스터 프로세스에서 앱을 한 번만 불러온 뒤 워커를 생성
+# 워커들이 불러온 모듈의 메모리를 공유(copy-on-write)하며, 워커 시작 시간이 짧아짐
+# 마스터 프로세스에서 만든 연결, 스레드는 워커에서 그대로 쓸 수 없으므로
+# 모듈을 불러올 때(import 시점) DB, 캐시에 접근하거나 스레드(query_plan의 스레드 풀 등)를 만들면 안 됨
+# 혹시 만들어진 DB 연결과 Redis 연결은 아래의 pre_fork, post_fork에서 정리
+preload_app = os.getenv('GUNICORN_PRELOAD_APP', 'True') == 'True'
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.getenv('GUNICORN_ERROR_LOG', '-')
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+# 워커를 생성하기 전에 마스터 프로세스의 DB 연결을 닫음
+# 앱을 불러오며 연결이 생겼다면 여러 워커가 같은 연결(소켓)을 나눠 쓰게 되기 때문
+def pre_fork(server, worker):
+    if preload_app:
+        from django.db import connections
+
+        connections.close_all()
+
+
+# 워커를 생성한 직후 워커 프로세스에서 django-redis의 연결 풀을 비움
+# 마스터 프로세스에서 캐시에 접근했다면 워커들이 같은 Redis 연결(소켓)을 물려받게 되므로,
+# 물려받은 연결을 닫지 않고 버리고 워커에서 새로 연결하도록 함
+def post_fork(server, worker):
+    if preload_app:
+        from django_redis.pool import ConnectionFactory
+
+        for pool in ConnectionFactory._pools.values():
+            pool.reset()
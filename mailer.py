@@ -0,0 +1,103 @@
+from django.core.mail import get_connection
+
+from smtplib import SMTPException
+
+import time
+
+
+# 하나의 메일 서버 연결을 재사용하여 여러 이메일을 발송하는 클래스
+# send_mail은 이메일마다 새로 연결하고 TLS 핸드셰이크를 하므로,
+# 대량 발송 시에는 연결을 한 번만 열고 같은 연결로 이어서 발송
+# 발송 중 연결이 끊어지면 다시 연결하여 한 번 더 시도
+#
+# with MailSender() as sender:
+#     sender.send(message)
+class MailSender:
+    # 연결 실패로 간주하는 예외
+    errors = (SMTPException, OSError)
+
+    # connection: 사용할 이메일 백엔드 연결, 없다면 settings.EMAIL_BACKEND로 생성
+    def __init__(self, connection=None):
+        self.connection = connection or get_connection()
+
+        # 발송 지표
+        self.sent = 0
+        self.failed = 0
+        self.reconnects = 0
+        self.started_at = None
+        # 마지막으로 발송에 실패한 원인
+        self.last_error = None
+
+    def __enter__(self):
+        self.open()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # 메일 서버에 연결
+    # 연결에 실패하더라도 예외를 발생시키지 않고, 다음 발송 시 다시 연결을 시도
+    def open(self):
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+
+        try:
+            self.connection.open()
+        except self.errors:
+            pass
+
+    # 메일 서버 연결 종료
+    def close(self):
+        try:
+            self.connection.close()
+        except self.errors:
+            pass
+
+    # 연결을 닫고 다시 연결
+    def reconnect(self):
+        self.reconnects += 1
+        self.close()
+        self.connection.open()
+
+    # 이메일 하나를 현재 연결로 발송
+    # 실패한 수신자를 정확히 알 수 있도록 한 번에 하나씩 발송하며,
+    # 실패하면 다시 연결하여 한 번 더 시도
+    # 발송 성공 여부를 반환
+    def send(self, message):
+        message.connection = self.connection
+
+        for attempt in range(2):
+            try:
+                if attempt > 0:
+                    self.reconnect()
+
+                self.connection.send_messages([message])
+                self.sent += 1
+
+                return True
+            except self.errors as e:
+                self.last_error = e
+
+        self.failed += 1
+
+        return False
+
+    # 여러 이메일을 같은 연결로 발송하고, 발송에 실패한 이메일 리스트를 반환
+    def send_messages(self, messages):
+        return [message for message in messages if not self.send(message)]
+
+    # 발송 건수, 실패 건수, 재연결 횟수, 소요 시간(초), 초당 발송 건수
+    @property
+    def metrics(self):
+        elapsed = 0
+        if self.started_at is not None:
+            elapsed = time.monotonic() - self.started_at
+
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'reconnects': self.reconnects,
+            'elapsed': round(elapsed, 3),
+            'throughput': round(self.sent / elapsed, 2) if elapsed else 0
+        }
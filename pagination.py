@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.db.models import Q
+
+from datetime import date
+
+import base64
+import json
+
+
+# (날짜 필드, id) 기준의 키셋(커서) 페이지네이션
+# OFFSET을 사용하지 않고 마지막으로 받은 행의 키 다음부터 가져오므로
+# 몇 번째 페이지든 인덱스 범위 검색 한 번으로 처리됨
+class KeysetPaginator:
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    # order_field: 정렬 기준이 되는 날짜 필드명(eg. 'spend_at', 'start_at')
+    # 같은 날짜의 행들은 id로 순서를 확정
+    def __init__(self, order_field):
+        self.order_field = order_field
+
+    # 쿼리 파라미터에 커서가 없으면 첫 페이지
+    def is_first_page(self, request):
+        return request.query_params.get(self.cursor_query_param) is None
+
+    # 페이지 크기는 쿼리 파라미터로 지정할 수 있고, 최댓값을 넘을 수 없음
+    # 정수가 아니거나 1 미만이면 ValueError 발생
+    def get_page_size(self, request):
+        page_size = request.query_params.get(self.page_size_query_param)
+
+        if page_size is None:
+            return settings.PAGE_SIZE
+
+        page_size = int(page_size)
+        if page_size < 1:
+            raise ValueError('페이지 크기는 1 이상이어야 합니다.')
+
+        return min(page_size, settings.MAX_PAGE_SIZE)
+
+    # 마지막 행의 (날짜, id)를 URL에 안전한 문자열로 변환
+    def encode_cursor(self, obj):
+        position = [getattr(obj, self.order_field).isoformat(), obj.id]
+
+        return base64.urlsafe_b64encode(
+            json.dumps(position).encode()
+        ).decode()
+
+    # 커서 문자열을 (날짜, id)로 복원
+    # 형식이 잘못된 커서라면 ValueError 발생
+    def decode_cursor(self, cursor):
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+            return date.fromisoformat(value), int(pk)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f'유효하지 않은 커서입니다. {e}')
+
+    # 요청한 페이지의 행을 가져올 쿼리셋(다음 페이지 확인용 한 행 포함)과 페이지 크기를 반환
+    def get_page_queryset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(self.order_field, 'id')
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor is not None:
+            value, pk = self.decode_cursor(cursor)
+
+            # (날짜, id) > (커서 날짜, 커서 id)
+            queryset = queryset.filter(
+                Q(**{f'{self.order_field}__gt': value}) |
+                Q(**{self.order_field: value, 'id__gt': pk})
+            )
+
+        # 한 행을 더 가져와서 다음 페이지 존재 여부를 판단
+        return queryset[:page_size + 1], page_size
+
+    # 가져온 행으로 페이지의 행 리스트와 다음 페이지 커서를 만듦
+    def make_page(self, rows, page_size):
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+
+            return rows, self.encode_cursor(rows[-1])
+
+        return rows, None
+
+    # 쿼리셋에서 요청한 페이지의 행 리스트와 다음 페이지 커서를 반환
+    # 다음 페이지가 없으면 커서는 None
+    def paginate(self, queryset, request):
+        queryset, page_size = self.get_page_queryset(queryset, request)
+
+        return self.make_page(list(queryset), page_size)
+
+    # paginate의 비동기 버전(async_views.AsyncAPIView에서 사용)
+    async def apaginate(self, queryset, request):
+        queryset, page_size = self.get_page_queryset(queryset, request)
+
+        return self.make_page([row async for row in queryset], page_size)
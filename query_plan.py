@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from asgiref.sync import sync_to_async
+
+from concurrent.futures import ThreadPoolExecutor
+
+import asyncio
+import threading
+
+
+# 서로 의존하지 않는 쿼리들을 동시에 실행하기 위한 스레드 풀
+# Django의 DB 연결은 스레드마다 하나이므로, 스레드 수가 곧 동시에 사용하는 DB 연결 수의 최댓값
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# 프로세스에서 공유하는 쿼리 스레드 풀을 반환하는 함수
+def get_query_executor():
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.QUERY_PLAN_MAX_WORKERS,
+                    thread_name_prefix='query-plan'
+                )
+
+    return _executor
+
+
+# 쿼리 스레드에서 함수를 실행하는 함수
+# 요청이 끝날 때 연결을 정리하는 요청 스레드와 달리 쿼리 스레드는 계속 살아있으므로,
+# 실행 후 CONN_MAX_AGE가 지났거나 사용할 수 없는 연결을 직접 닫음
+def run_query(func, *args):
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+# 함수를 그대로 실행하는 함수
+def call(func, *args):
+    return func(*args)
+
+
+# 현재 연결이 트랜잭션 안에 있는지 확인하는 함수
+# 트랜잭션 안이라면 커밋되지 않은 데이터는 다른 연결에서 보이지 않음
+def in_atomic_block():
+    return connection.in_atomic_block
+
+
+# 쿼리 계획을 실행하고 각 노드의 결과를 딕셔너리로 반환하는 함수
+# plan: 노드 이름 -> (함수, 의존하는 노드 이름 리스트)
+# 함수는 의존하는 노드들의 결과를 순서대로 인자로 받으며,
+# 의존하는 노드는 plan에서 먼저 선언되어 있어야 함(순환 의존 방지)
+#
+# 의존하는 노드가 모두 끝난 노드부터 쿼리 스레드에서 동시에 실행하므로,
+# 응답 시간은 모든 쿼리 시간의 합이 아니라 가장 긴 의존 경로의 시간이 됨
+# 요청이 트랜잭션 안에서 처리 중이라면 같은 연결(요청 스레드)에서 순서대로 실행
+#
+# plan = {
+#     'categories': (get_categories, []),
+#     'category_sum': (lambda categories: sum_by_category(spends, categories), ['categories']),
+# }
+async def run_query_plan(plan):
+    declared = set()
+    for name, (func, dependencies) in plan.items():
+        for dependency in dependencies:
+            if dependency not in declared:
+                raise ValueError(f'{name} 노드보다 먼저 선언되지 않은 노드입니다. {dependency}')
+        declared.add(name)
+
+    if await sync_to_async(in_atomic_block)():
+        # 요청 스레드의 연결은 요청이 끝날 때 정리되므로 닫지 않음
+        execute = sync_to_async(call)
+    else:
+        execute = sync_to_async(
+            run_query,
+            thread_sensitive=False,
+            executor=get_query_executor()
+        )
+
+    tasks = {}
+
+    async def run_node(func, dependencies):
+        args = [await tasks[dependency] for dependency in dependencies]
+
+        return await execute(func, *args)
+
+    for name, (func, dependencies) in plan.items():
+        tasks[name] = asyncio.ensure_future(run_node(func, dependencies))
+
+    try:
+        results = await asyncio.gather(*tasks.values())
+    except Exception:
+        # 하나라도 실패하면 아직 시작하지 않은 노드는 실행하지 않음
+        for task in tasks.values():
+            task.cancel()
+        raise
+
+    return dict(zip(tasks.keys(), results))
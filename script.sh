@@ -1,3 +1,5 @@
 python manage.py makemigrations
 python manage.py migrate
-gunicorn main.wsgi:application --bind 0.0.0.0:8000
\ No newline at end of file
+# 워커 종류, 워커 수 등은 gunicorn.conf.py에서 환경 변수로 설정
+# 기본값은 비동기 API(async_views.AsyncAPIView)가 요청을 기다리는 동안 다른 요청을 처리할 수 있는 ASGI(uvicorn 워커)
+gunicorn -c gunicorn.conf.py
\ No newline at end of file
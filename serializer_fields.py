@@ -0,0 +1,11 @@
+from django.db.backends.base.operations import BaseDatabaseOperations
+
+
+# 금액 필드(PositiveIntegerField)의 시리얼라이저 검증 범위
+# Meta.extra_kwargs에 {'amount': AMOUNT_RANGE_KWARGS} 형태로 지정
+# 금액의 범위는 DB 종류와 관계없이 PostgreSQL 컬럼(integer)의 범위로 검증
+# SQLite는 범위를 제한하지 않아 모델에서 최댓값이 정해지지 않기 때문
+AMOUNT_RANGE_KWARGS = {
+    'min_value': BaseDatabaseOperations.integer_field_ranges['PositiveIntegerField'][0],
+    'max_value': BaseDatabaseOperations.integer_field_ranges['PositiveIntegerField'][1]
+}
@@ -0,0 +1,64 @@
+from django.db.models import Sum
+
+
+# 쿼리셋의 금액 합계를 카테고리별로 산출하는 함수
+# 카테고리마다 aggregate를 호출하지 않고, GROUP BY 쿼리 한 번으로 처리
+# 지출(Spend), 예산(Budget) 쿼리셋 모두 사용 가능
+def sum_by_category(queryset, categories, field='amount'):
+    return make_category_sum(
+        get_category_sum_queryset(queryset, field),
+        categories
+    )
+
+
+# sum_by_category의 비동기 버전
+async def asum_by_category(queryset, categories, field='amount'):
+    return make_category_sum(
+        [row async for row in get_category_sum_queryset(queryset, field)],
+        categories
+    )
+
+
+# 카테고리별 금액 합계를 구하는 GROUP BY 쿼리셋
+def get_category_sum_queryset(queryset, field):
+    # order_by()로 기본 정렬을 제거해야 정렬 기준이 GROUP BY에 섞이지 않음
+    return queryset.order_by().values('category__name').annotate(
+        sum=Sum(field)
+    )
+
+
+# GROUP BY 결과를 카테고리명 -> 금액 합계 딕셔너리로 변환
+def make_category_sum(rows, categories):
+    # 데이터가 없는 카테고리도 응답에 포함되어야 하므로 0으로 초기화
+    category_sum = {category.name: 0 for category in categories}
+
+    for row in rows:
+        category_sum[row['category__name']] = row['sum'] or 0
+
+    return category_sum
+
+
+# 지출 내역 쿼리셋의 총액과 카테고리별 합계를 함께 산출하는 함수
+# 총액은 카테고리별 합계를 더한 값이므로 별도의 쿼리가 필요 없음
+def summarize_spends(spend_list, categories):
+    category_sum = sum_by_category(spend_list, categories)
+
+    return sum(category_sum.values()), category_sum
+
+
+# summarize_spends의 비동기 버전
+async def asummarize_spends(spend_list, categories):
+    category_sum = await asum_by_category(spend_list, categories)
+
+    return sum(category_sum.values()), category_sum
+
+
+# 제외할 지출 내역 ID 리스트를 쿼리셋에서 한 번에 제외하는 함수
+# 정수로 변환할 수 없는 ID가 들어있으면 ValueError 또는 TypeError 발생
+def exclude_spends(spend_list, exclude_spend_no):
+    if not exclude_spend_no:
+        return spend_list
+
+    return spend_list.exclude(
+        id__in=[int(spend_no) for spend_no in exclude_spend_no]
+    )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SpendsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'spends'
+
+    def ready(self):
+        # 지출 내역 변경 시 일별 집계 테이블을 갱신하고 예산 현황, 지출 목록 캐시를 무효화하는 시그널 등록
+        from . import signals
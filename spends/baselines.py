@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from budgets.models import Budget
+from .models import DailySpendRollup
+
+from django_redis import get_redis_connection
+
+from datetime import datetime
+
+import calendar
+import json
+
+
+# 전체 사용자 통계 캐시 키
+# 전체 사용자 통계(total 필드)와 같은 시점에 산출한 사용자별 통계(사용자 ID 필드)를 하나의 해시로 저장
+# 날짜는 전체 사용자 통계에 함께 저장하여, 날짜가 바뀐 직후에도 새 통계가 준비될 때까지 이전 통계를 사용할 수 있음
+def get_spend_baseline_key():
+    return cache.make_key('spend_baseline')
+
+
+# 전체 사용자 통계를 다시 산출하는 호출자가 하나만 있도록 하는 잠금 키
+SPEND_BASELINE_LOCK_KEY = 'spend_baseline_lock'
+
+
+# 전체 사용자의 오늘 지출액 합계, 지출 건수와
+# 이번달 예산액 합계, 예산 건수를 산출하는 함수
+# 지출 통계의 타 사용자 비교에 사용되며, 특정 사용자를 제외한 값은
+# 이 값에서 같은 시점에 산출한 해당 사용자의 값(contributions)을 빼서 구함
+# 반환값: (전체 사용자 통계, 사용자 ID -> 사용자의 통계)
+def compute_spend_baseline(today):
+    month_day = calendar.monthrange(today.year, today.month)[1]
+
+    spends = DailySpendRollup.objects.filter(date=today).order_by().values(
+        'user'
+    ).annotate(
+        sum=Sum('total'),
+        count=Sum('count')
+    )
+
+    budgets = Budget.objects.filter(
+        start_at=datetime(today.year, today.month, 1).date(),
+        end_at=datetime(today.year, today.month, month_day).date()
+    ).order_by().values('user').annotate(
+        sum=Sum('amount'),
+        count=Count('id')
+    )
+
+    # 사용자별 통계를 먼저 구하고, 전체 사용자 통계는 이를 더해서 구함
+    contributions = {}
+    for row in spends:
+        contribution = contributions.setdefault(row['user'], make_empty_contribution())
+        contribution['spend_sum'] = row['sum']
+        contribution['spend_count'] = row['count']
+    for row in budgets:
+        contribution = contributions.setdefault(row['user'], make_empty_contribution())
+        contribution['budget_sum'] = row['sum']
+        contribution['budget_count'] = row['count']
+
+    baseline = make_empty_contribution()
+    for contribution in contributions.values():
+        for field, value in contribution.items():
+            baseline[field] += value
+    baseline['updated_at'] = timezone.now().isoformat()
+
+    return baseline, contributions
+
+
+# 통계가 없는 사용자의 통계
+def make_empty_contribution():
+    return {
+        'spend_sum': 0,
+        'spend_count': 0,
+        'budget_sum': 0,
+        'budget_count': 0
+    }
+
+
+# 전체 사용자 통계를 다시 산출하여 캐시에 저장하는 함수
+# Celery 주기 작업(spends.tasks.refresh_spend_baseline_cache)에서 호출
+# 해시를 지우고 다시 쓰는 동작을 트랜잭션(MULTI)으로 묶어, 읽는 쪽에서 항상 같은 시점의 통계를 읽도록 함
+def refresh_spend_baseline(today):
+    baseline, contributions = compute_spend_baseline(today)
+    baseline['date'] = today.isoformat()
+
+    mapping = {
+        str(user_id): json.dumps(contribution)
+        for user_id, contribution in contributions.items()
+    }
+    mapping['total'] = json.dumps(baseline)
+
+    key = get_spend_baseline_key()
+    pipeline = get_redis_connection('default').pipeline()
+    pipeline.delete(key)
+    pipeline.hset(key, mapping=mapping)
+    pipeline.expire(key, settings.SPEND_BASELINE_TIMEOUT)
+    pipeline.execute()
+
+    return baseline, contributions
+
+
+# 캐시에 저장된 전체 사용자 통계와, 같은 시점에 산출한 사용자의 통계를 반환하는 함수
+# 그 시점에 지출, 예산이 없던 사용자의 통계는 0
+# 통계가 없거나 다른 날짜의 통계라면 잠금을 얻은 호출자 하나만 직접 산출하고,
+# 나머지는 이전 통계를 사용(이전 통계도 없다면 0)하여 모든 요청이 동시에 전체 사용자 통계를 산출하지 않도록 함
+# 반환값: (전체 사용자 통계, 사용자의 통계)
+def get_spend_baseline(today, user_id):
+    baseline, contribution = get_redis_connection('default').hmget(
+        get_spend_baseline_key(),
+        ['total', str(user_id)]
+    )
+
+    if baseline is None or json.loads(baseline)['date'] != today.isoformat():
+        if cache.add(SPEND_BASELINE_LOCK_KEY, True, 60):
+            try:
+                baseline, contributions = refresh_spend_baseline(today)
+            finally:
+                cache.delete(SPEND_BASELINE_LOCK_KEY)
+
+            return baseline, contributions.get(user_id, make_empty_contribution())
+
+    if baseline is None:
+        return make_empty_contribution(), make_empty_contribution()
+
+    if contribution is None:
+        return json.loads(baseline), make_empty_contribution()
+
+    return json.loads(baseline), json.loads(contribution)
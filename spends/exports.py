@@ -0,0 +1,108 @@
+from django.conf import settings
+
+from asgiref.sync import sync_to_async
+
+from .models import Spend
+
+import csv
+import json
+
+
+# 내보내는 지출 내역의 열
+SPEND_EXPORT_FIELDS = ['id', 'spend_at', 'category', 'amount', 'memo', 'created_at']
+
+
+# csv.writer가 작성한 한 줄을 파일에 쓰지 않고 그대로 반환하도록 하는 버퍼
+class Echo:
+    def write(self, value):
+        return value
+
+
+# 사용자의 지출 내역을 (지출일, id) 순서로 한 행씩 반환하는 제너레이터
+# 모델 인스턴스를 만들지 않는 values_list와 iterator를 사용하므로
+# 지출 내역이 아무리 많아도 한 번에 SPEND_EXPORT_CHUNK_SIZE 행만 메모리에 올라감
+def iter_spend_rows(user, start_at=None, end_at=None):
+    spends = Spend.objects.filter(user=user)
+
+    if start_at is not None:
+        spends = spends.filter(spend_at__gte=start_at)
+    if end_at is not None:
+        spends = spends.filter(spend_at__lte=end_at)
+
+    return spends.order_by('spend_at', 'id').values_list(
+        'id',
+        'spend_at',
+        'category__name',
+        'amount',
+        'memo',
+        'created_at'
+    ).iterator(chunk_size=settings.SPEND_EXPORT_CHUNK_SIZE)
+
+
+# 행들을 SPEND_EXPORT_CHUNK_SIZE 개씩 묶어 하나의 문자열로 반환하는 제너레이터
+# 행마다 응답을 나누어 보내지 않도록 묶어서 보냄
+def join_lines(lines):
+    buffer = []
+
+    for line in lines:
+        buffer.append(line)
+
+        if len(buffer) >= settings.SPEND_EXPORT_CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+
+    if buffer:
+        yield ''.join(buffer)
+
+
+# 지출 내역을 CSV로 변환하는 제너레이터
+# 헤더를 먼저 보내므로 첫 번째 쿼리 결과를 기다리지 않고 응답이 시작됨
+def stream_spends_csv(rows):
+    writer = csv.writer(Echo())
+
+    yield writer.writerow(SPEND_EXPORT_FIELDS)
+    yield from join_lines(
+        writer.writerow([
+            spend_id,
+            spend_at.isoformat(),
+            category,
+            amount,
+            memo,
+            created_at.isoformat()
+        ]) for spend_id, spend_at, category, amount, memo, created_at in rows
+    )
+
+
+# 지출 내역을 NDJSON(한 줄에 JSON 객체 하나)으로 변환하는 제너레이터
+def stream_spends_ndjson(rows):
+    yield from join_lines(
+        json.dumps({
+            'id': spend_id,
+            'spend_at': spend_at.isoformat(),
+            'category': category,
+            'amount': amount,
+            'memo': memo,
+            'created_at': created_at.isoformat()
+        }, ensure_ascii=False) + '\n'
+        for spend_id, spend_at, category, amount, memo, created_at in rows
+    )
+
+
+# 동기 제너레이터를 비동기 이터레이터로 감싸는 함수
+# ASGI 서버에서 StreamingHttpResponse에 동기 이터레이터를 넘기면 Django가 전체를 리스트로 읽은 뒤에 보내므로,
+# 청크마다 sync_to_async로 다음 값을 가져와 읽는 대로 보냄
+# 요청의 모든 청크를 같은 스레드(같은 DB 연결과 서버 측 커서)에서 읽음
+async def aiter_chunks(chunks):
+    chunks = iter(chunks)
+    get_next = sync_to_async(next)
+
+    try:
+        while True:
+            chunk = await get_next(chunks, None)
+            if chunk is None:
+                return
+
+            yield chunk
+    finally:
+        # 응답 도중 연결이 끊어져도 커서를 연 스레드에서 제너레이터를 닫음
+        await sync_to_async(chunks.close)()
@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from categories.registry import get_category_version
+
+import hashlib
+import json
+import time
+
+
+# 사용자별 지출 목록 캐시 세대 키
+# 지출 내역이 바뀔 때마다 1씩 증가하며, 지출 목록 캐시 키에 포함되므로
+# 세대가 바뀌면 이전 세대의 캐시는 더이상 읽히지 않고 유지 시간이 지나면 삭제됨
+def get_spend_list_generation_key(user_id):
+    return f'spend_list_generation:{user_id}'
+
+
+# 사용자의 지출 목록 캐시 세대를 반환하는 함수
+# 세대 값이 없다면(최초 조회, 캐시 삭제 등) 이전 값과 겹치지 않도록 현재 시각으로 시작
+def get_spend_list_generation(user_id):
+    key = get_spend_list_generation_key(user_id)
+    generation = cache.get(key)
+
+    if generation is None:
+        # 여러 프로세스가 동시에 저장하려 할 경우 먼저 저장된 값을 사용
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+
+    return generation
+
+
+# 사용자의 지출 목록 캐시 세대를 올리는 함수
+# 키를 검색하지 않고 세대 값 하나만 바꾸므로, 캐시된 검색 조건 수와 관계없이 한 번에 무효화됨
+def bump_spend_list_generation(user_id):
+    key = get_spend_list_generation_key(user_id)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+# 지출 내역이 바뀐 사용자의 지출 목록 캐시 세대를 올리는 함수
+# 커밋 전에 다른 요청이 이전 데이터를 새 세대로 저장할 수 있으므로
+# 커밋 후에 한 번 더 올림
+def invalidate_spend_list(user_id):
+    bump_spend_list_generation(user_id)
+    transaction.on_commit(lambda: bump_spend_list_generation(user_id))
+
+
+# 금액 쿼리 파라미터를 정수로 변환, 정수가 아니라면 그대로 반환
+# 정수가 아닌 값은 검색 API에서 에러가 되므로 캐시에 저장되지 않음
+def normalize_amount(amount):
+    try:
+        return int(amount)
+    except (TypeError, ValueError):
+        return amount
+
+
+# 지출 목록 요청의 캐시 키를 만드는 함수
+# 같은 검색 결과를 같은 키로 찾을 수 있도록 쿼리 파라미터를 정규화함
+# - 검색 시작일, 종료일은 date로 변환된 값
+# - 최솟값, 최댓값은 둘 다 입력되었을 때만 검색에 사용되므로 그 경우에만 포함
+# - 제외할 지출 내역 ID는 순서와 중복을 제거
+# - 페이지 커서와 크기에 따라 응답이 달라지므로 함께 포함
+# 카테고리명이 바뀌면 응답의 카테고리명도 바뀌므로 카테고리 목록 버전도 포함
+def get_spend_list_cache_key(request, start_at, end_at):
+    query_params = request.query_params
+
+    min_amount = normalize_amount(query_params.get('min_amount'))
+    max_amount = normalize_amount(query_params.get('max_amount'))
+    if (min_amount is None) or (max_amount is None):
+        min_amount = max_amount = None
+
+    params = {
+        'start_at': start_at.isoformat(),
+        'end_at': end_at.isoformat(),
+        'min_amount': min_amount,
+        'max_amount': max_amount,
+        'category': query_params.get('category'),
+        'exclude': sorted(set(query_params.getlist('exclude'))),
+        'cursor': query_params.get('cursor'),
+        'page_size': query_params.get('page_size'),
+        'category_version': get_category_version()
+    }
+    params_hash = hashlib.sha256(
+        json.dumps(params, sort_keys=True).encode()
+    ).hexdigest()
+
+    user_id = request.user.id
+    generation = get_spend_list_generation(user_id)
+
+    return f'spend_list:{user_id}:{generation}:{params_hash}'
+
+
+# 지출 목록 응답 데이터를 캐시에 저장하는 함수
+def set_spend_list_cache(key, response_data):
+    cache.set(key, response_data, settings.SPEND_LIST_CACHE_TIMEOUT)
+
+
+# 캐시에 저장된 지출 목록 응답 데이터를 반환하는 함수, 없다면 None
+def get_spend_list_cache(key):
+    return cache.get(key)
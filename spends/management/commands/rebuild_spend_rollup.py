@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from spends.rollups import rebuild_daily_spend_rollup
+
+
+# python manage.py rebuild_spend_rollup [--batch-size N]
+class Command(BaseCommand):
+    help = '일별 지출 집계 테이블을 지출 내역으로부터 다시 생성합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='한 번의 트랜잭션에서 처리할 사용자 수'
+        )
+
+    def handle(self, *args, **options):
+        user_count, rollup_count = rebuild_daily_spend_rollup(
+            batch_size=options['batch_size']
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'사용자 {user_count}명, 집계 행 {rollup_count}개를 생성했습니다.'
+        ))
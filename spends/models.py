@@ -22,3 +22,53 @@ class Spend(models.Model):
     memo = models.TextField(null=True, blank=True, verbose_name='메모')
     spend_at = models.DateField(verbose_name='지출일')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성일')
+
+    class Meta:
+        indexes = [
+            # 사용자별 지출일 범위 검색과 (지출일, id) 기준 페이지네이션
+            models.Index(
+                fields=['user', 'spend_at', 'id'],
+                name='spend_user_spend_at_idx'
+            ),
+            # 사용자별 카테고리 + 지출일 범위 검색
+            models.Index(
+                fields=['user', 'category', 'spend_at'],
+                name='spend_user_category_idx'
+            ),
+            # 사용자와 관계없이 특정 지출일로 검색(지출 통계의 타 사용자 비교)
+            models.Index(fields=['spend_at'], name='spend_spend_at_idx'),
+        ]
+
+
+# 사용자, 카테고리, 날짜별 지출 합계를 미리 집계해두는 테이블
+# 지출 내역이 생성, 수정, 삭제될 때마다 해당하는 행이 갱신됨(spends/signals.py)
+class DailySpendRollup(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='사용자'
+    )
+
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        verbose_name='카테고리'
+    )
+
+    date = models.DateField(verbose_name='지출일')
+    total = models.PositiveBigIntegerField(default=0, verbose_name='지출 합계')
+    count = models.PositiveIntegerField(default=0, verbose_name='지출 건수')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'category', 'date'],
+                name='daily_spend_rollup_unique'
+            ),
+        ]
+        indexes = [
+            # 사용자별 기간 합계(월별, 요일별 비교)
+            models.Index(fields=['user', 'date'], name='rollup_user_date_idx'),
+            # 사용자와 관계없이 특정 날짜로 검색(지출 통계의 타 사용자 비교)
+            models.Index(fields=['date'], name='rollup_date_idx'),
+        ]
@@ -0,0 +1,34 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+import codecs
+import json
+
+
+# 한 줄에 JSON 객체 하나씩 들어있는 NDJSON(application/x-ndjson) 요청 본문을
+# 리스트로 변환하는 파서
+# 요청 본문을 한 번에 디코딩하지 않고 줄 단위로 읽음
+class NDJSONParser(BaseParser):
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+
+        rows = []
+        for line_no, line in enumerate(
+            codecs.getreader(encoding)(stream),
+            start=1
+        ):
+            line = line.strip()
+
+            # 빈 줄은 무시
+            if not line:
+                continue
+
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                raise ParseError(f'{line_no}번째 줄이 올바른 JSON이 아닙니다. {e}')
+
+        return rows
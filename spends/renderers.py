@@ -0,0 +1,40 @@
+from rest_framework.renderers import BaseRenderer
+
+import csv
+import io
+import json
+
+
+# 지출 내역 내보내기 API의 ?format=csv 요청에 대응하는 렌더러
+# 지출 내역은 StreamingHttpResponse로 직접 보내므로,
+# 이 렌더러는 에러 메시지와 같은 일반 응답을 CSV로 변환할 때만 사용됨
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        # 딕셔너리는 키를 헤더로, 값을 한 행으로 작성
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(data.keys())
+        writer.writerow(data.values())
+
+        return buffer.getvalue().encode(self.charset)
+
+
+# 지출 내역 내보내기 API의 ?format=ndjson 요청에 대응하는 렌더러
+# CSVRenderer와 마찬가지로 일반 응답을 JSON 한 줄로 변환할 때만 사용됨
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return (json.dumps(data, ensure_ascii=False) + '\n').encode(self.charset)
@@ -0,0 +1,257 @@
+from django.db.models import F, OuterRef, Subquery, Sum
+
+from budgets.models import Budget
+from .models import DailySpendRollup
+
+import calendar
+
+import numpy as np
+import pandas as pd
+
+
+# 사용자별 가장 마지막 예산 내역
+# 꾸준히 사용하고 있다 가정했을 때, 이번달에 적용될 에산안
+def get_last_budget_queryset():
+    return Budget.objects.filter(user=OuterRef('user')).order_by('-id')
+
+
+# 사용자 청크의 이번달 예산안에서 (사용자, 카테고리)별 예산 총액을 쿼리 한 번으로 산출하는 함수
+# 행은 예산 내역이 있는 사용자, 열은 카테고리 ID인 DataFrame과
+# 사용자별 이번달 예산안 시작일, 종료일 DataFrame을 반환
+def get_budget_frame(user_ids, categories):
+    last_budget = get_last_budget_queryset()
+
+    rows = Budget.objects.filter(user__in=user_ids).annotate(
+        period_start=Subquery(last_budget.values('start_at')[:1]),
+        period_end=Subquery(last_budget.values('end_at')[:1])
+    ).filter(
+        start_at__gte=F('period_start'),
+        end_at__lte=F('period_end')
+    ).order_by().values('user', 'category', 'period_start', 'period_end').annotate(
+        total=Sum('amount')
+    )
+
+    return make_category_frame(rows, categories), make_period_frame(rows)
+
+
+# 사용자 청크의 이번달 예산안 기간 동안의 (사용자, 카테고리)별 지출 총액을 쿼리 한 번으로 산출하는 함수
+# 원본 지출 내역 대신 일별 집계 테이블을 읽음
+def get_period_spend_frame(user_ids, categories):
+    last_budget = get_last_budget_queryset()
+
+    rows = DailySpendRollup.objects.filter(user__in=user_ids).annotate(
+        period_start=Subquery(last_budget.values('start_at')[:1]),
+        period_end=Subquery(last_budget.values('end_at')[:1])
+    ).filter(
+        date__gte=F('period_start'),
+        date__lte=F('period_end')
+    ).order_by().values('user', 'category').annotate(total=Sum('total'))
+
+    return make_category_frame(rows, categories)
+
+
+# 사용자 청크의 오늘 (사용자, 카테고리)별 지출 총액을 쿼리 한 번으로 산출하는 함수
+def get_today_spend_frame(user_ids, categories, today):
+    rows = DailySpendRollup.objects.filter(
+        user__in=user_ids,
+        date=today
+    ).order_by().values('user', 'category').annotate(total=Sum('total'))
+
+    return make_category_frame(rows, categories)
+
+
+# (사용자, 카테고리, 총액) 행들을 사용자 x 카테고리 ID 형태의 DataFrame으로 변환
+# 데이터가 없는 카테고리는 0으로 채움
+def make_category_frame(rows, categories):
+    frame = pd.DataFrame.from_records(
+        list(rows),
+        columns=['user', 'category', 'total']
+    )
+
+    return frame.pivot_table(
+        index='user',
+        columns='category',
+        values='total',
+        aggfunc='sum',
+        fill_value=0
+    ).reindex(
+        columns=[category.id for category in categories],
+        fill_value=0
+    ).astype('int64')
+
+
+# 사용자별 이번달 예산안 시작일(period_start), 종료일(period_end) DataFrame
+def make_period_frame(rows):
+    periods = {
+        row['user']: (row['period_start'], row['period_end']) for row in rows
+    }
+
+    return pd.DataFrame(
+        {
+            'period_start': pd.to_datetime([period[0] for period in periods.values()]),
+            'period_end': pd.to_datetime([period[1] for period in periods.values()])
+        },
+        index=list(periods.keys()),
+        dtype='datetime64[ns]'
+    )
+
+
+# 사용자 청크의 이번달 예산안에 대한 예산, 지출, 남은 금액과 남은 기간 동안의 일일 지출 가능 금액을 산출하는 함수
+# 컨설팅 이메일과 예산 현황 API(budgets/status.py)가 같은 금액을 보여주도록 계산을 한 곳에서 함
+# 예산, 지출 총액을 쿼리 두 번으로 가져오며, 금액은 행이 사용자, 열이 카테고리 ID인 DataFrame
+# 예산 기간의 남은 일수가 0일인 사용자는 일일 지출 가능 금액(can_spend, can_spend_total)에 포함하지 않음
+def get_consulting_frames(user_ids, categories, today):
+    budget_frame, periods = get_budget_frame(user_ids, categories)
+    spend_frame = get_period_spend_frame(user_ids, categories).reindex(
+        index=budget_frame.index,
+        columns=budget_frame.columns,
+        fill_value=0
+    )
+
+    # 이번달 예산안의 남은 기간(오늘 포함)
+    last_days = (periods['period_end'] - pd.Timestamp(today)).dt.days + 1
+    valid_days = last_days[last_days != 0]
+
+    # 예산액에서 이미 지출한 금액을 빼고 남은 기간으로 나눔
+    # 그 후 10의 자리에서 반올림
+    remain_frame = budget_frame - spend_frame
+    can_spend_frame = np.round(
+        remain_frame.loc[valid_days.index].div(valid_days, axis=0), -2
+    ).astype('int64')
+    can_spend_total = np.round(
+        remain_frame.loc[valid_days.index].sum(axis=1) / valid_days, -2
+    ).astype('int64')
+
+    return {
+        'budget': budget_frame,
+        'spend': spend_frame,
+        'remain': remain_frame,
+        'periods': periods,
+        'last_days': last_days,
+        'can_spend': can_spend_frame,
+        'can_spend_total': can_spend_total
+    }
+
+
+# 사용자 청크에 대해 오늘 사용할 예산에 대한 컨설팅 이메일 본문을 생성하는 함수
+# 청크 전체의 금액을 get_consulting_frames로 한 번에 계산
+# 사용자 ID -> 이메일 본문 딕셔너리를 반환하며,
+# 예산 내역이 없거나 예산 기간의 남은 일수가 0일인 사용자는 포함하지 않음
+def make_consulting_email_bodies(users, categories, today):
+    frames = get_consulting_frames(
+        [user.id for user in users], categories, today
+    )
+    can_spend_frame = frames['can_spend']
+    can_spend_total = frames['can_spend_total']
+
+    email_bodies = {}
+    for user in users:
+        if user.id not in can_spend_frame.index:
+            continue
+
+        email_bodies[user.id] = render_consulting_email_body(
+            user,
+            categories,
+            can_spend_total[user.id],
+            can_spend_frame.loc[user.id]
+        )
+
+    return email_bodies
+
+
+# 계산된 금액으로 컨설팅 이메일 본문을 생성하는 함수
+def render_consulting_email_body(user, categories, can_spend_total, can_spend_per_category):
+    can_spend_per_last_days = int(can_spend_total)
+
+    # 이메일 본문 생성
+    email_body = ''
+    # 만약 남은 기간동안의 일일 지출액이 0원 이하일 경우 최소 지출금액 10,000원 제안
+    # 당 서비스는 건전한 소비 습관 정착이 목표이므로, 사용 가능한 금액을 제시해야 함
+    if can_spend_per_last_days <= 0:
+        email_body += f'{user.username}님의 금일 지출 가능 금액은 (최소금액) 총 10,000원\n원래라면 {can_spend_per_last_days:,}원 입니다! 전체 예산을 이미 초과하셨어요! 더 나은 소비 습관을 위해 노력합시다!\n \n \n'
+    # 만약 남은 기간동안의 일일 지출액이 최소 지출 제안 금액 미만일 경우 최소 지출금액인 10,000원 제안
+    # 0원 이하일 경우와의 차이점은 메시지 내용
+    elif can_spend_per_last_days < 10000:
+        email_body += f'{user.username}님의 금일 지출 가능 금액은 (최소금액) 총 10,000원\n원래라면 {can_spend_per_last_days:,}원 입니다! 곧 예산을 초과할 것 같아요! 절약이 필요한 시점입니다!\n \n \n'
+    # 그 이상일 경우 여유가 있고, 적절한 소비 습관을 갖추고 있다고 판단
+    else:
+        email_body += f'{user.username}님의 금일 지출 가능 금액은 총 {can_spend_per_last_days:,}원\n아직 여유가 있네요! 남은 일자도 힘내세요!\n \n \n'
+
+    # 카테고리 순회
+    for category in categories:
+        # 이번달 카테고리별 예산안에서 남은 기간동안 하루에 지출할 수 있는 금액
+        can_spend_per_last_days = int(can_spend_per_category[category.id])
+
+        # 만약 남은 기간동안의 일일 지출액이 0원 이하일 경우 최소 지출금액 5,000원 제안
+        # 당 서비스는 건전한 소비 습관 정착이 목표이므로, 사용 가능한 금액을 제시해야 함
+        if can_spend_per_last_days <= 0:
+            email_body += f'금일 {category.name} 항목에서 사용 가능한 금액은 총 5,000원\n원래라면 {can_spend_per_last_days:,}원 입니다! 해당 항목에서 사용 가능한 예산을 이미 초과하셨어요! 이렇게 되면 전체 예산이 흔들리게 됩니다! 더 나은 소비 습관을 위해 노력해주세요!\n \n'
+        # 만약 남은 기간동안의 일일 지출액이 최소 지출 제안 금액 미만일 경우 최소 지출금액인 5,000원 제안
+        # 0원 이하일 경우와의 차이점은 메시지 내용
+        elif can_spend_per_last_days < 5000:
+            email_body += f'금일 {category.name} 항목에서 사용 가능한 금액은 총 5,000원\n원래라면 {can_spend_per_last_days:,}원 입니다! 해당 카테고리에서 사용 가능한 예산을 곧 초과할 것 같아요! 절약이 필요한 시점입니다!\n \n'
+        # 그 이상일 경우 여유가 있고, 적절한 소비 습관을 갖추고 있다고 판단
+        else:
+            email_body += f'금일 {category.name} 항목에서 사용 가능한 금액은 총 {can_spend_per_last_days:,}원\n예산을 잘 관리하고 계시네요! 남은 기간도 파이팅!\n \n'
+
+        email_body += f'\n'
+
+    return email_body
+
+
+# 사용자 청크에 대해 오늘의 지출 내역에 대한 안내 이메일 본문을 생성하는 함수
+# 예산, 지출 총액을 쿼리 두 번으로 가져온 뒤 청크 전체의 금액을 한 번에 계산
+# 사용자 ID -> 이메일 본문 딕셔너리를 반환하며, 예산 내역이 없는 사용자는 포함하지 않음
+def make_result_email_bodies(users, categories, today):
+    user_ids = [user.id for user in users]
+
+    budget_frame, _ = get_budget_frame(user_ids, categories)
+    spend_frame = get_today_spend_frame(user_ids, categories, today).reindex(
+        index=budget_frame.index,
+        columns=budget_frame.columns,
+        fill_value=0
+    )
+
+    # 이번달 말일
+    month_day = calendar.monthrange(today.year, today.month)[1]
+
+    # 카테고리별 예산 총액을 일자별로 나누고
+    # 10의 자리에서 반올림 한 후 정수형으로 형변환
+    # -> 즉 오늘 지출해야 했을 적정 금액 산출
+    fit_spend_frame = np.round(budget_frame / month_day, -2).astype('int64')
+
+    # 카테고리별 지출했어야 하는 금액 대비 실지출 금액 퍼센테이지 산출
+    # 적정 지출 금액이 0원이라면 위험도는 0%로 처리
+    danger_percent_frame = (
+        np.round(spend_frame / fit_spend_frame.where(fit_spend_frame != 0), 2) * 100
+    ).fillna(0).astype('int64')
+
+    email_bodies = {}
+    for user in users:
+        if user.id not in budget_frame.index:
+            continue
+
+        email_bodies[user.id] = render_result_email_body(
+            categories,
+            budget_frame.loc[user.id],
+            spend_frame.loc[user.id],
+            fit_spend_frame.loc[user.id],
+            danger_percent_frame.loc[user.id]
+        )
+
+    return email_bodies
+
+
+# 계산된 금액으로 지출 내역 안내 이메일 본문을 생성하는 함수
+def render_result_email_body(categories, budget_sums, spend_sums, fit_spends, danger_percents):
+    # 오늘 지출 총액을 이메일 본문에 추가
+    email_body = f'오늘 지출한 총액: {int(spend_sums.sum()):,}원\n\n'
+
+    # 카테고리 순회
+    for category in categories:
+        email_body += f'{category.name} 예산 총액: {int(budget_sums[category.id])}\n'
+        email_body += f'{category.name} 금일 적정 지출 금액: {int(fit_spends[category.id]):,}\n'
+        email_body += f'{category.name} 금일 실제 지출 금액: {int(spend_sums[category.id]):,}\n'
+        email_body += f'{category.name} 위험도: {int(danger_percents[category.id])}%\n\n'
+
+    return email_body
@@ -0,0 +1,138 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import Spend, DailySpendRollup
+
+
+# (사용자, 카테고리, 날짜) 하나에 해당하는 집계 행을 원본 지출 내역으로 다시 계산하는 함수
+# 해당 날짜의 지출 내역만 읽으므로 (사용자, 카테고리, 지출일) 인덱스 범위 검색 한 번으로 처리됨
+# 지출 내역이 모두 없어졌다면 집계 행도 삭제
+def refresh_daily_spend_rollup(user_id, category_id, date):
+    result = Spend.objects.filter(
+        user=user_id,
+        category=category_id,
+        spend_at=date
+    ).aggregate(total=Sum('amount'), count=Count('id'))
+
+    if result['count'] == 0:
+        DailySpendRollup.objects.filter(
+            user=user_id,
+            category=category_id,
+            date=date
+        ).delete()
+        return
+
+    DailySpendRollup.objects.update_or_create(
+        user_id=user_id,
+        category_id=category_id,
+        date=date,
+        defaults={'total': result['total'], 'count': result['count']}
+    )
+
+
+# (사용자, 카테고리, 날짜) 하나에 해당하는 집계 행에 합계와 건수의 변화량을 더하는 함수
+# 원본 지출 내역을 다시 읽지 않고 UPDATE ... SET total = total + 변화량으로 처리하므로,
+# 같은 집계 행을 동시에 갱신해도 행 잠금으로 순서대로 반영되어 한 쪽의 변경이 사라지지 않음
+# 집계 행이 없다면 생성하고, 다른 요청이 먼저 생성하여 충돌했다면 다시 UPDATE
+# 건수가 0이 된 집계 행은 삭제
+def apply_daily_spend_rollup_delta(user_id, category_id, date, total, count):
+    rollups = DailySpendRollup.objects.filter(
+        user=user_id,
+        category=category_id,
+        date=date
+    )
+    changes = {'total': F('total') + total, 'count': F('count') + count}
+
+    with transaction.atomic():
+        if rollups.update(**changes):
+            if count < 0:
+                rollups.filter(count__lte=0).delete()
+            return
+
+        # 집계 행이 없는데 지출 내역이 줄었다면 집계가 어긋난 것이므로 원본으로 다시 계산
+        if count <= 0:
+            refresh_daily_spend_rollup(user_id, category_id, date)
+            return
+
+        try:
+            with transaction.atomic():
+                DailySpendRollup.objects.create(
+                    user_id=user_id,
+                    category_id=category_id,
+                    date=date,
+                    total=total,
+                    count=count
+                )
+        except IntegrityError:
+            rollups.update(**changes)
+
+
+# 한 사용자의 여러 날짜에 해당하는 집계 행들을 한 번에 다시 계산하는 함수
+# bulk_create처럼 시그널이 발생하지 않는 대량 저장 후에 호출해야 함
+# 지출 내역을 GROUP BY 쿼리 한 번으로 다시 집계하고, 해당 날짜의 집계 행을 교체
+def refresh_daily_spend_rollups(user_id, dates):
+    dates = set(dates)
+
+    grouped = Spend.objects.filter(
+        user=user_id,
+        spend_at__in=dates
+    ).order_by().values('category', 'spend_at').annotate(
+        total=Sum('amount'),
+        count=Count('id')
+    )
+
+    rollups = [
+        DailySpendRollup(
+            user_id=user_id,
+            category_id=row['category'],
+            date=row['spend_at'],
+            total=row['total'],
+            count=row['count']
+        )
+        for row in grouped
+    ]
+
+    with transaction.atomic():
+        DailySpendRollup.objects.filter(user=user_id, date__in=dates).delete()
+        DailySpendRollup.objects.bulk_create(rollups)
+
+
+# 집계 테이블 전체를 원본 지출 내역으로 다시 만드는 함수
+# 사용자 ID 기준으로 batch_size명씩 나누어, 배치마다 하나의 트랜잭션에서 삭제 후 재생성
+# 처리한 사용자 수와 생성한 집계 행 수를 반환
+def rebuild_daily_spend_rollup(batch_size=1000):
+    user_ids = list(
+        Spend.objects.order_by('user').values_list('user', flat=True).distinct()
+    )
+
+    rollup_count = 0
+    for i in range(0, len(user_ids), batch_size):
+        batch = user_ids[i:i + batch_size]
+
+        grouped = Spend.objects.filter(user__in=batch).order_by().values(
+            'user', 'category', 'spend_at'
+        ).annotate(total=Sum('amount'), count=Count('id'))
+
+        rollups = [
+            DailySpendRollup(
+                user_id=row['user'],
+                category_id=row['category'],
+                date=row['spend_at'],
+                total=row['total'],
+                count=row['count']
+            )
+            for row in grouped
+        ]
+
+        with transaction.atomic():
+            DailySpendRollup.objects.filter(user__in=batch).delete()
+            DailySpendRollup.objects.bulk_create(rollups, batch_size=batch_size)
+
+        rollup_count += len(rollups)
+
+    # 지출 내역이 하나도 남지 않은 사용자의 집계 행 정리
+    DailySpendRollup.objects.exclude(
+        user__in=Spend.objects.values('user')
+    ).delete()
+
+    return len(user_ids), rollup_count
@@ -1,10 +1,9 @@
 from rest_framework import serializers
 
-from budgets.models import Budget
-from categories.models import Category
-from accounts.models import User
 from .models import Spend
 
+from serializer_fields import AMOUNT_RANGE_KWARGS
+
 
 class SpendSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,9 +11,23 @@ class SpendSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+# 지출 기록 대량 생성에서 한 행을 검증하는 시리얼라이저
+# 카테고리는 카테고리명으로 입력받아 미리 읽어둔 카테고리 목록에서 찾고, 사용자는 요청한 사용자로 지정하므로
+# 행마다 사용자, 카테고리를 조회하는 쿼리가 발생하지 않음
+class SpendBulkRowSerializer(serializers.ModelSerializer):
+    category = serializers.CharField()
+
+    class Meta:
+        model = Spend
+        fields = ['category', 'amount', 'memo', 'spend_at']
+        extra_kwargs = {'amount': AMOUNT_RANGE_KWARGS}
+
+
+# 계정명과 카테고리명은 연관 객체에서 바로 가져오므로
+# 쿼리셋에 select_related('user', 'category')를 적용해야 추가 쿼리가 발생하지 않음
 class SpendListSerializer(serializers.ModelSerializer):
-    user = serializers.SerializerMethodField()
-    category = serializers.SerializerMethodField()
+    user = serializers.CharField(source='user.username', read_only=True)
+    category = serializers.CharField(source='category.name', read_only=True)
 
     class Meta:
         model = Spend
@@ -26,15 +39,3 @@ class SpendListSerializer(serializers.ModelSerializer):
             'spend_at',
             'created_at'
         ]
-
-    def get_user(self, obj):
-        spend = Spend.objects.get(id=obj.id)
-        user_id = spend.user.id
-
-        return User.objects.get(id=user_id).username
-
-    def get_category(self, obj):
-        spend = Spend.objects.get(id=obj.id)
-        category_id = spend.category.id
-
-        return Category.objects.get(id=category_id).name
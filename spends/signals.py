@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Spend
+from .rollups import refresh_daily_spend_rollup, apply_daily_spend_rollup_delta
+from .list_cache import invalidate_spend_list
+
+from budgets.status import invalidate_budget_status
+
+
+# 지출 내역이 수정될 경우, 수정 전의 (사용자, 카테고리, 지출일)에서 수정 전 금액을 빼야 하므로
+# 저장 직전에 DB에 있는 기존 값을 인스턴스에 기록해둠
+@receiver(pre_save, sender=Spend)
+def remember_previous_rollup_key(sender, instance, raw, **kwargs):
+    instance._previous_rollup_key = None
+
+    if raw or instance.pk is None:
+        return
+
+    instance._previous_rollup_key = Spend.objects.filter(
+        pk=instance.pk
+    ).values_list('user', 'category', 'spend_at', 'amount').first()
+
+
+# 지출 내역 생성, 수정 시 집계 테이블 갱신
+# 집계 행에 변화량을 더하므로(apply_daily_spend_rollup_delta) 같은 날짜의 지출 내역을 동시에 저장해도 집계가 맞음
+# 같은 트랜잭션 안에서 실행되므로 지출 내역 저장이 롤백되면 집계도 함께 롤백됨
+@receiver(post_save, sender=Spend)
+def update_rollup_on_save(sender, instance, raw, **kwargs):
+    key = (instance.user_id, instance.category_id, instance.spend_at)
+
+    # 픽스처(loaddata)는 기존 값을 알 수 없으므로 원본 지출 내역으로 다시 계산
+    if raw:
+        refresh_daily_spend_rollup(*key)
+        return
+
+    previous = getattr(instance, '_previous_rollup_key', None)
+
+    # 새로 생성한 지출 내역
+    if previous is None:
+        apply_daily_spend_rollup_delta(*key, instance.amount, 1)
+        return
+
+    *previous_key, previous_amount = previous
+
+    # 같은 집계 행 안에서 금액만 수정
+    if tuple(previous_key) == key:
+        apply_daily_spend_rollup_delta(*key, instance.amount - previous_amount, 0)
+        return
+
+    # 사용자, 카테고리, 지출일이 바뀌었다면 수정 전 집계 행에서 빼고 수정 후 집계 행에 더함
+    with transaction.atomic():
+        apply_daily_spend_rollup_delta(*previous_key, -previous_amount, -1)
+        apply_daily_spend_rollup_delta(*key, instance.amount, 1)
+
+
+# 지출 내역 삭제 시 집계 테이블 갱신
+@receiver(post_delete, sender=Spend)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    apply_daily_spend_rollup_delta(
+        instance.user_id,
+        instance.category_id,
+        instance.spend_at,
+        -instance.amount,
+        -1
+    )
+
+
+# 지출 내역 생성, 수정, 삭제 시 사용자의 예산 현황, 지출 목록 캐시 무효화
+@receiver(post_save, sender=Spend)
+@receiver(post_delete, sender=Spend)
+def invalidate_caches_on_spend(sender, instance, **kwargs):
+    invalidate_budget_status(instance.user_id)
+    invalidate_spend_list(instance.user_id)
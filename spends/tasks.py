@@ -1,240 +1,240 @@
-from celery import shared_task
+from celery import shared_task, chord, group
 
-from django.db.models.functions import Coalesce
-from django.db.models import Sum
-
-from django.core.mail import send_mail
+from django.conf import settings
+from django.core.mail import EmailMessage
 
 from accounts.models import User
-from budgets.models import Budget
 from categories.models import Category
-from .models import Spend
+from categories.registry import get_categories
+from .baselines import refresh_spend_baseline
+from .reports import make_consulting_email_bodies, make_result_email_bodies
+
+from mailer import MailSender
 
 from dotenv import load_dotenv
 
-from datetime import datetime, timedelta
+from datetime import date, datetime
 
 import os
 
 load_dotenv()
 
 
-ALL_USERS = User.objects.all()
-CATEGORIES = Category.objects.all()
+# 발송 대상인 활성 사용자 ID를 chunk_size개씩 나누어 반환하는 제너레이터
+# OFFSET 대신 마지막 ID 다음부터 읽으므로 사용자 수와 관계없이 청크마다 인덱스 범위 검색 한 번으로 처리됨
+def iter_active_user_id_chunks(chunk_size):
+    last_id = 0
+
+    while True:
+        user_ids = list(
+            User.objects.filter(
+                is_active=True,
+                id__gt=last_id
+            ).order_by('id').values_list('id', flat=True)[:chunk_size]
+        )
+
+        if not user_ids:
+            return
+
+        yield user_ids
+
+        last_id = user_ids[-1]
+
+
+# 한 번의 발송에서 모든 청크가 함께 사용하는 기준 날짜와 카테고리 목록
+# 청크마다 다시 읽지 않으므로, 발송이 자정을 넘기거나 도중에 카테고리가 바뀌어도 같은 기준으로 계산됨
+# 태스크 인자로 전달되므로 JSON으로 직렬화할 수 있는 형태로 생성
+def make_report_snapshot():
+    return {
+        'date': datetime.now().date().isoformat(),
+        'categories': [
+            [category.id, category.name] for category in get_categories()
+        ]
+    }
+
+
+# 스냅샷을 기준 날짜와 카테고리 리스트로 복원
+def load_report_snapshot(snapshot):
+    today = date.fromisoformat(snapshot['date'])
+    categories = [
+        Category(id=category_id, name=name)
+        for category_id, name in snapshot['categories']
+    ]
+
+    return today, categories
+
+
+# 사용자 청크마다 하위 태스크를 만들어 동시에 실행하고,
+# 모든 청크가 끝나면 결과를 요약하는 태스크를 실행하는 함수
+# 실행한 청크 개수를 반환
+def dispatch_customer_reports(chunk_task, report_name):
+    snapshot = make_report_snapshot()
+
+    chunk_tasks = [
+        chunk_task.s(user_ids, snapshot)
+        for user_ids in iter_active_user_id_chunks(
+            settings.CUSTOMER_REPORT_CHUNK_SIZE
+        )
+    ]
+
+    # 발송 대상이 없는 경우
+    if not chunk_tasks:
+        summarize_customer_reports.delay([], report_name)
+        return 0
+
+    chord(group(chunk_tasks))(summarize_customer_reports.s(report_name))
+
+    return len(chunk_tasks)
+
+
+# 사용자 청크의 이메일 본문을 한 번에 생성하고, 메일 서버 연결 하나로 사용자별로 발송하는 함수
+# 발송에 실패한 사용자만 모아 재시도하며, 재시도 횟수를 모두 사용했다면 실패 건수로 기록
+# 예산 내역이 없는 등 본문을 생성할 수 없는 사용자는 건너뜀
+# snapshot: make_report_snapshot으로 만든 기준 날짜와 카테고리 목록
+# totals: 이전 시도까지의 발송 건수, 건너뛴 건수, 재연결 횟수, 발송 소요 시간
+def send_customer_report_chunk(task, user_ids, snapshot, email_subject,
+                               make_email_bodies, totals=None):
+    totals = dict(
+        {'sent': 0, 'skipped': 0, 'reconnects': 0, 'elapsed': 0},
+        **(totals or {})
+    )
+
+    today, categories = load_report_snapshot(snapshot)
+
+    # 이메일 생성에 필요한 필드만 쿼리 한 번으로 읽음
+    users = list(
+        User.objects.filter(id__in=user_ids).only(
+            'id', 'username', 'email'
+        ).order_by('id')
+    )
+    email_bodies = make_email_bodies(users, categories, today)
+
+    failed_ids = []
+    with MailSender() as sender:
+        for user in users:
+            email_body = email_bodies.get(user.id)
+
+            if email_body is None:
+                totals['skipped'] += 1
+                continue
+
+            message = EmailMessage(
+                email_subject,
+                email_body,
+                os.getenv('EMAIL_HOST_USER'),
+                [user.email]
+            )
+
+            if not sender.send(message):
+                failed_ids.append(user.id)
+
+    metrics = sender.metrics
+    totals['sent'] += metrics['sent']
+    totals['reconnects'] += metrics['reconnects']
+    totals['elapsed'] += metrics['elapsed']
+
+    if failed_ids:
+        if task.request.retries < task.max_retries:
+            raise task.retry(
+                args=[failed_ids, snapshot],
+                kwargs={'totals': totals},
+                countdown=settings.CUSTOMER_REPORT_RETRY_DELAY
+            )
+
+    return dict(totals, failed=len(failed_ids))
 
 
 # Celery 태스크 등록을 위한 애노테이션
 @shared_task
 # 오늘 사용할 예산에 대한 컨설팅 제공하는 기능
+# 전체 활성 사용자를 청크로 나누어 send_messages_to_customer_chunk 태스크로 분배
 def send_messages_to_customer():
-    # 이메일 제목
-    email_subject = '[예산 관리 서비스] 오늘 예산에 대한 컨설팅입니다!'
-
-    # 전체 사용자를 순회
-    # range가 1부터 시작해야 하는 이유: 사용자 id가 0인 것은 없기 때문
-    # for i in range(1, ALL_USERS.count() + 1): # 실사용
-    for i in range(1, 2):  # 테스트용
-        # 사용자 객체
-        user = ALL_USERS.get(id=i)
-
-        # 해당 사용자의 전체 예산 내역과 지출 내역
-        user_budgets = Budget.objects.filter(user=user)
-        user_spends = Spend.objects.filter(user=user)
-
-        # 사용자의 가장 마지막 예산 내역
-        # 꾸준히 사용하고 있다 가정했을 때, 이번달에 적용될 에산안
-        last_budget = user_budgets.last()
-
-        # 사용자의 예산안에서 이번달 예산액 총액 산출
-        total_budget_sum = user_budgets.filter(
-            start_at__gte=last_budget.start_at,
-            end_at__lte=last_budget.end_at
-        ).aggregate(
-            sum=Coalesce(Sum('amount'), 0)
-        ).get('sum')
-
-        # 사용자의 지출 내역에서 이번달 지출 총액 산출
-        total_spend_sum = user_spends.filter(
-            spend_at__gte=last_budget.start_at,
-            spend_at__lte=last_budget.end_at
-        ).aggregate(
-            sum=Coalesce(Sum('amount'), 0)
-        ).get('sum')
-
-        # 이번달 예산안에서 남은 기간동안 하루에 지출할 수 있는 금액 산출
-        # 전체 예산액에서 이미 지출한 금액을 빼고 남은 기간으로 나눔
-        # 그 후 10의 자리에서 반올림
-        can_spend_per_last_days = int(round(
-            (
-                (total_budget_sum - total_spend_sum) /
-                (last_budget.end_at - datetime.now().date() + timedelta(days=1)).days
-            ), -2)
-        )
+    return dispatch_customer_reports(
+        send_messages_to_customer_chunk,
+        'send_messages_to_customer'
+    )
 
-        # 이메일 본문 생성
-        email_body = ''
-        # 만약 남은 기간동안의 일일 지출액이 0원 이하일 경우 최소 지출금액 10,000원 제안
-        # 당 서비스는 건전한 소비 습관 정착이 목표이므로, 사용 가능한 금액을 제시해야 함
-        if can_spend_per_last_days <= 0:
-            email_body += f'{user.username}님의 금일 지출 가능 금액은 (최소금액) 총 10,000원\n원래라면 {can_spend_per_last_days:,}원 입니다! 전체 예산을 이미 초과하셨어요! 더 나은 소비 습관을 위해 노력합시다!\n \n \n'
-        # 만약 남은 기간동안의 일일 지출액이 최소 지출 제안 금액 미만일 경우 최소 지출금액인 10,000원 제안
-        # 0원 이하일 경우와의 차이점은 메시지 내용
-        elif can_spend_per_last_days < 10000:
-            email_body += f'{user.username}님의 금일 지출 가능 금액은 (최소금액) 총 10,000원\n원래라면 {can_spend_per_last_days:,}원 입니다! 곧 예산을 초과할 것 같아요! 절약이 필요한 시점입니다!\n \n \n'
-        # 그 이상일 경우 여유가 있고, 적절한 소비 습관을 갖추고 있다고 판단
-        else:
-            email_body += f'{user.username}님의 금일 지출 가능 금액은 총 {can_spend_per_last_days:,}원\n아직 여유가 있네요! 남은 일자도 힘내세요!\n \n \n'
-
-        # 카테고리 순회
-        for category in CATEGORIES:
-            # 사용자의 이번달 예산안에서 카테고리에 해당하는 예산 총액 산출
-            category_budget_sum = user_budgets.filter(
-                category=category.id,
-                start_at__gte=last_budget.start_at,
-                end_at__lte=last_budget.end_at
-            ).aggregate(
-                sum=Coalesce(Sum('amount'), 0)
-            ).get('sum')
-
-            # 사용자의 이번달 지출 내역에서 카테고리에 해당하는 지출 총액 산출
-            category_spend_sum = user_spends.filter(
-                category=category.id,
-                spend_at__gte=last_budget.start_at,
-                spend_at__lte=last_budget.end_at
-            ).aggregate(
-                sum=Coalesce(Sum('amount'), 0)
-            ).get('sum')
-
-            # 이번달 카테고리별 예산안에서 남은 기간동안 하루에 지출할 수 있는 금액 산출
-            # 카테고리별 전체 예산액에서 이미 지출한 금액을 빼고 남은 기간으로 나눔
-            # 그 후 10의 자리에서 반올림
-            can_spend_per_last_days = int(round(
-                (
-                    (category_budget_sum - category_spend_sum) /
-                    (last_budget.end_at - datetime.now().date() +
-                     timedelta(days=1)).days
-                ), -2)
-            )
 
-            # 이메일 본문 생성
-            # 만약 남은 기간동안의 일일 지출액이 0원 이하일 경우 최소 지출금액 5,000원 제안
-            # 당 서비스는 건전한 소비 습관 정착이 목표이므로, 사용 가능한 금액을 제시해야 함
-            if can_spend_per_last_days <= 0:
-                email_body += f'금일 {category.name} 항목에서 사용 가능한 금액은 총 5,000원\n원래라면 {can_spend_per_last_days:,}원 입니다! 해당 항목에서 사용 가능한 예산을 이미 초과하셨어요! 이렇게 되면 전체 예산이 흔들리게 됩니다! 더 나은 소비 습관을 위해 노력해주세요!\n \n'
-            # 만약 남은 기간동안의 일일 지출액이 최소 지출 제안 금액 미만일 경우 최소 지출금액인 5,000원 제안
-            # 0원 이하일 경우와의 차이점은 메시지 내용
-            elif can_spend_per_last_days < 5000:
-                email_body += f'금일 {category.name} 항목에서 사용 가능한 금액은 총 5,000원\n원래라면 {can_spend_per_last_days:,}원 입니다! 해당 카테고리에서 사용 가능한 예산을 곧 초과할 것 같아요! 절약이 필요한 시점입니다!\n \n'
-            # 그 이상일 경우 여유가 있고, 적절한 소비 습관을 갖추고 있다고 판단
-            else:
-                email_body += f'금일 {category.name} 항목에서 사용 가능한 금액은 총 {can_spend_per_last_days:,}원\n예산을 잘 관리하고 계시네요! 남은 기간도 파이팅!\n \n'
-
-            email_body += f'\n'
-
-        # 실제로 이메일 전송
-        send_mail(
-            email_subject,
-            email_body,
-            os.getenv('EMAIL_HOST_USER'),
-            ['allen9535@naver.com']  # 테스트용
-            # [user.email for user in ALL_USERS] # 실사용
-        )
+# Celery 태스크 등록을 위한 애노테이션
+# 워커마다 실행 빈도를 제한하여 메일 서버에 한 번에 몰리지 않도록 함
+@shared_task(
+    bind=True,
+    max_retries=settings.CUSTOMER_REPORT_MAX_RETRIES,
+    rate_limit=settings.CUSTOMER_REPORT_RATE_LIMIT
+)
+# 사용자 청크에 오늘 사용할 예산에 대한 컨설팅 이메일을 발송하는 기능
+def send_messages_to_customer_chunk(self, user_ids, snapshot, totals=None):
+    return send_customer_report_chunk(
+        self,
+        user_ids,
+        snapshot,
+        '[예산 관리 서비스] 오늘 예산에 대한 컨설팅입니다!',
+        make_consulting_email_bodies,
+        totals
+    )
 
 
 # Celery 태스크 등록을 위한 애노테이션
 @shared_task
 # 오늘의 지출 내역을 관리하는 기능
+# 전체 활성 사용자를 청크로 나누어 send_result_to_customer_chunk 태스크로 분배
 def send_result_to_customer():
-    # 이메일 제목
-    email_subject = '[예산 관리 서비스] 오늘 지출 내역에 대한 안내입니다!'
-    # 오늘 날짜를 date 형식으로
-    today_date = datetime.now().date()
-
-    # 전체 사용자를 순회
-    # range가 1부터 시작해야 하는 이유: 사용자 id가 0인 것은 없기 때문
-    # for i in range(ALL_USERS.count()): # 실사용
-    for i in range(1, 2):  # 테스트용
-        # 이메일 본문 생성
-        email_body = ''
-
-        # 사용자 객체
-        user = ALL_USERS.get(id=i)
-
-        # 해당 사용자의 전체 예산 내역과 지출 내역
-        user_budgets = Budget.objects.filter(user=user)
-        user_spends = Spend.objects.filter(user=user)
-
-        # 사용자의 가장 마지막 예산 내역
-        # 꾸준히 사용하고 있다 가정했을 때, 이번달에 적용될 에산안
-        last_budget = user_budgets.last()
-
-        # 사용자의 지출 내역에서 오늘 지출 총액 산출
-        today_spend_sum = user_spends.filter(
-            spend_at=today_date
-        ).aggregate(
-            sum=Coalesce(Sum('amount'), 0)
-        ).get('sum')
-
-        # 오늘 지출 총액을 이메일 본문에 추가
-        email_body += f'오늘 지출한 총액: {today_spend_sum:,}원\n\n'
-
-        # 카테고리 순회
-        for category in CATEGORIES:
-            # 사용자의 이번달 예산안에서 카테고리에 해당하는 예산 총액 산출
-            category_budget_sum = user_budgets.filter(
-                category=category,
-                start_at__gte=last_budget.start_at,
-                end_at__lte=last_budget.end_at
-            ).aggregate(
-                sum=Coalesce(Sum('amount'), 0)
-            ).get('sum')
-
-            # 사용자의 오늘 지출 내역에서 카테고리에 해당하는 지출 총액 산출
-            category_spend_sum = user_spends.filter(
-                category=category,
-                spend_at=today_date
-            ).aggregate(
-                sum=Coalesce(Sum('amount'), 0)
-            ).get('sum')
-
-            # 카테고리별 지출 총액을 이메일 본문에 추가
-            email_body += f'{category.name} 예산 총액: {category_budget_sum}\n'
-
-            # 이번달 말일이 언제인지 산출
-            match today_date.month:
-                case 1, 3, 5, 7, 8, 10, 12:
-                    month_day = 31
-                case _:
-                    month_day = 30
-
-            # 위험도 계산 과정에서 오늘 지출 금액이 0원일 수 있음
-            # ZeroDivisionError 대신 위험도를 0%로 설정하는 예외처리
-            try:
-                # 카테고리별 예산 총액을 일자별로 나누고
-                # 10의 자리에서 반올림 한 후 정수형으로 형변환
-                # -> 즉 오늘 지출해야 했을 적정 금액 산출
-                fit_spend = int(round(category_budget_sum / month_day, -2))
-
-                # 이메일 본문에 금일 적정 지출액과 실 지출액 추가
-                email_body += f'{category.name} 금일 적정 지출 금액: {fit_spend:,}\n'
-                email_body += f'{category.name} 금일 실제 지출 금액: {category_spend_sum:,}\n'
-
-                # 카테고리별 지출했어야 하는 금액 대비 실지출 금액 퍼센테이지 산출
-                danger_percent = int(
-                    round(category_spend_sum / fit_spend, 2) * 100
-                )
-
-                # 이메일 본문에 위험도 추가
-                email_body += f'{category.name} 위험도: {danger_percent}%\n\n'
-            except ZeroDivisionError:
-                # 위험도 계산시 오늘 지출 금액이 0원일 경우 위험도는 0%로 처리
-                email_body += f'{category.name} 위험도: 0%\n\n'
-
-        # 실제로 이메일 전송
-        send_mail(
-            email_subject,
-            email_body,
-            os.getenv('EMAIL_HOST_USER'),
-            ['allen9535@naver.com']  # 테스트용
-            # [user.email for user in ALL_USERS] # 실사용
-        )
+    return dispatch_customer_reports(
+        send_result_to_customer_chunk,
+        'send_result_to_customer'
+    )
+
+
+# Celery 태스크 등록을 위한 애노테이션
+# 워커마다 실행 빈도를 제한하여 메일 서버에 한 번에 몰리지 않도록 함
+@shared_task(
+    bind=True,
+    max_retries=settings.CUSTOMER_REPORT_MAX_RETRIES,
+    rate_limit=settings.CUSTOMER_REPORT_RATE_LIMIT
+)
+# 사용자 청크에 오늘의 지출 내역에 대한 안내 이메일을 발송하는 기능
+def send_result_to_customer_chunk(self, user_ids, snapshot, totals=None):
+    return send_customer_report_chunk(
+        self,
+        user_ids,
+        snapshot,
+        '[예산 관리 서비스] 오늘 지출 내역에 대한 안내입니다!',
+        make_result_email_bodies,
+        totals
+    )
+
+
+# Celery 태스크 등록을 위한 애노테이션
+@shared_task
+# 청크별 발송 결과를 합산하는 기능
+# 반환값은 결과 백엔드(django_celery_results)에 저장되어 관리자 페이지에서 확인 가능
+def summarize_customer_reports(results, report_name):
+    summary = {
+        'report': report_name,
+        'chunks': len(results),
+        'sent': 0,
+        'skipped': 0,
+        'failed': 0,
+        'reconnects': 0,
+        'elapsed': 0
+    }
+
+    for result in results:
+        for key in ['sent', 'skipped', 'failed', 'reconnects', 'elapsed']:
+            summary[key] += result[key]
+
+    # 청크 발송 시간 합계 기준 초당 발송 건수
+    summary['elapsed'] = round(summary['elapsed'], 3)
+    summary['throughput'] = (
+        round(summary['sent'] / summary['elapsed'], 2)
+        if summary['elapsed'] else 0
+    )
+
+    return summary
+
+
+# Celery 태스크 등록을 위한 애노테이션
+@shared_task
+# 지출 통계의 타 사용자 비교에 사용할 전체 사용자 통계를 갱신하는 기능
+def refresh_spend_baseline_cache():
+    refresh_spend_baseline(datetime.now().date())
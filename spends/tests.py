@@ -1,13 +1,74 @@
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 
-from django.urls import reverse
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import call_command
+from django.db import connection, DatabaseError
+from django.db.models import Count, Sum
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from celery import current_app
+
+from django_redis import get_redis_connection
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+import csv
+import json
+import threading
+import time
+import warnings
+from smtplib import SMTPServerDisconnected
+
+from accounts.models import User
+from budgets.models import Budget
+from categories.registry import get_categories
+from .models import Spend, DailySpendRollup
+from .baselines import (
+    SPEND_BASELINE_LOCK_KEY,
+    get_spend_baseline,
+    get_spend_baseline_key,
+    refresh_spend_baseline
+)
+from .exports import SPEND_EXPORT_FIELDS
+from .list_cache import get_spend_list_generation_key
+from .rollups import apply_daily_spend_rollup_delta
+from .tasks import (
+    refresh_spend_baseline_cache,
+    make_report_snapshot,
+    send_messages_to_customer_chunk,
+    send_result_to_customer,
+    summarize_customer_reports
+)
+from .reports import make_consulting_email_bodies, make_result_email_bodies
+from .serializers import SpendListSerializer
+
+from mailer import MailSender
+from query_plan import run_query_plan
+import query_plan
+from testing import QueryPlanTestMixin
 
 
 class SpendAuthorizedTestCase(APITestCase):
     fixtures = ['db_dump_data.json']
 
     def setUp(self):
+        # 테스트마다 DB가 초기화되므로 이전 테스트의 지출 목록 캐시를 사용하지 않도록 세대를 새로 시작
+        user = User.objects.get(username='wo')
+        cache.delete(get_spend_list_generation_key(user.id))
+
         self.client = APIClient()
 
         self.login_data = {
@@ -39,6 +100,23 @@ class SpendAuthorizedTestCase(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def test_create_rollup_failure(self):
+        request_data = {
+            'category': 'house',
+            'amount': 10000,
+            'spend_at': '2030-01-01'
+        }
+
+        with mock.patch(
+            'spends.signals.apply_daily_spend_rollup_delta',
+            side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                self.client.post(reverse('spend_create'), request_data)
+
+        # 집계 갱신이 실패하면 지출 내역도 저장되지 않음
+        self.assertFalse(Spend.objects.filter(spend_at='2030-01-01').exists())
+
     def test_create_no_category(self):
         request_data = {
             'amount': 10000,
@@ -140,6 +218,146 @@ class SpendAuthorizedTestCase(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
 
+    def test_bulk_create_default(self):
+        request_data = [
+            {
+                'category': 'house',
+                'amount': 10000,
+                'memo': 'memo',
+                'spend_at': '2030-01-01'
+            },
+            {
+                'category': 'food',
+                'amount': 5000,
+                'spend_at': '2030-01-01'
+            },
+            {
+                'category': 'food',
+                'amount': 7000,
+                'spend_at': '2030-01-01'
+            }
+        ]
+
+        response = self.client.post(reverse('spend_bulk_create'), request_data)
+
+        if response.status_code != 201:
+            print(response.data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data.get('count'), 3)
+        # bulk_create 이후에도 일별 집계가 갱신되어야 함
+        self.assertEqual(
+            DailySpendRollup.objects.get(
+                user=1,
+                category__name='food',
+                date='2030-01-01'
+            ).total,
+            12000
+        )
+
+    def test_bulk_create_ndjson(self):
+        request_data = (
+            '{"category": "house", "amount": 10000, "spend_at": "2030-01-01"}\n'
+            '\n'
+            '{"category": "food", "amount": 5000, "spend_at": "2030-01-02"}\n'
+        )
+
+        response = self.client.post(
+            reverse('spend_bulk_create'),
+            request_data,
+            content_type='application/x-ndjson'
+        )
+
+        if response.status_code != 201:
+            print(response.data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data.get('count'), 2)
+
+    def test_bulk_create_invalid_rows(self):
+        request_data = [
+            {
+                'category': 'house',
+                'amount': 10000,
+                'spend_at': '2030-01-01'
+            },
+            {
+                'category': 'INVALID',
+                'amount': 10000,
+                'spend_at': '2030-01-01'
+            },
+            {
+                'category': 'house',
+                'amount': 'INVALID',
+                'spend_at': '2030-01-01'
+            },
+            {
+                'category': 'house',
+                'amount': 10000
+            }
+        ]
+
+        response = self.client.post(reverse('spend_bulk_create'), request_data)
+
+        if response.status_code != 400:
+            print(response.data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [error.get('index') for error in response.data.get('errors')],
+            [1, 2, 3]
+        )
+        # 하나라도 잘못된 기록이 있으면 아무것도 저장되지 않음
+        self.assertFalse(Spend.objects.filter(spend_at='2030-01-01').exists())
+
+    def test_bulk_create_invalid_types(self):
+        request_data = [
+            {
+                'category': ['house'],
+                'amount': 10000,
+                'spend_at': '2030-01-01'
+            },
+            {
+                'category': 'house',
+                'amount': 2147483648,
+                'spend_at': '2030-01-01'
+            },
+            {
+                'category': 'house',
+                'amount': 10000,
+                'memo': {'memo': 'INVALID'},
+                'spend_at': '2030-01-01'
+            },
+            'INVALID'
+        ]
+
+        response = self.client.post(reverse('spend_bulk_create'), request_data)
+
+        if response.status_code != 400:
+            print(response.data)
+
+        # 형식이 잘못된 기록도 서버 에러 없이 기록별 에러 메시지를 반환
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [error.get('index') for error in response.data.get('errors')],
+            [0, 1, 2, 3]
+        )
+        self.assertFalse(Spend.objects.filter(spend_at='2030-01-01').exists())
+
+    def test_bulk_create_not_list(self):
+        request_data = {
+            'category': 'house',
+            'amount': 10000,
+            'spend_at': '2030-01-01'
+        }
+
+        response = self.client.post(reverse('spend_bulk_create'), request_data)
+
+        if response.status_code != 400:
+            print(response.data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_list_default(self):
         params = {
             'start_at': '2023-02-01',
@@ -457,6 +675,263 @@ class SpendAuthorizedTestCase(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
 
+    def test_list_summary(self):
+        params = {
+            'start_at': '2023-11-01',
+            'end_at': '2023-11-30',
+        }
+
+        response = self.client.get(reverse('spend_list'), params)
+
+        if response.status_code != 200:
+            print(response.data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data.get('spend_sum'),
+            sum(spend.get('amount') for spend in response.data.get('list'))
+        )
+        self.assertEqual(
+            response.data.get('spend_sum'),
+            sum(response.data.get('category_sum').values())
+        )
+
+    def test_list_summary_exclude(self):
+        params = {
+            'start_at': '2023-11-01',
+            'end_at': '2023-11-30',
+        }
+
+        response = self.client.get(reverse('spend_list'), params)
+
+        # 46번 지출 내역: study 카테고리, 100,000원
+        params['exclude'] = [46]
+        excluded_response = self.client.get(reverse('spend_list'), params)
+
+        if excluded_response.status_code != 200:
+            print(excluded_response.data)
+
+        self.assertEqual(excluded_response.status_code, status.HTTP_200_OK)
+        # 목록에는 그대로 표시되지만 합계에서는 제외
+        self.assertEqual(
+            len(excluded_response.data.get('list')),
+            len(response.data.get('list'))
+        )
+        self.assertEqual(
+            excluded_response.data.get('spend_sum'),
+            response.data.get('spend_sum') - 100000
+        )
+        self.assertEqual(
+            excluded_response.data.get('category_sum').get('study'),
+            response.data.get('category_sum').get('study') - 100000
+        )
+
+    def test_list_pagination(self):
+        params = {
+            'start_at': '2023-11-01',
+            'end_at': '2023-11-30',
+        }
+
+        response = self.client.get(reverse('spend_list'), params)
+        spends = response.data.get('list')
+
+        # 페이지 크기를 2로 설정하고 커서를 따라가며 전체 목록 수집
+        paged_spends = []
+        params['page_size'] = 2
+        while True:
+            response = self.client.get(reverse('spend_list'), params)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data.get('list')), 2)
+
+            # 합계는 첫 페이지에만 포함
+            if 'cursor' in params:
+                self.assertNotIn('spend_sum', response.data)
+            else:
+                self.assertIn('spend_sum', response.data)
+
+            paged_spends += response.data.get('list')
+            if response.data.get('next') is None:
+                break
+            params['cursor'] = response.data.get('next')
+
+        self.assertEqual(paged_spends, spends)
+
+    def test_list_cached(self):
+        params = {
+            'start_at': '2023-11-01',
+            'end_at': '2023-11-30',
+            'min_amount': '0',
+            'max_amount': '1000000',
+            'exclude': ['2', '1']
+        }
+
+        response = self.client.get(reverse('spend_list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # 같은 검색 조건이라면 파라미터 순서나 표기가 달라도 지출 내역을 다시 조회하지 않음
+        params['min_amount'] = '00'
+        params['exclude'] = ['1', '2', '2']
+        with CaptureQueriesContext(connection) as context:
+            cached_response = self.client.get(reverse('spend_list'), params)
+
+        self.assertEqual(cached_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_response.data, response.data)
+        self.assertFalse(any(
+            'spends_spend' in query['sql'] for query in context.captured_queries
+        ))
+
+    def test_list_cache_invalidation(self):
+        params = {
+            'start_at': '2023-11-01',
+            'end_at': '2023-11-30'
+        }
+
+        spend_sum = self.client.get(reverse('spend_list'), params).data.get('spend_sum')
+
+        # 생성
+        response = self.client.post(reverse('spend_create'), {
+            'category': 'house',
+            'amount': 10000,
+            'spend_at': '2023-11-10'
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(reverse('spend_list'), params)
+        self.assertEqual(response.data.get('spend_sum'), spend_sum + 10000)
+
+        # 수정
+        spend = Spend.objects.filter(user__username='wo').order_by('-id').first()
+        response = self.client.put(
+            reverse('spend_update', args=[spend.id]),
+            {'amount': 20000}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse('spend_list'), params)
+        self.assertEqual(response.data.get('spend_sum'), spend_sum + 20000)
+
+        # 삭제
+        response = self.client.delete(reverse('spend_delete', args=[spend.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse('spend_list'), params)
+        self.assertEqual(response.data.get('spend_sum'), spend_sum)
+
+        # 대량 생성
+        response = self.client.post(reverse('spend_bulk_create'), [
+            {'category': 'food', 'amount': 5000, 'spend_at': '2023-11-10'}
+        ])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(reverse('spend_list'), params)
+        self.assertEqual(response.data.get('spend_sum'), spend_sum + 5000)
+
+    def test_export_csv(self):
+        response = self.client.get(reverse('spend_export'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+
+        rows = list(csv.reader(
+            StringIO(b''.join(response.streaming_content).decode())
+        ))
+        spends = Spend.objects.filter(user__username='wo').order_by('spend_at', 'id')
+
+        self.assertEqual(rows[0], SPEND_EXPORT_FIELDS)
+        self.assertEqual(len(rows) - 1, spends.count())
+        self.assertEqual(
+            [int(row[0]) for row in rows[1:]],
+            list(spends.values_list('id', flat=True))
+        )
+
+    def test_export_ndjson(self):
+        params = {
+            'format': 'ndjson',
+            'start_at': '2023-11-01',
+            'end_at': '2023-11-10'
+        }
+
+        response = self.client.get(reverse('spend_export'), params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+
+        rows = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).decode().splitlines()
+        ]
+        spends = Spend.objects.filter(
+            user__username='wo',
+            spend_at__gte='2023-11-01',
+            spend_at__lte='2023-11-10'
+        )
+
+        self.assertEqual(len(rows), spends.count())
+        self.assertEqual(
+            sum(row['amount'] for row in rows),
+            spends.aggregate(total=Sum('amount'))['total']
+        )
+
+    def test_export_invalid_date(self):
+        response = self.client.get(
+            reverse('spend_export'),
+            {'format': 'ndjson', 'start_at': 'INVALID'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_invalid_format(self):
+        response = self.client.get(reverse('spend_export'), {'format': 'xml'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_invalid_page_size(self):
+        params = {
+            'start_at': '2023-11-01',
+            'end_at': '2023-11-30',
+            'page_size': 'INVALID'
+        }
+
+        response = self.client.get(reverse('spend_list'), params)
+
+        if response.status_code != 400:
+            print(response.data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_analytics_default(self):
+        response = self.client.get(reverse('spend_analytics'))
+
+        if response.status_code != 200:
+            print(response.data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('spend_per_last_month', response.data.get('data'))
+        self.assertIn('spend_per_last_weekdays', response.data.get('data'))
+        self.assertIn('spend_per_others', response.data.get('data'))
+
+    # 지출 내역 수와 상관없이 정해진 수의 집계 쿼리만 발생해야 함
+    def test_analytics_query_count(self):
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(reverse('spend_analytics'))
+
+        for i in range(100):
+            Spend.objects.create(
+                user_id=1,
+                category_id=i % 10 + 1,
+                amount=1000,
+                spend_at=date.today() - timedelta(days=i)
+            )
+
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(reverse('spend_analytics'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(before), len(after))
+        self.assertLessEqual(len(after), 8)
+
 
 class SpendUnauthorizedTestCase(APITestCase):
     def setUp(self):
@@ -477,6 +952,22 @@ class SpendUnauthorizedTestCase(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_bulk_create_default(self):
+        request_data = [
+            {
+                'category': 'house',
+                'amount': 10000,
+                'spend_at': '2030-01-01'
+            }
+        ]
+
+        response = self.client.post(reverse('spend_bulk_create'), request_data)
+
+        if response.status_code != 401:
+            print(response.data)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
     def test_list_default(self):
         params = {
             'start_at': '2023-11-02',
@@ -525,3 +1016,553 @@ class SpendUnauthorizedTestCase(APITestCase):
             print(response.data)
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class SpendListSerializerQueryTestCase(TestCase):
+    fixtures = ['db_dump_data.json']
+
+    def serialize(self, spend_list):
+        return SpendListSerializer(
+            spend_list.select_related('user', 'category'),
+            many=True
+        ).data
+
+    # 직렬화할 지출 내역 수와 상관없이 쿼리는 한 번만 발생해야 함
+    def test_list_serializer_query_count(self):
+        with self.assertNumQueries(1):
+            small = self.serialize(Spend.objects.filter(user=1))
+
+        with self.assertNumQueries(1):
+            large = self.serialize(Spend.objects.all())
+
+        self.assertLess(len(small), len(large))
+        self.assertEqual({spend.get('user') for spend in small}, {'wo'})
+
+
+class SpendQueryPlanTestCase(QueryPlanTestMixin, TestCase):
+    fixtures = ['db_dump_data.json']
+
+    def test_user_spend_at_index(self):
+        plan = self.explain(Spend.objects.filter(
+            user=1,
+            spend_at__gte='2023-11-01',
+            spend_at__lte='2023-11-30'
+        ))
+
+        self.assertIn('spend_user_spend_at_idx', plan)
+
+    def test_user_category_index(self):
+        plan = self.explain(Spend.objects.filter(
+            user=1,
+            category=1,
+            spend_at__gte='2023-11-01',
+            spend_at__lte='2023-11-30'
+        ))
+
+        self.assertIn('spend_user_category_idx', plan)
+
+    def test_spend_at_index(self):
+        plan = self.explain(
+            Spend.objects.exclude(user=1).filter(spend_at='2023-11-10')
+        )
+
+        self.assertIn('spend_spend_at_idx', plan)
+
+
+class DailySpendRollupTestCase(TestCase):
+    fixtures = ['db_dump_data.json']
+
+    def get_rollup(self, user, category, date):
+        return DailySpendRollup.objects.filter(
+            user=user,
+            category=category,
+            date=date
+        ).values_list('total', 'count').first()
+
+    # 집계 테이블의 모든 행이 원본 지출 내역의 합계와 일치하는지 확인
+    def assertRollupConsistent(self):
+        expected = {
+            (row['user'], row['category'], row['spend_at']): (
+                row['total'], row['count']
+            )
+            for row in Spend.objects.values(
+                'user', 'category', 'spend_at'
+            ).annotate(total=Sum('amount'), count=Count('id'))
+        }
+        actual = {
+            (rollup.user_id, rollup.category_id, rollup.date): (
+                rollup.total, rollup.count
+            )
+            for rollup in DailySpendRollup.objects.all()
+        }
+
+        self.assertEqual(actual, expected)
+
+    def test_fixture_rollup(self):
+        self.assertRollupConsistent()
+
+    def test_create_update_delete(self):
+        spend = Spend.objects.create(
+            user_id=1,
+            category_id=1,
+            amount=10000,
+            spend_at='2030-01-01'
+        )
+        self.assertEqual(self.get_rollup(1, 1, '2030-01-01'), (10000, 1))
+
+        Spend.objects.create(
+            user_id=1,
+            category_id=1,
+            amount=5000,
+            spend_at='2030-01-01'
+        )
+        self.assertEqual(self.get_rollup(1, 1, '2030-01-01'), (15000, 2))
+
+        # 카테고리와 날짜가 바뀌면 이전 집계에서 빠지고 새 집계에 더해짐
+        spend.category_id = 2
+        spend.spend_at = '2030-01-02'
+        spend.save()
+        self.assertEqual(self.get_rollup(1, 1, '2030-01-01'), (5000, 1))
+        self.assertEqual(self.get_rollup(1, 2, '2030-01-02'), (10000, 1))
+
+        spend.delete()
+        self.assertIsNone(self.get_rollup(1, 2, '2030-01-02'))
+
+        self.assertRollupConsistent()
+
+    def test_amount_update(self):
+        spend = Spend.objects.create(
+            user_id=1,
+            category_id=1,
+            amount=10000,
+            spend_at='2030-01-01'
+        )
+
+        spend.amount = 3000
+        spend.save()
+        self.assertEqual(self.get_rollup(1, 1, '2030-01-01'), (3000, 1))
+
+        self.assertRollupConsistent()
+
+    def test_delta(self):
+        Spend.objects.create(
+            user_id=1,
+            category_id=1,
+            amount=10000,
+            spend_at='2030-01-01'
+        )
+
+        # 지출 내역을 다시 읽지 않고 집계 행에 변화량을 더함
+        # 다른 트랜잭션이 먼저 더한 값(여기서는 직접 수정한 값)이 사라지지 않음
+        DailySpendRollup.objects.filter(
+            user=1, category=1, date='2030-01-01'
+        ).update(total=50000, count=5)
+
+        apply_daily_spend_rollup_delta(1, 1, date(2030, 1, 1), 2000, 1)
+        self.assertEqual(self.get_rollup(1, 1, '2030-01-01'), (52000, 6))
+
+        apply_daily_spend_rollup_delta(1, 1, date(2030, 1, 1), -52000, -6)
+        self.assertIsNone(self.get_rollup(1, 1, '2030-01-01'))
+
+    def test_rebuild_command(self):
+        DailySpendRollup.objects.all().delete()
+        Spend.objects.filter(user=2).delete()
+
+        call_command('rebuild_spend_rollup', batch_size=7, stdout=StringIO())
+
+        self.assertRollupConsistent()
+
+
+class SpendBaselineTestCase(TestCase):
+    fixtures = ['db_dump_data.json']
+
+    def setUp(self):
+        self.today = date.today()
+        get_redis_connection('default').delete(get_spend_baseline_key())
+        cache.delete(SPEND_BASELINE_LOCK_KEY)
+
+    def tearDown(self):
+        get_redis_connection('default').delete(get_spend_baseline_key())
+        cache.delete(SPEND_BASELINE_LOCK_KEY)
+
+    def test_baseline_cached(self):
+        baseline, _ = get_spend_baseline(self.today, 2)
+
+        Spend.objects.create(
+            user_id=2,
+            category_id=1,
+            amount=10000,
+            spend_at=self.today
+        )
+
+        # 주기 작업이 갱신하기 전까지는 캐시된 값을 그대로 사용
+        with self.assertNumQueries(0):
+            self.assertEqual(get_spend_baseline(self.today, 2)[0], baseline)
+
+        refresh_spend_baseline_cache()
+
+        refreshed, _ = get_spend_baseline(self.today, 2)
+        self.assertEqual(refreshed['spend_sum'], baseline['spend_sum'] + 10000)
+        self.assertEqual(refreshed['spend_count'], baseline['spend_count'] + 1)
+
+    def test_contribution(self):
+        for user_id, amount in [(1, 3000), (2, 5000), (2, 7000)]:
+            Spend.objects.create(
+                user_id=user_id,
+                category_id=1,
+                amount=amount,
+                spend_at=self.today
+            )
+
+        baseline, contribution = get_spend_baseline(self.today, 2)
+        others_spend_sum = DailySpendRollup.objects.filter(
+            date=self.today
+        ).exclude(user=2).aggregate(sum=Sum('total'))['sum']
+
+        self.assertEqual(contribution['spend_sum'], 12000)
+        self.assertEqual(contribution['spend_count'], 2)
+        self.assertEqual(baseline['spend_sum'] - contribution['spend_sum'], others_spend_sum)
+
+        # 통계를 산출한 뒤에 추가한 지출은 전체 사용자 통계와 사용자 통계 모두에 반영되지 않으므로
+        # 나를 뺀 나머지 사용자들의 값은 그대로
+        Spend.objects.create(
+            user_id=2,
+            category_id=1,
+            amount=100000,
+            spend_at=self.today
+        )
+
+        baseline, contribution = get_spend_baseline(self.today, 2)
+        self.assertEqual(baseline['spend_sum'] - contribution['spend_sum'], others_spend_sum)
+
+        # 통계를 산출할 때 지출, 예산이 없던 사용자는 0
+        self.assertEqual(
+            get_spend_baseline(self.today, 0)[1],
+            {'spend_sum': 0, 'spend_count': 0, 'budget_sum': 0, 'budget_count': 0}
+        )
+
+    def test_stale_baseline(self):
+        yesterday = self.today - timedelta(days=1)
+        refresh_spend_baseline(yesterday)
+
+        # 다른 호출자가 통계를 산출하는 중이라면 이전 날짜의 통계를 그대로 사용
+        cache.add(SPEND_BASELINE_LOCK_KEY, True, 60)
+        with self.assertNumQueries(0):
+            baseline, _ = get_spend_baseline(self.today, 2)
+        self.assertEqual(baseline['date'], yesterday.isoformat())
+
+        # 잠금을 얻으면 오늘 날짜의 통계를 산출
+        cache.delete(SPEND_BASELINE_LOCK_KEY)
+        baseline, _ = get_spend_baseline(self.today, 2)
+        self.assertEqual(baseline['date'], self.today.isoformat())
+        self.assertIsNone(cache.get(SPEND_BASELINE_LOCK_KEY))
+
+    def test_missing_baseline_locked(self):
+        # 이전 통계가 없고 다른 호출자가 통계를 산출하는 중이라면 0
+        cache.add(SPEND_BASELINE_LOCK_KEY, True, 60)
+        with self.assertNumQueries(0):
+            baseline, contribution = get_spend_baseline(self.today, 2)
+
+        self.assertEqual(baseline['spend_count'], 0)
+        self.assertEqual(contribution['spend_count'], 0)
+
+
+# 지정한 수신자에게 보내는 이메일을 정해진 횟수만큼 실패시키는 테스트용 이메일 백엔드
+class FlakyEmailBackend(LocmemEmailBackend):
+    failures = {}
+    open_count = 0
+
+    def open(self):
+        FlakyEmailBackend.open_count += 1
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.failures.get(message.to[0], 0) > 0:
+                self.failures[message.to[0]] -= 1
+                raise SMTPServerDisconnected('connection lost')
+
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='spends.tests.FlakyEmailBackend')
+class CustomerReportTaskTestCase(TestCase):
+    fixtures = ['db_dump_data.json']
+
+    def setUp(self):
+        FlakyEmailBackend.failures = {}
+        FlakyEmailBackend.open_count = 0
+
+    def test_chunk_default(self):
+        result = send_messages_to_customer_chunk.apply(
+            args=[[1, 2, 3], make_report_snapshot()]
+        ).get()
+
+        self.assertEqual(result['sent'], 3)
+        self.assertEqual(result['skipped'], 0)
+        self.assertEqual(result['failed'], 0)
+        # 테스트용 주소가 아닌 각 사용자의 이메일로 발송
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            sorted(User.objects.filter(
+                id__in=[1, 2, 3]
+            ).values_list('email', flat=True))
+        )
+        # 청크 전체를 연결 하나로 발송
+        self.assertEqual(FlakyEmailBackend.open_count, 1)
+
+    def test_chunk_retry_failed_users(self):
+        # 사용자 2에게 보내는 이메일은 재연결 후에도 실패하여 태스크 재시도가 필요
+        FlakyEmailBackend.failures = {User.objects.get(id=2).email: 2}
+
+        result = send_messages_to_customer_chunk.apply(
+            args=[[1, 2, 3], make_report_snapshot()]
+        ).get()
+
+        # 실패한 사용자에게만 다시 발송
+        self.assertEqual(result['sent'], 3)
+        self.assertEqual(result['failed'], 0)
+        self.assertEqual(result['reconnects'], 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_chunk_query_count(self):
+        user_ids = list(User.objects.values_list('id', flat=True))
+        snapshot = make_report_snapshot()
+
+        # 청크 크기와 관계없이 사용자, 예산, 지출 쿼리 세 번
+        with self.assertNumQueries(3):
+            result = send_messages_to_customer_chunk.apply(
+                args=[user_ids, snapshot]
+            ).get()
+
+        self.assertEqual(result['sent'] + result['skipped'], len(user_ids))
+
+    def test_mail_sender_reconnect(self):
+        FlakyEmailBackend.failures = {'a@example.com': 1, 'b@example.com': 2}
+
+        messages = [
+            EmailMessage('subject', 'body', 'from@example.com', [to])
+            for to in ['a@example.com', 'b@example.com', 'c@example.com']
+        ]
+
+        with MailSender() as sender:
+            failed = sender.send_messages(messages)
+
+        self.assertEqual([message.to for message in failed], [['b@example.com']])
+        self.assertEqual(sender.metrics['sent'], 2)
+        self.assertEqual(sender.metrics['failed'], 1)
+        self.assertEqual(sender.metrics['reconnects'], 2)
+        self.assertEqual(len(mail.outbox), 2)
+
+    @override_settings(CUSTOMER_REPORT_CHUNK_SIZE=30)
+    def test_dispatch(self):
+        # 워커 없이 하위 태스크와 요약 태스크를 바로 실행
+        self.addCleanup(
+            current_app.conf.update,
+            task_always_eager=current_app.conf.task_always_eager
+        )
+        current_app.conf.update(task_always_eager=True)
+
+        chunk_count = send_result_to_customer()
+
+        self.assertEqual(chunk_count, 4)
+        self.assertEqual(
+            len(mail.outbox),
+            User.objects.filter(is_active=True).count()
+        )
+
+    def test_report_query_count(self):
+        users = list(User.objects.order_by('id'))
+        categories = get_categories()
+
+        # 사용자 수와 관계없이 예산, 지출 총액 쿼리 두 번
+        with self.assertNumQueries(2):
+            consulting_bodies = make_consulting_email_bodies(
+                users,
+                categories,
+                date(2023, 11, 14)
+            )
+
+        with self.assertNumQueries(2):
+            result_bodies = make_result_email_bodies(
+                users,
+                categories,
+                date(2023, 11, 14)
+            )
+
+        self.assertEqual(len(consulting_bodies), len(users))
+        self.assertEqual(len(result_bodies), len(users))
+        self.assertIn(f'{users[0].username}님의', consulting_bodies[users[0].id])
+
+    def test_report_without_budget(self):
+        Budget.objects.all().delete()
+        users = list(User.objects.order_by('id'))
+
+        self.assertEqual(
+            make_consulting_email_bodies(users, get_categories(), date.today()),
+            {}
+        )
+        self.assertEqual(
+            make_result_email_bodies(users, get_categories(), date.today()),
+            {}
+        )
+
+    def test_summary(self):
+        summary = summarize_customer_reports(
+            [
+                {'sent': 10, 'skipped': 1, 'failed': 0, 'reconnects': 0, 'elapsed': 1.5},
+                {'sent': 7, 'skipped': 0, 'failed': 2, 'reconnects': 1, 'elapsed': 0.5}
+            ],
+            'send_result_to_customer'
+        )
+
+        self.assertEqual(summary, {
+            'report': 'send_result_to_customer',
+            'chunks': 2,
+            'sent': 17,
+            'skipped': 1,
+            'failed': 2,
+            'reconnects': 1,
+            'elapsed': 2.0,
+            'throughput': 8.5
+        })
+
+
+class SpendAsyncViewTestCase(TestCase):
+    fixtures = ['db_dump_data.json']
+
+    def setUp(self):
+        user = User.objects.get(username='wo')
+        cache.delete(get_spend_list_generation_key(user.id))
+
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+    def test_views_are_async(self):
+        for name in ['spend_list', 'spend_analytics']:
+            self.assertTrue(iscoroutinefunction(resolve(reverse(name)).func))
+
+    async def test_list(self):
+        response = await self.async_client.get(
+            reverse('spend_list'),
+            {'start_at': '2023-11-01', 'end_at': '2023-11-30', 'page_size': 2},
+            headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['list']), 2)
+        self.assertIsNotNone(response.json()['next'])
+        self.assertIn('spend_sum', response.json())
+
+    async def test_analytics(self):
+        response = await self.async_client.get(
+            reverse('spend_analytics'),
+            headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('spend_per_last_month', response.json()['data'])
+
+    async def test_export(self):
+        response = await self.async_client.get(
+            reverse('spend_export'),
+            {'format': 'ndjson'},
+            headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # 동기 이터레이터라면 Django가 전체를 리스트로 읽은 뒤에 보내면서 경고를 남김
+        self.assertTrue(response.is_async)
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            content = b''.join([chunk async for chunk in response])
+
+        self.assertFalse([
+            warning for warning in caught
+            if 'must consume synchronous iterators' in str(warning.message)
+        ])
+        self.assertEqual(
+            len(content.decode().splitlines()),
+            await Spend.objects.filter(user__username='wo').acount()
+        )
+
+    async def test_unauthorized(self):
+        response = await self.async_client.get(reverse('spend_analytics'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class QueryPlanTestCase(SimpleTestCase):
+    def test_dependencies(self):
+        results = async_to_sync(run_query_plan)({
+            'a': (lambda: 1, []),
+            'b': (lambda: 2, []),
+            'c': (lambda a, b: a + b, ['a', 'b'])
+        })
+
+        self.assertEqual(results, {'a': 1, 'b': 2, 'c': 3})
+
+    def test_concurrent(self):
+        # 서로 의존하지 않는 노드는 동시에 실행되므로 전체 시간은 가장 긴 경로의 시간
+        def wait():
+            time.sleep(0.3)
+            return threading.current_thread().name
+
+        started_at = time.monotonic()
+        results = async_to_sync(run_query_plan)({
+            'a': (wait, []),
+            'b': (wait, []),
+            'c': (wait, [])
+        })
+        elapsed = time.monotonic() - started_at
+
+        self.assertLess(elapsed, 0.6)
+        self.assertTrue(all(
+            name.startswith('query-plan') for name in results.values()
+        ))
+
+    def test_undeclared_dependency(self):
+        with self.assertRaises(ValueError):
+            async_to_sync(run_query_plan)({
+                'a': (lambda b: b, ['b']),
+                'b': (lambda: 1, [])
+            })
+
+    def test_error(self):
+        def fail():
+            raise ZeroDivisionError
+
+        with self.assertRaises(ZeroDivisionError):
+            async_to_sync(run_query_plan)({
+                'a': (fail, []),
+                'b': (lambda a: a, ['a'])
+            })
+
+
+class SpendAnalyticsConcurrentTestCase(TransactionTestCase):
+    fixtures = ['db_dump_data.json']
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(username='wo'))
+
+    def test_same_as_serial(self):
+        threads = set()
+        run_query = query_plan.run_query
+
+        def record_thread(func, *args):
+            threads.add(threading.current_thread().name)
+            return run_query(func, *args)
+
+        # 트랜잭션 밖에서는 각 집계가 쿼리 스레드의 별도 연결에서 실행됨
+        with mock.patch.object(query_plan, 'run_query', record_thread):
+            response = self.client.get(reverse('spend_analytics'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(threads)
+        self.assertTrue(all(name.startswith('query-plan') for name in threads))
+
+        # 트랜잭션 안에서는 요청 스레드의 연결에서 순서대로 실행되며, 결과는 같아야 함
+        with transaction.atomic():
+            serial_response = self.client.get(reverse('spend_analytics'))
+
+        self.assertEqual(serial_response.data, response.data)
@@ -2,17 +2,21 @@ from django.urls import path
 
 from .views import (
     SpendCreateAPIView,
+    SpendBulkCreateAPIView,
     SpendListAPIView,
     SpendDetailAPIView,
     SpendUpdateAPIView,
     SpendDeleteAPIView,
-    SpendAnalyticsAPIView
+    SpendAnalyticsAPIView,
+    SpendExportAPIView
 )
 
 
 urlpatterns = [
     path('create/', SpendCreateAPIView.as_view(), name='spend_create'),
+    path('bulk/', SpendBulkCreateAPIView.as_view(), name='spend_bulk_create'),
     path('list/', SpendListAPIView.as_view(), name='spend_list'),
+    path('export/', SpendExportAPIView.as_view(), name='spend_export'),
     path('detail/<int:spend_no>', SpendDetailAPIView.as_view(), name='spend_detail'),
     path('detail/<int:spend_no>/update/',
          SpendUpdateAPIView.as_view(),
@@ -2,24 +2,50 @@ from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import JSONParser
+from rest_framework.exceptions import ValidationError
 
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 
-from django.db.models.functions import Coalesce
-from django.db.models import Sum, Avg
+from django.db.models.functions import Coalesce, ExtractWeekDay
+from django.db.models import Count, Sum, Q
 
 from drf_yasg.utils import swagger_auto_schema
 
-from categories.models import Category
+from asgiref.sync import sync_to_async
+
+from categories.registry import get_categories, get_category, get_category_map, get_category_id
 from budgets.models import Budget
-from .models import Spend
-from .serializers import SpendSerializer, SpendListSerializer
+from budgets.status import invalidate_budget_status
+from .models import Spend, DailySpendRollup
+from .serializers import SpendSerializer, SpendListSerializer, SpendBulkRowSerializer
+from .aggregates import sum_by_category, asummarize_spends, exclude_spends
+from .baselines import get_spend_baseline
+from .parsers import NDJSONParser
+from .renderers import CSVRenderer, NDJSONRenderer
+from .exports import iter_spend_rows, stream_spends_csv, stream_spends_ndjson, aiter_chunks
+from .rollups import refresh_daily_spend_rollups
+from .list_cache import (
+    get_spend_list_cache_key,
+    get_spend_list_cache,
+    set_spend_list_cache,
+    invalidate_spend_list
+)
 
 from swagger_parameters import *
+from pagination import KeysetPaginator
+from async_views import AsyncAPIView
+from query_plan import run_query_plan
 
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 
+import calendar
+
 
 # api/v1/spends/create/
 class SpendCreateAPIView(APIView):
@@ -56,7 +82,7 @@ class SpendCreateAPIView(APIView):
         try:
             spend_data = {
                 'user': user.id,
-                'category': Category.objects.get(name=category).id,
+                'category': get_category_id(category),
                 'amount': int(amount),
                 'memo': memo,
                 # str -> datetime -> date 형변환
@@ -73,7 +99,10 @@ class SpendCreateAPIView(APIView):
 
         serializer = SpendSerializer(data=spend_data)
         if serializer.is_valid():
-            serializer.save()
+            # 지출 내역과 일별 집계(spends/signals.py)를 하나의 트랜잭션에서 저장
+            # 집계 갱신이 실패하면 지출 내역도 저장되지 않음
+            with transaction.atomic():
+                serializer.save()
 
             return Response(
                 {'data': serializer.data},
@@ -84,49 +113,164 @@ class SpendCreateAPIView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-# 지출 내역에 대한 응답 메시지를 생성하는 함수
-# 지출 내역 쿼리셋, 제외할 지출 내역 ID 리스트, 카테고리 쿼리셋을 입력받아야 함
-def make_spend_list_response_data(spend_list, exclude_spend_no, categories):
-    serializer = SpendListSerializer(spend_list, many=True)
+# 대량 지출 기록의 한 행을 검증하고 Spend 객체로 변환하는 함수
+# 카테고리는 미리 읽어둔 카테고리명 -> ID 딕셔너리에서 찾으므로 추가 쿼리가 발생하지 않음
+# 값이 잘못되었다면 항목별 에러 메시지를 담은 ValidationError 발생
+def make_spend_from_row(user, row, category_map):
+    serializer = SpendBulkRowSerializer(data=row)
+    serializer.is_valid(raise_exception=True)
 
-    # 만약 제외할 지출 내역이 있다면
-    if exclude_spend_no != []:
-        # 잘못된 지출 내역 ID가 들어있을 경우를 대비한 예외처리
-        try:
-            # 지출 내역 리스트를 순회하면서 지출 내역 쿼리셋에서 제외시킴
-            for spend_no in exclude_spend_no:
-                spend_list = spend_list.exclude(id=int(spend_no))
-        except (ValueError, TypeError) as e:
+    data = serializer.validated_data
+    if data['category'] not in category_map:
+        raise ValidationError(
+            {'category': [f'존재하지 않는 카테고리입니다. {data["category"]}']}
+        )
+
+    return Spend(
+        user=user,
+        category_id=category_map[data['category']],
+        amount=data['amount'],
+        memo=data.get('memo'),
+        spend_at=data['spend_at']
+    )
+
+
+# api/v1/spends/bulk/
+class SpendBulkCreateAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    @swagger_auto_schema(
+        operation_id='지출 기록 대량 생성',
+        operation_description='현재 로그인한 사용자의 지출 기록 여러 개를 한 번에 생성합니다. JSON 배열 또는 NDJSON(application/x-ndjson) 형식을 사용할 수 있으며, 하나라도 잘못된 기록이 있으면 아무것도 저장하지 않습니다.',
+        tags=['지출', '생성'],
+        manual_parameters=[HEADER_TOKEN],
+        request_body=SpendSerializer(many=True),
+        responses={
+            201: '성공적으로 데이터 생성이 완료되었습니다.',
+            400: '입력한 값에 문제가 있습니다. 기록별 에러 메시지를 확인해주세요.',
+            401: '인증되지 않은 사용자입니다. 로그인 후 사용해주세요.'
+        }
+    )
+    def post(self, request):
+        user = request.user
+        rows = request.data
+
+        # 요청 본문은 지출 기록의 배열이어야 함
+        if not isinstance(rows, list) or len(rows) == 0:
             return Response(
-                {'message': f'유효한 지출 내역을 입력해주세요. {e}'},
+                {'message': '지출 기록 배열을 입력해주세요.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-    # 지출 내역 쿼리셋의 금액 합계
-    spend_sum = spend_list.aggregate(
-        sum=Coalesce(Sum('amount'), 0)
-    ).get('sum')
+        # 한 번에 저장할 수 있는 최대 개수 제한
+        if len(rows) > settings.SPEND_BULK_MAX_SIZE:
+            return Response(
+                {'message': f'한 번에 최대 {settings.SPEND_BULK_MAX_SIZE}개까지 저장할 수 있습니다.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-    # 카테고리별 금액 합계
-    category_sum = {}
-    # 카테고리 쿼리셋을 순회하면서 금액 합계를 구함
-    for category in categories:
-        category_sum[category.name] = spend_list.filter(
-            category=category
-        ).aggregate(sum=Coalesce(Sum('amount'), 0)).get('sum')
+        # 카테고리명 -> ID 딕셔너리, 프로세스에 읽어둔 카테고리 목록에서 생성
+        category_map = get_category_map()
 
-    # 위에서 나온 데이터들을 Response로 묶어서 반환
-    return Response(
-        {
-            'list': serializer.data,
-            'spend_sum': spend_sum,
-            'category_sum': category_sum
-        }, status=status.HTTP_200_OK
+        # 모든 기록을 먼저 검증하고, 잘못된 기록은 순번과 에러 메시지를 모아둠
+        spends = []
+        errors = []
+        for index, row in enumerate(rows):
+            try:
+                spends.append(make_spend_from_row(user, row, category_map))
+            except ValidationError as e:
+                errors.append({'index': index, 'errors': e.detail})
+
+        if errors:
+            return Response(
+                {
+                    'message': '유효하지 않은 지출 기록이 있습니다. 아무것도 저장되지 않았습니다.',
+                    'errors': errors
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # 하나의 트랜잭션 안에서 나누어 저장
+        # bulk_create는 시그널이 발생하지 않으므로 일별 집계와 예산 현황, 지출 목록 캐시도 직접 갱신
+        with transaction.atomic():
+            Spend.objects.bulk_create(
+                spends,
+                batch_size=settings.SPEND_BULK_CHUNK_SIZE
+            )
+            refresh_daily_spend_rollups(
+                user.id,
+                [spend.spend_at for spend in spends]
+            )
+            invalidate_budget_status(user.id)
+            invalidate_spend_list(user.id)
+
+        return Response(
+            {
+                'message': '데이터 저장을 완료했습니다.',
+                'count': len(spends)
+            }, status=status.HTTP_201_CREATED
+        )
+
+
+# 지출 내역에 대한 응답 메시지를 생성하는 함수
+# 요청 객체, 지출 내역 쿼리셋, 제외할 지출 내역 ID 리스트, 카테고리 쿼리셋, 응답을 저장할 캐시 키를 입력받아야 함
+async def make_spend_list_response_data(request, spend_list, exclude_spend_no, categories, cache_key):
+    # 제외할 지출 내역을 id__in 조건 하나로 쿼리셋에서 제외
+    # 잘못된 지출 내역 ID가 들어있을 경우를 대비한 예외처리
+    try:
+        summary_spend_list = exclude_spends(spend_list, exclude_spend_no)
+    except (ValueError, TypeError) as e:
+        return Response(
+            {'message': f'유효한 지출 내역을 입력해주세요. {e}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # (지출일, id) 기준 키셋 페이지네이션
+    # 잘못된 커서나 페이지 크기가 들어있을 경우를 대비한 예외처리
+    paginator = KeysetPaginator('spend_at')
+    try:
+        # 사용자와 카테고리를 JOIN으로 함께 가져와서 직렬화 시 추가 쿼리가 발생하지 않도록 함
+        page, next_cursor = await paginator.apaginate(
+            spend_list.select_related('user', 'category'),
+            request
+        )
+    except ValueError as e:
+        return Response(
+            {'message': f'유효한 페이지 정보를 입력해주세요. {e}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    serializer = SpendListSerializer(page, many=True)
+
+    response_data = {
+        'list': serializer.data,
+        'next': next_cursor
+    }
+
+    # 합계는 검색 조건 전체에 대한 값이므로 첫 페이지에서 한 번만 산출
+    if paginator.is_first_page(request):
+        # 지출 내역 쿼리셋의 금액 합계와 카테고리별 금액 합계
+        # GROUP BY 쿼리 한 번으로 함께 산출
+        spend_sum, category_sum = await asummarize_spends(
+            summary_spend_list,
+            categories
+        )
+
+        response_data['spend_sum'] = spend_sum
+        response_data['category_sum'] = category_sum
+
+    # 같은 검색 조건의 다음 요청은 캐시에서 응답
+    await sync_to_async(set_spend_list_cache)(
+        cache_key,
+        {**response_data, 'list': list(serializer.data)}
     )
 
+    # 위에서 나온 데이터들을 Response로 묶어서 반환
+    return Response(response_data, status=status.HTTP_200_OK)
+
 
 # api/v1/spends/list/
-class SpendListAPIView(APIView):
+class SpendListAPIView(AsyncAPIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
@@ -135,7 +279,8 @@ class SpendListAPIView(APIView):
         tags=['지출', '목록'],
         manual_parameters=[
             HEADER_TOKEN, QUERY_START_AT, QUERY_END_AT,
-            QUERY_MIN_AMOUNT, QUERY_MAX_AMOUNT, QUERY_CATEGORY, QUERY_EXCLUDE
+            QUERY_MIN_AMOUNT, QUERY_MAX_AMOUNT, QUERY_CATEGORY, QUERY_EXCLUDE,
+            QUERY_CURSOR, QUERY_PAGE_SIZE
         ],
         responses={
             200: '요청이 처리되었습니다.',
@@ -143,7 +288,7 @@ class SpendListAPIView(APIView):
             401: '인증되지 않은 사용자입니다. 로그인 후 사용해주세요.'
         }
     )
-    def get(self, request):
+    async def get(self, request):
         # URL의 쿼리 파라미터
         start_at = request.query_params.get('start_at', None)
         end_at = request.query_params.get('end_at', None)
@@ -166,6 +311,17 @@ class SpendListAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # 같은 검색 조건의 응답이 캐시되어 있다면 쿼리 없이 그대로 반환
+        # 지출 내역이 생성, 수정, 삭제되면 사용자의 캐시 세대가 바뀌어 새로 조회함
+        cache_key = await sync_to_async(get_spend_list_cache_key)(
+            request,
+            start_at,
+            end_at
+        )
+        response_data = await sync_to_async(get_spend_list_cache)(cache_key)
+        if response_data is not None:
+            return Response(response_data, status=status.HTTP_200_OK)
+
         # URL의 쿼리 파라미터
         min_amount = request.query_params.get('min_amount', None)
         max_amount = request.query_params.get('max_amount', None)
@@ -173,7 +329,7 @@ class SpendListAPIView(APIView):
         exclude_spend_no = request.query_params.getlist('exclude', None)
 
         # 전체 카테고리
-        categories = Category.objects.all()
+        categories = await sync_to_async(get_categories)()
 
         # 최솟값이나 최댓값 둘 중 하나라도 없는 경우
         # -> 최솟값 최댓값 검색 안함
@@ -182,7 +338,7 @@ class SpendListAPIView(APIView):
             if category is not None:
                 # 존재하지 않는 카테고리명을 입력했을 경우를 대비한 예외처리
                 try:
-                    category = Category.objects.get(name=category)
+                    category = await sync_to_async(get_category)(category)
                 except ObjectDoesNotExist as e:
                     return Response(
                         {'message': f'유효한 카테고리를 입력해주세요. {e}'},
@@ -201,10 +357,12 @@ class SpendListAPIView(APIView):
 
                 # 지출 내역에 대한 응답 메시지를 생성하는 함수 호출
                 # Response 타입을 반환받음
-                response_data = make_spend_list_response_data(
+                response_data = await make_spend_list_response_data(
+                    request,
                     spend_list,
                     exclude_spend_no,
-                    categories
+                    categories,
+                    cache_key
                 )
 
                 # 적용된 검색 조건: 검색 시작일, 종료일, 카테고리
@@ -221,10 +379,12 @@ class SpendListAPIView(APIView):
 
             # 지출 내역에 대한 응답 메시지를 생성하는 함수 호출
             # Response 타입을 반환받음
-            response_data = make_spend_list_response_data(
+            response_data = await make_spend_list_response_data(
+                request,
                 spend_list,
                 exclude_spend_no,
-                categories
+                categories,
+                cache_key
             )
 
             # 적용된 검색 조건: 검색 시작일, 종료일
@@ -253,7 +413,7 @@ class SpendListAPIView(APIView):
         if category is not None:
             # 존재하지 않는 카테고리명을 입력했을 경우를 대비한 예외처리
             try:
-                category = Category.objects.get(name=category)
+                category = await sync_to_async(get_category)(category)
             except ObjectDoesNotExist as e:
                 return Response(
                     {'message': f'유효한 값을 입력해주세요. {e}'},
@@ -275,10 +435,12 @@ class SpendListAPIView(APIView):
 
             # 지출 내역에 대한 응답 메시지를 생성하는 함수 호출
             # Response 타입을 반환받음
-            response_data = make_spend_list_response_data(
+            response_data = await make_spend_list_response_data(
+                request,
                 spend_list,
                 exclude_spend_no,
-                categories
+                categories,
+                cache_key
             )
 
             # 적용된 검색 조건: 검색 시작일, 종료일, 카테고리, 최솟값, 최댓값
@@ -300,16 +462,78 @@ class SpendListAPIView(APIView):
 
         # 지출 내역에 대한 응답 메시지를 생성하는 함수 호출
         # Response 타입을 반환받음
-        response_data = make_spend_list_response_data(
+        response_data = await make_spend_list_response_data(
+            request,
             spend_list,
             exclude_spend_no,
-            categories
+            categories,
+            cache_key
         )
 
         # 적용된 검색 조건: 검색 시작일, 종료일, 최솟값, 최댓값
         return response_data
 
 
+# api/v1/spends/export/
+class SpendExportAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    # ?format= 쿼리 파라미터로 형식을 선택하며, 없으면 첫 번째 렌더러(CSV)를 사용
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+
+    @swagger_auto_schema(
+        operation_id='지출 내역 내보내기',
+        operation_description='현재 로그인한 사용자의 지출 내역 전체를 CSV 또는 NDJSON 파일로 내보냅니다. 지출 내역을 나누어 읽으면서 바로 전송하므로 기간이 길어도 응답이 바로 시작됩니다.',
+        tags=['지출', '목록'],
+        manual_parameters=[
+            HEADER_TOKEN, QUERY_EXPORT_FORMAT,
+            QUERY_EXPORT_START_AT, QUERY_EXPORT_END_AT
+        ],
+        responses={
+            200: '요청이 처리되었습니다.',
+            400: '입력한 값에 문제가 있습니다. 에러 메시지를 확인해주세요.',
+            401: '인증되지 않은 사용자입니다. 로그인 후 사용해주세요.',
+            404: '지원하지 않는 형식입니다.'
+        }
+    )
+    def get(self, request):
+        # URL의 쿼리 파라미터
+        start_at = request.query_params.get('start_at', None)
+        end_at = request.query_params.get('end_at', None)
+
+        # 시작일과 종료일은 선택값이며, 입력했다면 date 타입으로 형변환
+        # 형변환 불가능할 경우를 대비한 예외처리
+        try:
+            if start_at is not None:
+                start_at = datetime.strptime(start_at, '%Y-%m-%d').date()
+            if end_at is not None:
+                end_at = datetime.strptime(end_at, '%Y-%m-%d').date()
+        except ValueError as e:
+            return Response(
+                {'message': f'유효한 날짜를 입력해주세요. {e}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = iter_spend_rows(request.user, start_at, end_at)
+
+        if request.accepted_renderer.format == 'ndjson':
+            streaming_content = stream_spends_ndjson(rows)
+        else:
+            streaming_content = stream_spends_csv(rows)
+
+        # ASGI 서버(uvicorn 워커)에서는 비동기 이터레이터로 넘겨야 전체를 메모리에 올리지 않고 읽는 대로 보냄
+        if isinstance(request._request, ASGIRequest):
+            streaming_content = aiter_chunks(streaming_content)
+
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            streaming_content,
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = f'attachment; filename="spends.{renderer.format}"'
+
+        return response
+
+
 # api/v1/detail/<int:spend_no>
 class SpendDetailAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -364,26 +588,29 @@ class SpendUpdateAPIView(APIView):
     def put(self, request, spend_no):
         user = request.user
 
-        # URL에 포함된 지출 내역 ID가 잘못되었거나, 타인의 것일 경우를 대비한 예외 처리
-        try:
-            # 로그인한 사용자의 지출 내역이면서, 동시에 지출 내역 ID를 만족해야 함
-            spend = Spend.objects.get(user=user.id, id=spend_no)
-        except ObjectDoesNotExist as e:
-            return Response(
-                {'message': f'유효한 값을 입력해주세요. {e}'},
-                status=status.HTTP_406_NOT_ACCEPTABLE
-            )
+        # 지출 내역과 일별 집계를 하나의 트랜잭션에서 저장
+        # 수정 전 값으로 집계를 갱신하므로(spends/signals.py), 동시에 같은 지출 내역을 수정하지 못하도록 행을 잠금
+        with transaction.atomic():
+            # URL에 포함된 지출 내역 ID가 잘못되었거나, 타인의 것일 경우를 대비한 예외 처리
+            try:
+                # 로그인한 사용자의 지출 내역이면서, 동시에 지출 내역 ID를 만족해야 함
+                spend = Spend.objects.select_for_update().get(user=user.id, id=spend_no)
+            except ObjectDoesNotExist as e:
+                return Response(
+                    {'message': f'유효한 값을 입력해주세요. {e}'},
+                    status=status.HTTP_406_NOT_ACCEPTABLE
+                )
 
-        # 수정된 데이터의 유효성 검사
-        # partial=True 옵션을 통해 모든 값이 입력되지 않아도 됨
-        serializer = SpendSerializer(spend, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
+            # 수정된 데이터의 유효성 검사
+            # partial=True 옵션을 통해 모든 값이 입력되지 않아도 됨
+            serializer = SpendSerializer(spend, data=request.data, partial=True)
+            if serializer.is_valid():
+                serializer.save()
 
-            return Response(
-                {'data': serializer.data},
-                status=status.HTTP_200_OK
-            )
+                return Response(
+                    {'data': serializer.data},
+                    status=status.HTTP_200_OK
+                )
 
         return Response(
             {'message': '데이터 수정에 실패했습니다. 입력값을 확인해주세요.'},
@@ -408,18 +635,20 @@ class SpendDeleteAPIView(APIView):
     def delete(self, request, spend_no):
         user = request.user
 
-        # URL에 포함된 지출 내역 ID가 잘못되었거나, 타인의 것일 경우를 대비한 예외 처리
-        try:
-            # 로그인한 사용자의 지출 내역이면서, 동시에 지출 내역 ID를 만족해야 함
-            spend = Spend.objects.get(user=user.id, id=spend_no)
-        except ObjectDoesNotExist as e:
-            return Response(
-                {'message': f'유효한 값을 입력해주세요. {e}'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        # 지출 내역 삭제와 일별 집계 갱신을 하나의 트랜잭션에서 처리
+        # 삭제할 값으로 집계를 갱신하므로, 동시에 같은 지출 내역을 수정하지 못하도록 행을 잠금
+        with transaction.atomic():
+            # URL에 포함된 지출 내역 ID가 잘못되었거나, 타인의 것일 경우를 대비한 예외 처리
+            try:
+                # 로그인한 사용자의 지출 내역이면서, 동시에 지출 내역 ID를 만족해야 함
+                spend = Spend.objects.select_for_update().get(user=user.id, id=spend_no)
+            except ObjectDoesNotExist as e:
+                return Response(
+                    {'message': f'유효한 값을 입력해주세요. {e}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-        # 데이터 삭제
-        spend.delete()
+            spend.delete()
 
         return Response(
             {'message': '데이터가 삭제되었습니다.'},
@@ -428,7 +657,7 @@ class SpendDeleteAPIView(APIView):
 
 
 # api/v1/spends/analytics/
-class SpendAnalyticsAPIView(APIView):
+class SpendAnalyticsAPIView(AsyncAPIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
@@ -442,46 +671,113 @@ class SpendAnalyticsAPIView(APIView):
             401: '인증되지 않은 사용자입니다. 로그인 후 사용해주세요.'
         }
     )
-    def get(self, request):
+    async def get(self, request):
         user = request.user
 
-        # 전체 카테고리 가져오기
-        categories = Category.objects.all()
-        # 현재 로그인한 사용자의 지출 내역 전체 가져오기
-        spends = Spend.objects.filter(user=user)
-
         # 오늘 날짜를 date 타입으로
         today = datetime.now().date()
 
         response_data = {}
 
+        # 현재 로그인한 사용자의 일별 지출 집계
+        # 원본 지출 내역 대신 (카테고리, 날짜)별로 미리 합산된 행을 읽음
+        rollups = DailySpendRollup.objects.filter(user=user)
+
         # 이번달 1일부터 오늘까지 사용한 내역 필터링
         # 이번달 1일 <= 지출일 <= 오늘
         # eg) 2023-11-01 <= 지출일 <= 2023-11-14
-        this_month_spend = spends.filter(
-            spend_at__gte=datetime(today.year, today.month, 1).date(),
-            spend_at__lte=today
+        this_month_spend = rollups.filter(
+            date__gte=datetime(today.year, today.month, 1).date(),
+            date__lte=today
         )
 
         # 지난달 1일부터 지난달 오늘 날짜까지 사용한 내역 필터링
         # 지난달 1일 <= 지출일 <= 지난달 오늘 날짜
         # eg) 2023-10-01 <= 지출일 <= 2023-10-14
-        last_month_spend = spends.filter(
-            spend_at__gte=(
+        last_month_spend = rollups.filter(
+            date__gte=(
                 datetime(today.year, today.month, 1).date() -
                 relativedelta(months=1)
             ),
-            spend_at__lte=(today - relativedelta(months=1))
+            date__lte=(today - relativedelta(months=1))
         )
 
+        # 오늘과 같은 요일의 일별 집계
+        # ExtractWeekDay는 일요일이 1, 토요일이 7이므로 파이썬의 요일 값을 변환
+        # -> 오늘 지출액 합계와, 오늘을 제외한 모든 같은 요일의 지출액 합계
+        # eg) 오늘은 화요일 -> 오늘 이전의 모든 화요일의 지출액 합계 산출
+        weekday_spend = rollups.annotate(
+            weekday=ExtractWeekDay('date')
+        ).filter(
+            weekday=today.isoweekday() % 7 + 1
+        )
+
+        # 이번달 말일
+        month_day = calendar.monthrange(today.year, today.month)[1]
+
+        # 현재 로그인한 사용자의 이번달 1일부터 말일까지의 예산
+        user_budget_list = Budget.objects.filter(
+            user=user,
+            start_at=datetime(today.year, today.month, 1).date(),
+            end_at=datetime(today.year, today.month, month_day).date()
+        )
+
+        # 응답에 필요한 집계들의 실행 계획
+        # 노드 이름 -> (함수, 의존하는 노드), 의존하는 노드가 끝난 집계부터 동시에 실행됨
+        # - 전체 카테고리
+        # - 이번달, 지난달 같은 기간의 카테고리별 지출액 합계(각각 GROUP BY 쿼리 한 번, 카테고리에 의존)
+        # - 오늘 지출액 합계와, 오늘을 제외한 모든 같은 요일의 지출액 합계
+        # - 현재 로그인한 사용자의 이번달 예산액 합계와 건수
+        # - 전체 사용자의 오늘 지출액, 이번달 예산액 통계(주기 작업이 미리 산출해 캐시에 저장해둔 값)
+        # - 위 통계를 산출한 시점의 현재 로그인한 사용자의 통계(전체 사용자 통계에 의존)
+        results = await run_query_plan({
+            'categories': (get_categories, []),
+            'this_month_category_sum': (
+                lambda categories: sum_by_category(
+                    this_month_spend,
+                    categories,
+                    field='total'
+                ),
+                ['categories']
+            ),
+            'last_month_category_sum': (
+                lambda categories: sum_by_category(
+                    last_month_spend,
+                    categories,
+                    field='total'
+                ),
+                ['categories']
+            ),
+            'weekday_sums': (
+                lambda: weekday_spend.aggregate(
+                    today_sum=Coalesce(Sum('total', filter=Q(date=today)), 0),
+                    today_count=Coalesce(Sum('count', filter=Q(date=today)), 0),
+                    weekday_sum=Coalesce(Sum('total', filter=~Q(date=today)), 0)
+                ),
+                []
+            ),
+            'user_budgets': (
+                lambda: user_budget_list.aggregate(
+                    sum=Coalesce(Sum('amount'), 0),
+                    count=Count('id')
+                ),
+                []
+            ),
+            'baseline': (lambda: get_spend_baseline(today, user.id), [])
+        })
+
+        categories = results['categories']
+        this_month_category_sum = results['this_month_category_sum']
+        last_month_category_sum = results['last_month_category_sum']
+        weekday_sums = results['weekday_sums']
+        user_budgets = results['user_budgets']
+        baseline, baseline_contribution = results['baseline']
+
         # 이번달 1일부터 오늘까지 지출 내역 합계
-        this_month_spend_sum = this_month_spend.aggregate(
-            sum=Coalesce(Sum('amount'), 0)).get('sum')
+        this_month_spend_sum = sum(this_month_category_sum.values())
 
         # 지난달 1일부터 지난달 오늘 날짜까지 지출 내역 합계
-        last_month_spend_sum = last_month_spend.aggregate(
-            sum=Coalesce(Sum('amount'), 0)
-        ).get('sum')
+        last_month_spend_sum = sum(last_month_category_sum.values())
 
         # 만약 위의 두 값 중 하나라도 없으면 0이 되므로
         # ZeroDivisionError 대신 'No Data'라는 임의의 값을 입력
@@ -499,21 +795,11 @@ class SpendAnalyticsAPIView(APIView):
 
         # 전체 카테고리를 가져와서 순회
         for category in categories:
-            # 이번달 오늘까지의 지출 내역에 카테고리를 넣어 필터링
-            # 그 후 지출액 합계 산출
-            this_month_category_spend_sum = this_month_spend.filter(
-                category=category
-            ).aggregate(
-                sum=Coalesce(Sum('amount'), 0)
-            ).get('sum')
-
-            # 지난달 오늘까지의 지출 내역에 카테고리를 넣어 필터링
-            # 그 후 지출액 합계 산출
-            last_month_category_spend_sum = last_month_spend.filter(
-                category=category
-            ).aggregate(
-                sum=Coalesce(Sum('amount'), 0)
-            ).get('sum')
+            # 이번달 오늘까지의 해당 카테고리 지출액 합계
+            this_month_category_spend_sum = this_month_category_sum[category.name]
+
+            # 지난달 오늘까지의 해당 카테고리 지출액 합계
+            last_month_category_spend_sum = last_month_category_sum[category.name]
 
             # 만약 위의 두 값 중 하나라도 없으면 0이 되므로
             # ZeroDivisionError 대신 'No Data'라는 임의의 값을 입력
@@ -526,104 +812,47 @@ class SpendAnalyticsAPIView(APIView):
             except ZeroDivisionError as e:
                 response_data['spend_per_last_month'][category.name] = 'No Data'
 
-        # 사용자의 전체 지출 내역에서 오늘을 제외
-        spends_for_weekday = spends.exclude(
-            spend_at=today
-        )
-
-        # 오늘을 제외한, 이전의 모든 같은 요일의 지출액 합계 산출
-        # eg) 오늘은 화요일 -> 오늘 이전의 모든 화요일의 지출액 합계 산출
-        spends_for_weekday_sum = 0
-        for spend in spends_for_weekday:
-            if spend.spend_at.weekday() == today.weekday():
-                spends_for_weekday_sum += spend.amount
-
-        # 전체 지출 내역에서 오늘 사용자가 지출한 지출액 합계 산출
-        spends_for_today_sum = spends.filter(spend_at=today).aggregate(
-            sum=Coalesce(Sum('amount'), 0)
-        ).get('sum')
         # 이전의 요일들 전체 지출액 대비 오늘 전체 지출액의 소비율 계산
         # 두 값을 나누고 100을 곱한 다음, 소숫점 첫째 자리에서 반올림
         # 그 후 정수형으로 형변환
-        response_data['spend_per_last_weekdays'] = f'{int((round((spends_for_today_sum / spends_for_weekday_sum) * 100, 0)))}%'
-
-        # 현재 로그인한 사용자를 제외한 모든 사용자의 오늘 지출액 평균 산출
-        # -> 즉 나를 뺀 나머지 전부가 오늘 사용한 지출액 평균
-        # 카테고리는 고려되고 있지 않음
-        other_user_today_spends_average = Spend.objects.exclude(user=user).filter(
-            spend_at=today
-        ).aggregate(average=Avg('amount')).get('average')
-
-        # 월에 따른 말일 결정
-        match today.month:
-            case 1, 3, 5, 7, 8, 10, 12:
-                month_day = 31
-            case _:
-                month_day = 30
-
-        # 현재 로그인한 사용자를 제외한 모든 사용자의 이번달 1일부터 이번달 말일까지의 예산액 평균 산출
-        # 그 후 일별로 나눔
-        # -> 즉 나를 뺀 나머지 전부가 이번달에 사용할 일단위 평균 예산액
-        # -> 예산은 일단위가 아니라 월단위로 입력되므로 가능
-        other_user_budget_per_day = Budget.objects.exclude(user=user).filter(
-            start_at=datetime(today.year, today.month, 1).date(),
-            end_at=datetime(today.year, today.month, month_day).date()
-        ).aggregate(
-            average=Avg('amount')
-        ).get('average') / month_day
-
-        # 타 사용자의 일단위 평균 예산액 대비 오늘 평균 지출액을 통한 소비율 계산
-        # 두 값을 나누고 100을 곱한 다음, 소숫점 첫째 자리에서 반올림
-        # 그 후 정수형으로 형변환
-        other_user_percent = int(
-            round((other_user_today_spends_average /
-                  other_user_budget_per_day) * 100, 0)
-        )
-
-        # 현재 로그인한 사용자의 오늘 지출액 평균 산출
-        # 카테고리는 고려되고 있지 않음
-        user_today_spends_average = spends.filter(spend_at=today).aggregate(
-            average=Avg('amount')
-        ).get('average')
-
-        # 현재 로그인한 사용자의 이번달 1일부터 말일까지의 예산액 평균 산출
-        # 그 후 일별로 나눔
-        # -> 즉 내가 이번달에 사용할 일단위 평균 예산액
-        # -> 예산은 일단위가 아니라 월단위로 입력되므로 가능
-        user_budget_per_day = Budget.objects.filter(
-            user=user,
-            start_at=datetime(today.year, today.month, 1).date(),
-            end_at=datetime(today.year, today.month, month_day).date()
-        ).aggregate(
-            average=Avg('amount')
-        ).get('average') / month_day
-
-        # 현재 로그인한 사용자의 일단위 평균 예산액 대비 오늘 평균 지출액을 통한 소비율 계산
-        # 두 값을 나누고 100을 곱한 다음, 소숫점 첫째 자리에서 반올림
-        # 그 후 정수형으로 형변환
-        user_percent = int(
-            round((user_today_spends_average / user_budget_per_day) * 100, 0)
-        )
+        try:
+            response_data['spend_per_last_weekdays'] = f'{int(round((weekday_sums["today_sum"] / weekday_sums["weekday_sum"]) * 100, 0))}%'
+        except ZeroDivisionError as e:
+            response_data['spend_per_last_weekdays'] = 'No Data'
 
-        # 최종적으로는 타 사용자 대비 현재 로그인한 사용자의 소비율이 얼마나 되는가를 산출
-        # eg) 타 사용자 평균 소비율 50% / 내 평균 소비율 60% -> 나는 타 사용자 대비 120%에 해당
-        # -> 즉 두 퍼센트의 차이를 타 사용자 평균 소비율로 나눠준 다음,
-        # -> 내가 더 많이 사용했다면: 100에 해당 값 가산
-        # -> 내가 덜 사용했다면: 100에 해당 값 감산
-        spend_per_other = user_percent - other_user_percent
-        if spend_per_other > 0:
-            spend_per_other = f'{100 + int(round(spend_per_other / other_user_percent * 100, 0))}%'
-        # 두 값이 정확하게 같다면 100%에 해당
-        elif spend_per_other == 0:
-            spend_per_other = f'100%'
-        else:
-            spend_per_other = f'{100 - int(round(spend_per_other / other_user_percent * 100, 0))}%'
+        # 전체 사용자 통계에서 같은 시점에 산출한 현재 로그인한 사용자의 값을 빼서
+        # 나를 뺀 나머지 사용자들의 합계와 건수를 구함
+        # 통계를 산출한 뒤에 추가된 내 지출, 예산은 두 값 모두에 포함되지 않으므로 결과에 영향을 주지 않음
+        others_spend_sum = baseline['spend_sum'] - baseline_contribution['spend_sum']
+        others_spend_count = baseline['spend_count'] - baseline_contribution['spend_count']
+        others_budget_sum = baseline['budget_sum'] - baseline_contribution['budget_sum']
+        others_budget_count = baseline['budget_count'] - baseline_contribution['budget_count']
 
-        # 만약 위의 두 값 중 하나라도 없으면 0이 되므로
+        # 오늘 지출이나 이번달 예산이 없으면 0이 되므로
         # ZeroDivisionError 대신 'No Data'라는 임의의 값을 입력
+        # 카테고리는 고려되고 있지 않음
         try:
-            response_data['spend_per_others'] = spend_per_other
-        except:
+            # 일단위 평균 예산액 대비 오늘 평균 지출액을 통한 소비율 계산
+            # -> 평균 지출액: 지출액 합계 / 지출 건수
+            # -> 일단위 평균 예산액: 예산은 월단위로 입력되므로 평균 예산액 / 말일
+            # 두 값을 나누고 100을 곱한 다음, 소숫점 첫째 자리에서 반올림
+            # 그 후 정수형으로 형변환
+            other_user_percent = int(round(
+                (others_spend_sum / others_spend_count) /
+                (others_budget_sum / others_budget_count / month_day) * 100, 0
+            ))
+            user_percent = int(round(
+                (weekday_sums['today_sum'] / weekday_sums['today_count']) /
+                (user_budgets['sum'] / user_budgets['count'] / month_day) * 100, 0
+            ))
+
+            # 최종적으로는 타 사용자 대비 현재 로그인한 사용자의 소비율이 얼마나 되는가를 산출
+            # eg) 타 사용자 평균 소비율 50% / 내 평균 소비율 60% -> 나는 타 사용자 대비 120%에 해당
+            # -> 즉 두 퍼센트의 차이를 타 사용자 평균 소비율로 나눠준 다음,
+            # -> 내가 더 많이 사용했다면 100에 해당 값이 가산되고, 덜 사용했다면 감산됨
+            spend_per_other = user_percent - other_user_percent
+            response_data['spend_per_others'] = f'{100 + int(round(spend_per_other / other_user_percent * 100, 0))}%'
+        except ZeroDivisionError as e:
             response_data['spend_per_others'] = 'No Data'
 
         return Response(
@@ -17,6 +17,14 @@ HEADER_TOKEN = openapi.Parameter(
     required=True
 )
 
+HEADER_IF_NONE_MATCH = openapi.Parameter(
+    'If-None-Match',
+    openapi.IN_HEADER,
+    type=openapi.TYPE_STRING,
+    description='이전 응답의 ETag 값',
+    required=False
+)
+
 QUERY_START_AT = openapi.Parameter(
     'start_at',
     openapi.IN_QUERY,
@@ -64,6 +72,42 @@ QUERY_EXCLUDE = openapi.Parameter(
     description='제외할 지출 ID',
 )
 
+QUERY_CURSOR = openapi.Parameter(
+    'cursor',
+    openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    description='다음 페이지 커서(이전 응답의 next 값)',
+)
+
+QUERY_PAGE_SIZE = openapi.Parameter(
+    'page_size',
+    openapi.IN_QUERY,
+    type=openapi.TYPE_INTEGER,
+    description='페이지 크기',
+)
+
+QUERY_EXPORT_FORMAT = openapi.Parameter(
+    'format',
+    openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    enum=['csv', 'ndjson'],
+    description='내보낼 형식(기본값: csv)',
+)
+
+QUERY_EXPORT_START_AT = openapi.Parameter(
+    'start_at',
+    openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    description='내보낼 지출 내역의 시작일(없으면 처음부터)',
+)
+
+QUERY_EXPORT_END_AT = openapi.Parameter(
+    'end_at',
+    openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    description='내보낼 지출 내역의 종료일(없으면 마지막까지)',
+)
+
 PATH_SPEND_NO = openapi.Parameter(
     'spend_no',
     openapi.IN_PATH,
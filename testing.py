@@ -0,0 +1,14 @@
+from django.db import connection
+
+
+# 인덱스 사용 여부를 확인하는 테스트에서 사용하는 믹스인
+class QueryPlanTestMixin:
+    # 쿼리셋의 실행 계획을 문자열로 반환
+    # 테스트 DB는 데이터가 적어 순차 탐색이 더 싸게 계산될 수 있으므로
+    # PostgreSQL에서는 순차 탐색을 비활성화하고 실행 계획을 확인
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        return queryset.explain()